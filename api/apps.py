@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self) -> None:
+        # Connect the search index, scheduler and system stats signal handlers
+        from api import scheduler, search, system_stats  # noqa: F401
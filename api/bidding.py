@@ -0,0 +1,402 @@
+"""
+Bid commit engine for the auction site.
+Places bids with a single conditional price update inside a transaction so
+concurrent bidders on the same item can never overwrite each other, and
+resolves proxy (maximum) bids in the same transaction.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api import order_book, response_cache
+from api.models import AuctionItem, Bid, ProxyBid, User
+from api.utils import create_and_send_notification, send_auction_update
+
+
+class BidRejected(Exception):
+    """
+    Raised when a bid cannot be placed. Carries the HTTP status the API returns.
+    """
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@dataclass
+class BidResult:
+    """Outcome of a committed bid"""
+
+    bid: Optional[Bid]
+    item: AuctionItem
+    leader_id: Optional[int]
+    outbid_user_ids: List[int] = field(default_factory=list)
+
+
+@dataclass
+class ProxyResolution:
+    """Outcome of resolving the proxy bids on an item"""
+
+    price: Decimal
+    leader_id: Optional[int]
+    exhausted: List[ProxyBid]
+    bids: List[Bid] = field(default_factory=list)
+
+    def changed(self, price: Decimal, leader_id: Optional[int]) -> bool:
+        return self.price != price or self.leader_id != leader_id
+
+
+def proxy_increment() -> Decimal:
+    return Decimal(str(getattr(settings, 'PROXY_BID_INCREMENT', '1.00')))
+
+
+def commit_bid(user: User, item_id: int, bid_amount: Decimal) -> BidResult:
+    """
+    Place a bid on an auction item.
+
+    The price check and the price update are one conditional UPDATE, so the
+    row lock taken by that statement serialises competing bidders and the
+    loser of a race simply matches zero rows. Any proxy bids on the item are
+    resolved before commit, and notifications are sent only once the
+    transaction has committed.
+
+    When the auction is resident in the order book, bids that cannot win are
+    rejected from memory without touching the database.
+    """
+    now = timezone.now()
+
+    entry = order_book.get_entry(item_id)
+    if entry is not None:
+        reason = rejection_reason_from_entry(user, entry, bid_amount, now)
+        if reason:
+            raise BidRejected(reason)
+
+    with transaction.atomic():
+        updated = (
+            AuctionItem.objects
+            .filter(
+                id=item_id,
+                status='active',
+                ends_at__gt=now,
+                current_price__lt=bid_amount,
+            )
+            .exclude(owner=user)
+            .update(
+                current_price=bid_amount,
+                bid_count=F('bid_count') + 1,
+                leading_bidder=user,
+                last_bid_at=now,
+            )
+        )
+
+        try:
+            item = AuctionItem.objects.select_related('owner').get(id=item_id)
+        except AuctionItem.DoesNotExist:
+            raise BidRejected("Auction item not found", status=404)
+
+        if not updated:
+            raise BidRejected(rejection_reason(user, item, bid_amount, now))
+
+        previous_bid = (
+            Bid.objects
+            .filter(item_id=item_id, is_winning=True)
+            .values_list('id', 'user_id')
+            .first()
+        )
+        previous_leader_id = None
+        if previous_bid:
+            Bid.objects.filter(id=previous_bid[0]).update(is_winning=False)
+            previous_leader_id = previous_bid[1]
+
+        bid = Bid.objects.create(
+            user=user,
+            item=item,
+            bid_amount=bid_amount,
+            is_winning=True
+        )
+
+        # A direct bid does not win a tie with a proxy already standing at
+        # that amount; the proxy was there first
+        resolution = apply_proxy_bids(item, bid_amount, user.id, now, leader_wins_ties=False)
+        if resolution.leader_id != user.id:
+            bid.is_winning = False
+
+        result = finish(item, bid, previous_leader_id, resolution, notify=True)
+
+        if resolution.changed(bid_amount, user.id):
+            transaction.on_commit(lambda: order_book.invalidate(item.id))
+        else:
+            transaction.on_commit(lambda: order_book.record_bid(bid))
+        transaction.on_commit(lambda: response_cache.bump(item.id))
+
+    return result
+
+
+def commit_proxy_bid(user: User, item_id: int, max_amount: Decimal) -> BidResult:
+    """
+    Create or raise a user's proxy bid and resolve it against the other
+    proxies on the item in the same transaction.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        try:
+            item = (
+                AuctionItem.objects
+                .select_for_update(of=('self',))
+                .select_related('owner')
+                .get(id=item_id)
+            )
+        except AuctionItem.DoesNotExist:
+            raise BidRejected("Auction item not found", status=404)
+
+        if item.status != 'active' or item.ends_at <= now:
+            raise BidRejected("Auction has ended")
+
+        if item.owner_id == user.id:
+            raise BidRejected("Cannot bid on your own auction")
+
+        if max_amount <= item.current_price:
+            raise BidRejected(
+                f"Maximum bid must be greater than current price (${item.current_price})"
+            )
+
+        ProxyBid.objects.update_or_create(
+            user=user,
+            item=item,
+            defaults={'max_amount': max_amount, 'is_active': True},
+        )
+
+        previous_leader_id = (
+            Bid.objects
+            .filter(item=item, is_winning=True)
+            .values_list('user_id', flat=True)
+            .first()
+        )
+
+        price = item.current_price
+        resolution = apply_proxy_bids(item, price, previous_leader_id, now)
+        result = finish(
+            item, None, previous_leader_id, resolution,
+            notify=resolution.changed(price, previous_leader_id),
+        )
+
+        transaction.on_commit(lambda: order_book.invalidate(item.id))
+        transaction.on_commit(lambda: response_cache.bump(item.id))
+
+    return result
+
+
+def resolve_proxies(price: Decimal, leader_id: Optional[int], proxies: List[ProxyBid], increment: Decimal,
+                    leader_wins_ties: bool = True) -> ProxyResolution:
+    """
+    Work out the leader and price after every proxy has bid as far as it
+    needs to, without stepping through each increment.
+
+    Each bidder is willing to go to their proxy maximum (or the current price
+    for the leader without a proxy). The most willing bidder leads at one
+    increment above the runner-up, capped at their own maximum. Ties go to
+    the current leader, then to the earliest proxy. When the leader has
+    only just bid directly (leader_wins_ties=False), a proxy willing to
+    match the price wins the tie instead.
+    """
+    willing = {}
+    for proxy in proxies:
+        matches = proxy.max_amount == price and not leader_wins_ties
+        if proxy.max_amount > price or matches or proxy.user_id == leader_id:
+            willing[proxy.user_id] = (proxy.max_amount, proxy)
+    if leader_id is not None:
+        amount, proxy = willing.get(leader_id, (price, None))
+        willing[leader_id] = (max(amount, price), proxy)
+
+    exhausted = [p for p in proxies if p.user_id not in willing]
+
+    ranked = sorted(
+        willing.items(),
+        key=lambda kv: (
+            -kv[1][0],
+            (0 if leader_wins_ties else 2) if kv[0] == leader_id else 1,
+            kv[1][1].created_at if kv[1][1] else timezone.now(),
+        ),
+    )
+    if not ranked:
+        return ProxyResolution(price=price, leader_id=leader_id, exhausted=exhausted)
+
+    winner_id, (winner_max, _) = ranked[0]
+    runner_max = ranked[1][1][0] if len(ranked) > 1 else None
+
+    exhausted += [proxy for user_id, (_, proxy) in ranked[1:] if proxy is not None]
+
+    if winner_id == leader_id and (runner_max is None or runner_max <= price):
+        return ProxyResolution(price=price, leader_id=leader_id, exhausted=exhausted)
+
+    base = runner_max if runner_max is not None else price
+    new_price = min(winner_max, base + increment)
+    return ProxyResolution(price=new_price, leader_id=winner_id, exhausted=exhausted)
+
+
+def apply_proxy_bids(item: AuctionItem, price: Decimal, leader_id: Optional[int], now,
+                     leader_wins_ties: bool = True) -> ProxyResolution:
+    """
+    Resolve the active proxies on a locked item and write the outcome: at most
+    one bid per exhausted proxy at its maximum, and one winning bid for the
+    new leader.
+    """
+    proxies = list(ProxyBid.objects.filter(item=item, is_active=True).order_by('created_at'))
+    if not proxies:
+        return ProxyResolution(price=price, leader_id=leader_id, exhausted=[])
+
+    resolution = resolve_proxies(price, leader_id, proxies, proxy_increment(), leader_wins_ties)
+
+    if resolution.exhausted:
+        ProxyBid.objects.filter(id__in=[p.id for p in resolution.exhausted]).update(is_active=False)
+
+    if not resolution.changed(price, leader_id):
+        return resolution
+
+    # Record how far each beaten proxy went so it shows in bid history and
+    # the closing job treats its owner as a losing bidder.
+    losing_bids = [
+        Bid(user_id=p.user_id, item=item, bid_amount=p.max_amount, is_proxy=True)
+        for p in sorted(resolution.exhausted, key=lambda p: p.max_amount)
+        if p.max_amount > price and p.user_id != resolution.leader_id
+    ]
+    for losing_bid in losing_bids:
+        losing_bid.save()
+
+    Bid.objects.filter(item=item, is_winning=True).update(is_winning=False)
+    winning_bid = Bid.objects.create(
+        user_id=resolution.leader_id,
+        item=item,
+        bid_amount=resolution.price,
+        is_winning=True,
+        is_proxy=True,
+    )
+    AuctionItem.objects.filter(id=item.id).update(
+        current_price=resolution.price,
+        bid_count=F('bid_count') + len(losing_bids) + 1,
+        leading_bidder_id=resolution.leader_id,
+        last_bid_at=now,
+    )
+    # The item row is locked, so the in-memory copy can be brought up to date directly
+    item.current_price = resolution.price
+    item.bid_count += len(losing_bids) + 1
+    item.leading_bidder_id = resolution.leader_id
+    item.last_bid_at = now
+
+    resolution.bids = losing_bids + [winning_bid]
+    return resolution
+
+
+def finish(item: AuctionItem, bid: Optional[Bid], previous_leader_id: Optional[int], resolution: ProxyResolution, notify: bool) -> BidResult:
+    """
+    Work out who was outbid and queue the notifications and the live
+    update for viewers for after commit.
+    """
+    outbid = []
+    if previous_leader_id and previous_leader_id != resolution.leader_id:
+        outbid.append(previous_leader_id)
+    if bid is not None and bid.user_id != resolution.leader_id and bid.user_id not in outbid:
+        outbid.append(bid.user_id)
+
+    if notify:
+        price = resolution.price
+        new_bids = ([bid] if bid is not None else []) + resolution.bids
+        transaction.on_commit(lambda: notify_bid_placed(item, price, outbid))
+        transaction.on_commit(lambda: broadcast_bids(item, new_bids))
+
+    return BidResult(
+        bid=bid,
+        item=item,
+        leader_id=resolution.leader_id,
+        outbid_user_ids=outbid,
+    )
+
+
+def rejection_reason(user: User, item: AuctionItem, bid_amount: Decimal, now=None) -> str:
+    """
+    Explain why the conditional price update matched no rows.
+    """
+    now = now or timezone.now()
+
+    if item.status != 'active' or item.ends_at <= now:
+        return "Auction has ended"
+
+    if item.owner_id == user.id:
+        return "Cannot bid on your own auction"
+
+    return f"Bid must be greater than current price (${item.current_price})"
+
+
+def rejection_reason_from_entry(user: User, entry: order_book.Entry, bid_amount: Decimal, now) -> Optional[str]:
+    """
+    Same checks as rejection_reason, against an order book entry.
+    Returns None when the bid may win and has to go to the database.
+    """
+    if entry['status'] != 'active' or entry['ends_at'] <= now:
+        return "Auction has ended"
+
+    if entry['owner_id'] == user.id:
+        return "Cannot bid on your own auction"
+
+    if bid_amount <= entry['current_price']:
+        return f"Bid must be greater than current price (${entry['current_price']})"
+
+    return None
+
+
+def notify_bid_placed(item: AuctionItem, bid_amount: Decimal, outbid_user_ids: List[int]) -> None:
+    """
+    Send the outbid and new bid notifications for a committed bid.
+    """
+    for user in User.objects.filter(id__in=outbid_user_ids):
+        create_and_send_notification(
+            user,
+            'outbid',
+            f'You have been outbid on "{item.title}". New bid: ${bid_amount:.2f}',
+        )
+
+    create_and_send_notification(
+        item.owner,
+        'new_bid',
+        f'New bid of ${bid_amount:.2f} placed on your auction "{item.title}"',
+    )
+
+
+def broadcast_bids(item: AuctionItem, bids: List[Bid]) -> None:
+    """
+    Push the new price and bids to everyone viewing the auction.
+    """
+    names = {
+        u['id']: u
+        for u in User.objects.filter(id__in={b.user_id for b in bids}).values('id', 'first_name', 'last_name')
+    }
+
+    send_auction_update(item.id, {
+        'event': 'bid',
+        'item_id': item.id,
+        'current_price': f"{item.current_price:.2f}",
+        'bid_count': item.bid_count,
+        'leading_bidder_id': item.leading_bidder_id,
+        'bids': [
+            {
+                'id': b.id,
+                'bid_amount': f"{b.bid_amount:.2f}",
+                'timestamp': b.timestamp.isoformat(),
+                'is_winning': b.is_winning,
+                'is_proxy': b.is_proxy,
+                'user': {
+                    'id': b.user_id,
+                    'first_name': names.get(b.user_id, {}).get('first_name', ''),
+                    'last_name': names.get(b.user_id, {}).get('last_name', ''),
+                },
+            }
+            for b in bids
+        ],
+    })
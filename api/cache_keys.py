@@ -0,0 +1,79 @@
+"""
+Registry of the cache keys the app writes.
+
+Every key is declared here once with its parts, so two features cannot
+collide on a prefix and a key built with the wrong parts fails loudly
+instead of silently missing. Build keys by calling the entry:
+
+    cache.get(ORDER_BOOK(item_id))
+"""
+from dataclasses import dataclass
+from typing import Dict, Tuple, Union
+
+from django.core.exceptions import ImproperlyConfigured
+
+KeyPart = Union[str, int]
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    """A named cache key made of a prefix and a fixed list of parts"""
+
+    prefix: str
+    parts: Tuple[str, ...]
+    description: str = ''
+
+    def __call__(self, *values: KeyPart) -> str:
+        if len(values) != len(self.parts):
+            raise TypeError(
+                f"Cache key '{self.prefix}' takes {len(self.parts)} part(s) "
+                f"({', '.join(self.parts)}), got {len(values)}"
+            )
+        return ':'.join([self.prefix, *(str(v) for v in values)])
+
+
+REGISTRY: Dict[str, CacheKey] = {}
+
+
+def register(prefix: str, parts: Tuple[str, ...], description: str = '') -> CacheKey:
+    if ':' in prefix:
+        raise ImproperlyConfigured(f"Cache key prefix '{prefix}' may not contain ':'")
+    if prefix in REGISTRY:
+        raise ImproperlyConfigured(f"Cache key prefix '{prefix}' is already registered")
+    key = CacheKey(prefix, parts, description)
+    REGISTRY[prefix] = key
+    return key
+
+
+ORDER_BOOK = register(
+    'order_book', ('item_id',),
+    'Order book entry for an auction (api/order_book.py)',
+)
+ORDER_BOOK_LOCK = register(
+    'order_book_lock', ('item_id',),
+    'Short lock held while an order book entry is updated',
+)
+ORDER_BOOK_GENERATION = register(
+    'order_book_generation', ('item_id',),
+    'Count of writes to an order book entry, checked before a loaded entry is added',
+)
+IDEMPOTENCY = register(
+    'idempotency', ('scope', 'user_id', 'key_digest'),
+    'Stored response for an Idempotency-Key (api/idempotency.py)',
+)
+AUCTION_VERSION = register(
+    'auction_version', ('item_id',),
+    'Version of an auction, bumped on every bid, edit, close or delete (api/response_cache.py)',
+)
+AUCTION_LIST_VERSION = register(
+    'auction_list_version', (),
+    'Version of the auction listing, bumped whenever any auction changes',
+)
+AUCTION_DETAIL = register(
+    'auction_detail', ('item_id', 'version', 'origin'),
+    'Serialised GET /api/auctions/<id>/ response for one auction version',
+)
+AUCTION_LIST = register(
+    'auction_list', ('version', 'page', 'origin'),
+    'Serialised GET /api/auctions/ page for one listing version',
+)
@@ -1,8 +1,14 @@
 import json
+import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from .models import Notification, User
+from django.db.models import F
+from . import notification_counts
+from .models import AuctionItem, Notification
+from .utils import auction_group_name
+
+logger = logging.getLogger(__name__)
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
@@ -26,11 +32,8 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         
         await self.accept()
         
-        # Send initial unread count
-        await self.send_unread_count()
-        
-        # Send existing notifications
-        await self.send_existing_notifications()
+        # Send unread count and recent notifications in one frame
+        await self.send_snapshot()
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
@@ -65,6 +68,7 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 'message': 'Invalid JSON'
             })
         except Exception as e:
+            logger.exception("Could not handle notification message for user %s", self.user.id)
             await self.send_json({
                 'type': 'error',
                 'message': str(e)
@@ -91,10 +95,7 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     async def send_unread_count(self):
         """Send current unread notification count"""
         try:
-            count = Notification.objects.filter(
-                user=self.user, 
-                is_read=False
-            ).count()
+            count = await self.get_unread_count()
             
             # Send directly to avoid race conditions
             await self.channel_layer.group_send(
@@ -104,58 +105,136 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                     'count': count
                 }
             )
-        except Exception as e:
-            pass
+        except Exception:
+            logger.exception("Could not send unread count to user %s", self.user.id)
     
     @database_sync_to_async
     def mark_notification_read(self, notification_id):
         """Mark a specific notification as read"""
-        try:
-            notification = Notification.objects.get(
-                id=notification_id,
-                user=self.user
-            )
-            notification.is_read = True
-            notification.save()
-            
-            # Return True to indicate success - the caller will handle sending the count update
-            return True
-        except Notification.DoesNotExist:
-            return False
+        # True only if it was unread - the caller will handle sending the count update
+        return notification_counts.mark_read(self.user.id, notification_id)
     
     @database_sync_to_async
     def mark_all_notifications_read(self):
         """Mark all notifications as read"""
         try:
-            updated = Notification.objects.filter(
-                user=self.user,
-                is_read=False
-            ).update(is_read=True)
-            
             # Return the count of updated notifications - the caller will handle sending the count update
-            return updated
-        except Exception as e:
+            return notification_counts.mark_all_read(self.user.id)
+        except Exception:
+            logger.exception("Could not mark notifications read for user %s", self.user.id)
             return 0
 
-    async def send_existing_notifications(self):
-        """Send existing notifications to the user"""
-        try:
-            notifications = Notification.objects.filter(
-                user=self.user
-            ).order_by('-timestamp')[:20]  # Last 20 notifications
-            
-            for notification in notifications:
-                notification_data = {
+    @database_sync_to_async
+    def get_unread_count(self):
+        """Unread notifications, from the user's counter"""
+        return notification_counts.unread_count(self.user.id)
+
+    @database_sync_to_async
+    def get_snapshot(self):
+        """
+        Last 20 notifications and the unread count, read in one query:
+        the user's counter rides along on every row through the join.
+        """
+        notifications = list(
+            Notification.objects
+            .filter(user=self.user)
+            .annotate(unread_count=F('user__unread_notifications'))
+            .order_by('-timestamp')[:20]
+        )
+
+        return {
+            'unread_count': notifications[0].unread_count if notifications else 0,
+            'notifications': [
+                {
                     'id': notification.id,
                     'type': notification.type,
                     'message': notification.message,
                     'is_read': notification.is_read,
                     'timestamp': notification.timestamp.isoformat(),
                 }
-                await self.send_json({
-                    'type': 'existing_notification',
-                    'notification': notification_data
-                })
-                
-        except Exception as e:
-            pass
+                for notification in notifications
+            ],
+        }
+
+    async def send_snapshot(self):
+        """Send the unread count and recent notifications to this connection"""
+        try:
+            snapshot = await self.get_snapshot()
+            await self.send_json({
+                'type': 'notifications_snapshot',
+                'unread_count': snapshot['unread_count'],
+                'notifications': snapshot['notifications'],
+            })
+        except Exception:
+            logger.exception("Could not send notification snapshot to user %s", self.user.id)
+
+
+class AuctionConsumer(AsyncWebsocketConsumer):
+    """
+    Live price and bid updates for a single auction.
+    Open to anonymous viewers; the bid path broadcasts deltas to the group.
+    """
+
+    async def connect(self):
+        """Handle WebSocket connection"""
+        self.item_id = int(self.scope["url_route"]["kwargs"]["item_id"])
+        self.auction_group_name = auction_group_name(self.item_id)
+
+        # Join before reading the snapshot so no update falls in between
+        await self.channel_layer.group_add(
+            self.auction_group_name,
+            self.channel_name
+        )
+
+        snapshot = await self.get_snapshot()
+        if snapshot is None:
+            await self.close()
+            return
+
+        await self.accept()
+
+        # Send the current state so reconnecting clients catch up
+        await self.send_json({
+            'type': 'auction_snapshot',
+            'auction': snapshot
+        })
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection"""
+        if hasattr(self, 'auction_group_name'):
+            await self.channel_layer.group_discard(
+                self.auction_group_name,
+                self.channel_name
+            )
+
+    async def auction_update(self, event):
+        """Handle price, bid and status changes"""
+        await self.send_json({
+            'type': 'auction_update',
+            'update': event['update']
+        })
+
+    async def send_json(self, data):
+        """Helper to send JSON messages"""
+        await self.send(text_data=json.dumps(data))
+
+    @database_sync_to_async
+    def get_snapshot(self):
+        """Current bidding state of the auction, or None if it does not exist"""
+        item = (
+            AuctionItem.objects
+            .filter(id=self.item_id)
+            .values('current_price', 'bid_count', 'leading_bidder_id', 'status', 'ends_at')
+            .first()
+        )
+        if item is None:
+            return None
+
+        return {
+            'item_id': self.item_id,
+            'current_price': str(item['current_price']),
+            'bid_count': item['bid_count'],
+            'leading_bidder_id': item['leading_bidder_id'],
+            'status': item['status'],
+            'ends_at': item['ends_at'].isoformat(),
+        }
@@ -0,0 +1,110 @@
+"""
+Email rendering for the closing emails.
+
+Each email is a bundle of two templates, emails/<name>.html and
+emails/<name>.txt, compiled once per process. A message renders both parts
+from one Context of plain values: auction_context() resolves an auction's
+names, dates and link once, so the winner and seller emails and their HTML
+and text parts share them instead of walking model attributes and
+re-formatting dates in every template. Prices are formatted for the
+reader's locale (their preferred currency) through money(), which is
+memoised per currency and amount. render_many() renders a batch grouped by
+locale, and messages that share a context within a locale are rendered
+once. Text parts render without HTML autoescaping.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.template import Context, Template
+from django.template.loader import get_template
+from django.utils import formats, timezone
+
+from api.models import AuctionItem, User
+
+END_DATE_FORMAT = 'F j, Y, g:i A'
+
+
+class Rendered(NamedTuple):
+    text: str
+    html: str
+
+
+@lru_cache(maxsize=None)
+def bundle(name: str) -> Tuple[Template, Template]:
+    """The compiled text and HTML templates of an email"""
+    return (
+        get_template(f'emails/{name}.txt').template,
+        get_template(f'emails/{name}.html').template,
+    )
+
+
+@lru_cache(maxsize=4096)
+def money(currency: str, amount: Decimal) -> str:
+    return User(preferred_currency=currency).format_currency(amount)
+
+
+def locale(reader: User) -> str:
+    return reader.preferred_currency
+
+
+def display_name(user: User) -> str:
+    return user.get_full_name() or user.username
+
+
+def auction_context(auction: AuctionItem, winner: Optional[User] = None, winning_amount: Optional[Decimal] = None) -> Dict[str, Any]:
+    """Values shared by every email about an auction closing, whoever reads it"""
+    site_url = getattr(settings, 'SITE_URL', 'http://localhost:8000')
+    return {
+        'auction_title': auction.title,
+        'auction_description': auction.description,
+        'auction_url': f'{site_url}/auctions/{auction.id}',
+        'category': auction.get_category_display() or auction.category.title(),
+        'bid_count': auction.bid_count,
+        'end_date': formats.date_format(timezone.localtime(auction.ends_at), END_DATE_FORMAT),
+        'seller_name': display_name(auction.owner),
+        'winner_name': display_name(winner) if winner else None,
+        'winner_email': winner.email if winner else None,
+        'starting_amount': auction.starting_price,
+        'winning_amount': winning_amount,
+    }
+
+
+def localise(context: Dict[str, Any], reader_locale: str) -> Dict[str, Any]:
+    """The context with its prices formatted for a locale"""
+    winning_amount = context.get('winning_amount')
+    return {
+        **context,
+        'starting_price': money(reader_locale, context['starting_amount']),
+        'winning_bid': money(reader_locale, winning_amount) if winning_amount is not None else None,
+    }
+
+
+def render(name: str, context: Dict[str, Any]) -> Rendered:
+    """Render both parts of an email from a single Context"""
+    text_template, html_template = bundle(name)
+    values = Context(context)
+    html = html_template.render(values)
+    values.autoescape = False
+    return Rendered(text_template.render(values), html)
+
+
+def render_many(name: str, messages: List[Tuple[Dict[str, Any], User]]) -> List[Rendered]:
+    """
+    Render (context, reader) pairs, one locale at a time. Readers sharing
+    a locale and the same context object get the same rendering.
+    """
+    by_locale: Dict[str, List[int]] = {}
+    for index, (_, reader) in enumerate(messages):
+        by_locale.setdefault(locale(reader), []).append(index)
+
+    rendered: List[Optional[Rendered]] = [None] * len(messages)
+    for reader_locale, indexes in by_locale.items():
+        shared: Dict[int, Rendered] = {}
+        for index in indexes:
+            context = messages[index][0]
+            if id(context) not in shared:
+                shared[id(context)] = render(name, localise(context, reader_locale))
+            rendered[index] = shared[id(context)]
+    return rendered
@@ -1,13 +1,14 @@
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 import logging
 
+from api import outbox
+
 logger = logging.getLogger(__name__)
 
 def send_winner_notification(winner_email, winner_name, auction_title, winning_bid, end_date, seller_name, auction_description, auction_url):
     """
-    Send winner notification email to the auction winner
+    Queue winner notification email to the auction winner
     """
     try:
         subject = f'{settings.EMAIL_SUBJECT_PREFIX}Congratulations! You Won the Auction for "{auction_title}"'
@@ -50,26 +51,25 @@ This is an automated message. Please do not reply to this email.
 © 2026 Bido. All rights reserved.
         """.strip()
         
-        # Send email
-        send_mail(
+        # Queue email; deliver_outbox sends it once the transaction commits
+        outbox.enqueue_email(
             subject=subject,
-            message=plain_message,
+            body=plain_message,
+            recipients=[winner_email],
+            html_body=html_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[winner_email],
-            html_message=html_message,
-            fail_silently=False,
         )
         
-        logger.info(f"Winner notification sent successfully to {winner_email} for auction '{auction_title}'")
+        logger.info(f"Winner notification queued for {winner_email} for auction '{auction_title}'")
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send winner notification to {winner_email}: {str(e)}")
+        logger.error(f"Failed to queue winner notification to {winner_email}: {str(e)}")
         return False
 
 def send_outbid_notification(bidder_email, bidder_name, auction_title, current_bid, auction_url):
     """
-    Send notification when user is outbid
+    Queue notification when user is outbid
     """
     try:
         subject = f'{settings.EMAIL_SUBJECT_PREFIX}You have been outbid on "{auction_title}"'
@@ -91,24 +91,23 @@ This is an automated message. Please do not reply to this email.
 © 2026 Bido. All rights reserved.
         """.strip()
         
-        send_mail(
+        outbox.enqueue_email(
             subject=subject,
-            message=message,
+            body=message,
+            recipients=[bidder_email],
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[bidder_email],
-            fail_silently=False,
         )
         
-        logger.info(f"Outbid notification sent to {bidder_email} for auction '{auction_title}'")
+        logger.info(f"Outbid notification queued for {bidder_email} for auction '{auction_title}'")
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send outbid notification to {bidder_email}: {str(e)}")
+        logger.error(f"Failed to queue outbid notification to {bidder_email}: {str(e)}")
         return False
 
 def send_auction_ending_notification(watchers, auction_title, hours_remaining, auction_url):
     """
-    Send notification to watchers when auction is ending soon
+    Queue notification to watchers when auction is ending soon
     """
     try:
         subject = f'{settings.EMAIL_SUBJECT_PREFIX}Auction Ending Soon: "{auction_title}"'
@@ -131,19 +130,18 @@ This is an automated message. Please do not reply to this email.
         # Send to all watchers
         recipient_list = [watcher.email for watcher in watchers]
         if recipient_list:
-            send_mail(
+            outbox.enqueue_email(
                 subject=subject,
-                message=message,
+                body=message,
+                recipients=recipient_list,
                 from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=recipient_list,
-                fail_silently=False,
             )
             
-            logger.info(f"Auction ending notification sent to {len(recipient_list)} watchers for '{auction_title}'")
+            logger.info(f"Auction ending notification queued for {len(recipient_list)} watchers for '{auction_title}'")
             return True
         
         return False
         
     except Exception as e:
-        logger.error(f"Failed to send auction ending notification for '{auction_title}': {str(e)}")
+        logger.error(f"Failed to queue auction ending notification for '{auction_title}': {str(e)}")
         return False
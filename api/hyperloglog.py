@@ -0,0 +1,77 @@
+"""
+HyperLogLog sketches for approximate distinct counts.
+
+A sketch is 2**precision one-byte registers. Adding a value keeps, per
+register, the longest run of leading zeros seen in the hashes routed to it;
+the count is estimated from those maxima. Memory and estimate time are
+fixed whatever the number of values, and two sketches merge by taking the
+larger of each register, so daily sketches combine into any longer period.
+The standard error is 1.04 / sqrt(2**precision), about 1.6% at the default
+precision of 12 (4 KiB per sketch).
+"""
+import hashlib
+import math
+from typing import Iterable, Optional
+
+DEFAULT_PRECISION = 12
+HASH_BITS = 64
+
+
+def hash_value(value: str) -> int:
+    """64-bit hash of a string, stable across processes"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch over 64-bit hashes"""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytes] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError('precision must be between 4 and 16')
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is None:
+            self.registers = bytearray(self.size)
+        elif len(registers) != self.size:
+            raise ValueError(f'expected {self.size} registers, got {len(registers)}')
+        else:
+            self.registers = bytearray(registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HyperLogLog':
+        """Rebuild a sketch from to_bytes() output"""
+        return cls(int(math.log2(len(data))), data)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    def add_hash(self, hashed: int) -> None:
+        index = hashed >> (HASH_BITS - self.precision)
+        rest_bits = HASH_BITS - self.precision
+        rest = hashed & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, value: str) -> None:
+        self.add_hash(hash_value(value))
+
+    def update(self, hashes: Iterable[int]) -> None:
+        for hashed in hashes:
+            self.add_hash(hashed)
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        """Fold another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError('cannot merge sketches of different precision')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Linear counting is more accurate while most registers are empty
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
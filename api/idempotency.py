@@ -0,0 +1,120 @@
+"""
+Idempotency keys for write endpoints.
+Clients send an Idempotency-Key header; the first response for a key is kept
+for a while and replayed for retries, so a retried bid never runs the write
+path (or its notifications) twice.
+"""
+import functools
+import hashlib
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse, JsonResponse
+
+from api.cache_keys import IDEMPOTENCY
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+PENDING = 'pending'
+
+
+def get_cache():
+    return caches[getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', 'default')]
+
+
+def key_ttl() -> int:
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+
+
+def pending_ttl() -> int:
+    return getattr(settings, 'IDEMPOTENCY_PENDING_TTL', 60)
+
+
+def storage_key(request: HttpRequest, scope: str, key: str) -> str:
+    """
+    Keys are scoped to the user and endpoint so clients cannot collide.
+    """
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return IDEMPOTENCY(scope, request.user.pk, digest)
+
+
+def fingerprint(request: HttpRequest) -> str:
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def idempotent(scope: str) -> Callable:
+    """
+    Decorator for authenticated POST views.
+
+    Requests without the header run as normal. The first request for a key
+    claims it with an atomic cache add; concurrent duplicates get 409 while
+    it runs, later duplicates get the stored response. Server errors release
+    the key so the client can retry. The claim only lasts
+    IDEMPOTENCY_PENDING_TTL, so a worker killed mid-request blocks retries
+    for that long rather than for the whole replay window.
+    """
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            key = request.headers.get(HEADER)
+            if not key or request.method != 'POST' or not request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+
+            if len(key) > MAX_KEY_LENGTH:
+                return JsonResponse({'error': f'{HEADER} is too long'}, status=400)
+
+            cache = get_cache()
+            cache_key = storage_key(request, scope, key)
+            body_hash = fingerprint(request)
+
+            if not cache.add(cache_key, {'state': PENDING, 'fingerprint': body_hash}, pending_ttl()):
+                return replay(cache.get(cache_key), body_hash)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                cache.delete(cache_key)
+                raise
+
+            if response.status_code >= 500:
+                cache.delete(cache_key)
+                return response
+
+            cache.set(cache_key, {
+                'state': 'done',
+                'fingerprint': body_hash,
+                'status': response.status_code,
+                'content': response.content,
+                'content_type': response.get('Content-Type', 'application/json'),
+            }, key_ttl())
+            return response
+
+        return wrapper
+    return decorator
+
+
+def replay(stored: Optional[dict], body_hash: str) -> HttpResponse:
+    """
+    Return the stored response for a repeated key.
+    """
+    if stored is None:
+        # Expired between add() and get(); treat as still in flight.
+        return JsonResponse({'error': 'A request with this key is already in progress'}, status=409)
+
+    if stored['fingerprint'] != body_hash:
+        return JsonResponse(
+            {'error': f'{HEADER} was already used with a different request body'},
+            status=422,
+        )
+
+    if stored['state'] == PENDING:
+        return JsonResponse({'error': 'A request with this key is already in progress'}, status=409)
+
+    response = HttpResponse(
+        stored['content'],
+        status=stored['status'],
+        content_type=stored['content_type'],
+    )
+    response['Idempotent-Replayed'] = 'true'
+    return response
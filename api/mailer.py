@@ -0,0 +1,176 @@
+"""
+Mail delivery over a persistent, rate-limited connection.
+
+Opening an SMTP connection costs a TCP and TLS handshake plus a login, so
+sending each email with send_mail() spends most of its time connecting.
+A Mailer keeps one backend connection open across batches and hands it
+messages in send_messages() chunks of MAIL_SEND_BATCH. It reconnects after
+MAIL_CONNECTION_MAX_MESSAGES messages, because providers cap messages per
+session, and after MAIL_CONNECTION_IDLE seconds unused, because servers
+drop idle sessions. Messages are throttled per recipient domain with token
+buckets from MAIL_RATE_LIMITS (messages per second; 'default' applies to
+each domain not listed), so a burst of closings stays inside each
+provider's limits.
+
+A backend stops at the first failure in a chunk. Messages are TrackedEmail
+instances that record when the backend serialises them, so the ones before
+the failure count as sent, the failing one gets the error and the rest go
+out again on a fresh connection.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+logger = logging.getLogger(__name__)
+
+
+def send_batch() -> int:
+    return getattr(settings, 'MAIL_SEND_BATCH', 50)
+
+
+def connection_max_messages() -> int:
+    return getattr(settings, 'MAIL_CONNECTION_MAX_MESSAGES', 100)
+
+
+def connection_idle() -> int:
+    return getattr(settings, 'MAIL_CONNECTION_IDLE', 30)
+
+
+def rate_limits() -> Dict[str, float]:
+    return getattr(settings, 'MAIL_RATE_LIMITS', {'default': 10})
+
+
+class TrackedEmail(EmailMultiAlternatives):
+    """An email that records whether a backend got as far as serialising it"""
+
+    attempted = False
+
+    def message(self, *args: Any, **kwargs: Any) -> Any:
+        self.attempted = True
+        return super().message(*args, **kwargs)
+
+
+def provider(email: EmailMultiAlternatives) -> str:
+    """The recipient domain a message counts against"""
+    recipients = email.recipients()
+    return recipients[0].rsplit('@', 1)[-1].lower() if recipients else ''
+
+
+class RateLimiter:
+    """Token bucket per provider, holding at most one second of sends"""
+
+    def __init__(self, limits: Optional[Dict[str, float]] = None):
+        self.limits = rate_limits() if limits is None else limits
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        self.lock = threading.Lock()
+
+    def rate(self, key: str) -> Optional[float]:
+        rate = self.limits.get(key, self.limits.get('default'))
+        return rate if rate and rate > 0 else None
+
+    def acquire(self, key: str) -> float:
+        """
+        Take a token for key. Returns 0 if one was taken, otherwise the
+        seconds until one is available.
+        """
+        rate = self.rate(key)
+        if rate is None:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            tokens, updated = self.buckets.get(key, (rate, now))
+            tokens = min(rate, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                return 0.0
+            self.buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+
+class Mailer:
+    """Sends emails over one reused backend connection; not thread safe"""
+
+    def __init__(self, limiter: Optional[RateLimiter] = None, **backend_options: Any):
+        self.limiter = limiter or RateLimiter()
+        self.backend_options = backend_options
+        self.connection: Any = None
+        self.sent_on_connection = 0
+        self.last_used = 0.0
+
+    def __enter__(self) -> 'Mailer':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def connect(self) -> Any:
+        stale = time.monotonic() - self.last_used > connection_idle()
+        if self.connection is not None and (stale or self.sent_on_connection >= connection_max_messages()):
+            self.close()
+        if self.connection is None:
+            self.connection = get_connection(**self.backend_options)
+            self.connection.open()
+            self.sent_on_connection = 0
+        return self.connection
+
+    def close(self) -> None:
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def send(self, emails: List[TrackedEmail]) -> List[Optional[Exception]]:
+        """
+        Send emails in order, waiting out rate limits. Returns None for each
+        email sent and the exception for each that failed.
+        """
+        errors: List[Optional[Exception]] = [None] * len(emails)
+        chunk: List[int] = []
+        for index, email in enumerate(emails):
+            key = provider(email)
+            wait = self.limiter.acquire(key)
+            while wait:
+                # Don't hold finished messages back while waiting
+                self.flush(emails, chunk, errors)
+                chunk = []
+                time.sleep(wait)
+                wait = self.limiter.acquire(key)
+            chunk.append(index)
+            if len(chunk) >= min(send_batch(), connection_max_messages()):
+                self.flush(emails, chunk, errors)
+                chunk = []
+        self.flush(emails, chunk, errors)
+        return errors
+
+    def flush(self, emails: List[TrackedEmail], chunk: List[int], errors: List[Optional[Exception]]) -> None:
+        while chunk:
+            try:
+                connection = self.connect()
+            except Exception as e:
+                # Nothing can go out until the server is reachable again
+                for index in chunk:
+                    errors[index] = e
+                logger.warning(f"Could not open mail connection: {str(e)}")
+                self.close()
+                return
+            for index in chunk:
+                emails[index].attempted = False
+            try:
+                connection.send_messages([emails[index] for index in chunk])
+                self.sent_on_connection += len(chunk)
+                self.last_used = time.monotonic()
+                return
+            except Exception as e:
+                # Everything before the last message attempted went out
+                attempted = [index for index in chunk if emails[index].attempted]
+                failed = attempted[-1] if attempted else chunk[0]
+                errors[failed] = e
+                logger.warning(f"Mail send failed, reconnecting: {str(e)}")
+                self.close()
+                chunk = chunk[chunk.index(failed) + 1:]
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from typing import Dict, Any
+
+from api import notification_archive
+
+
+class Command(BaseCommand):
+    help = 'Move read notifications past retention from the notifications table to the archive'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=None,
+            help='Keep read notifications this many days (default: NOTIFICATION_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Notifications moved per transaction (default: NOTIFICATION_ARCHIVE_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many notifications would be archived',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        retention = options['retention_days']
+        if retention is None:
+            retention = notification_archive.retention_days()
+        if retention is None:
+            self.stdout.write("⏭️  Notification retention disabled, nothing archived")
+            return
+        if retention < 0:
+            raise CommandError('--retention-days must not be negative')
+
+        batch_size = options['batch_size'] or notification_archive.batch_size()
+        dry_run = options['dry_run']
+        before = notification_archive.cutoff(retention)
+
+        self.stdout.write(
+            f"🗄️  Archiving read notifications before {before:%Y-%m-%d %H:%M} {'(DRY RUN)' if dry_run else ''}"
+        )
+        if dry_run:
+            count = notification_archive.expired(before).count()
+            self.stdout.write(f"📊 Would archive {count} notification(s)")
+            return
+
+        archived = notification_archive.archive(before, batch_size)
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Archived {archived} notification(s) in batches of {batch_size}")
+        )
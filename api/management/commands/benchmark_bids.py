@@ -0,0 +1,132 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, close_old_connections
+from django.utils import timezone
+from decimal import Decimal
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+from typing import Dict, Any, List
+
+from api import system_stats
+from api.bidding import commit_bid, BidRejected
+from api.models import AuctionItem, Bid, User
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent bidding on a single auction and check no bids are lost'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Number of concurrent bidder threads',
+        )
+        parser.add_argument(
+            '--bids',
+            type=int,
+            default=50,
+            help='Bids attempted per thread',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the benchmark users and auction instead of deleting them',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        threads = options['threads']
+        bids_per_thread = options['bids']
+
+        self.stdout.write(
+            f"🚀 Benchmarking {threads} thread(s) x {bids_per_thread} bid(s) "
+            f"on one auction ({connection.vendor})"
+        )
+
+        seller, bidders, item = self.create_fixtures(threads)
+
+        accepted: List[Decimal] = []
+        rejected = 0
+        errors = 0
+        lock = threading.Lock()
+
+        def run_bidder(bidder: User) -> None:
+            nonlocal rejected, errors
+            rng = random.Random(bidder.id)
+            try:
+                for _ in range(bids_per_thread):
+                    current = AuctionItem.objects.values_list('current_price', flat=True).get(id=item.id)
+                    amount = current + Decimal(rng.randint(1, 5))
+                    try:
+                        commit_bid(bidder, item.id, amount)
+                        with lock:
+                            accepted.append(amount)
+                    except BidRejected:
+                        with lock:
+                            rejected += 1
+                    except Exception:
+                        with lock:
+                            errors += 1
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(run_bidder, bidders))
+        elapsed = time.perf_counter() - started
+        close_old_connections()
+
+        item.refresh_from_db()
+        stored_bids = Bid.objects.filter(item=item)
+        winning = list(stored_bids.filter(is_winning=True).values_list('bid_amount', flat=True))
+        highest_accepted = max(accepted) if accepted else item.starting_price
+
+        consistent = (
+            stored_bids.count() == len(accepted)
+            and item.current_price == highest_accepted
+            and winning == ([highest_accepted] if accepted else [])
+        )
+
+        attempts = threads * bids_per_thread
+        self.stdout.write(
+            f"\n📈 Results:"
+            f"\n   Attempted: {attempts}"
+            f"\n   Accepted: {len(accepted)}"
+            f"\n   Rejected (outbid in race): {rejected}"
+            f"\n   Errors: {errors}"
+            f"\n   Elapsed: {elapsed:.2f}s"
+            f"\n   Throughput: {attempts / elapsed:.1f} bids/sec attempted, "
+            f"{len(accepted) / elapsed:.1f} bids/sec committed"
+            f"\n   Final price: {item.current_price} (highest accepted {highest_accepted})"
+        )
+
+        if consistent:
+            self.stdout.write(self.style.SUCCESS("✅ No lost bids: price, bid rows and winning flag agree"))
+        else:
+            self.stdout.write(self.style.ERROR("❌ Inconsistent state: bids were lost or double-counted"))
+
+        if not options['keep']:
+            item.delete()
+            User.objects.filter(id__in=[seller.id] + [b.id for b in bidders]).delete()
+        # deletes skip the stats counters, so recount them
+        system_stats.refresh()
+
+    def create_fixtures(self, threads: int):
+        """Create a seller, one bidder per thread and a single auction"""
+        tag = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        seller = User.objects.create(username=f'bench_seller_{tag}', email=f'bench_seller_{tag}@example.com')
+        bidders = [
+            User.objects.create(username=f'bench_bidder_{tag}_{i}', email=f'bench_bidder_{tag}_{i}@example.com')
+            for i in range(threads)
+        ]
+        item = AuctionItem.objects.create(
+            title=f'Benchmark auction {tag}',
+            description='Created by benchmark_bids',
+            starting_price=Decimal('1.00'),
+            current_price=Decimal('1.00'),
+            ends_at=timezone.now() + timedelta(hours=1),
+            owner=seller,
+        )
+        return seller, bidders, item
@@ -0,0 +1,151 @@
+from django.core.mail.backends.dummy import EmailBackend as DummyEmailBackend
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import override_settings
+from django.utils import timezone
+from decimal import Decimal
+from datetime import timedelta
+from io import StringIO
+import random
+import time
+from typing import Dict, Any, List, Tuple
+
+from api.management.commands.close_auctions import Command as CloseAuctionsCommand
+from api import outbox, system_stats
+from api.models import AuctionItem, Bid, OutboxMessage, User
+
+
+class SlowEmailBackend(DummyEmailBackend):
+    """Discards messages after waiting as long as an SMTP round trip would"""
+
+    latency = 0.0
+
+    def send_messages(self, email_messages: Any) -> int:
+        time.sleep(self.latency * len(email_messages))
+        return super().send_messages(email_messages)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark closing ended auctions one at a time against batched closing, and delivering their emails'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--auctions',
+            type=int,
+            default=1000,
+            help='Number of ended auctions to generate for each run',
+        )
+        parser.add_argument(
+            '--bids',
+            type=int,
+            default=5,
+            help='Bids per auction, from distinct bidders',
+        )
+        parser.add_argument(
+            '--smtp-latency',
+            type=float,
+            default=0.05,
+            help='Seconds each simulated email send takes',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Auctions per transaction in the batched run',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        SlowEmailBackend.latency = options['smtp_latency']
+        backend = f'{__name__}.SlowEmailBackend'
+        # Per-auction progress lines would swamp the results
+        closer = CloseAuctionsCommand(stdout=StringIO())
+
+        runs = {
+            'serial': lambda: closer.close(closer.ended_auctions()),
+            'batched': lambda: closer.close_batched(options['batch_size']),
+        }
+
+        self.stdout.write(
+            f"🚀 Closing {options['auctions']} auctions with {options['bids']} bids each "
+            f"({connection.vendor}, {options['smtp_latency'] * 1000:.0f}ms per email)"
+        )
+        results = []
+        with override_settings(EMAIL_BACKEND=backend):
+            for name, run in runs.items():
+                owner, bidders = self.generate(options['auctions'], options['bids'])
+                last_message = OutboxMessage.objects.aggregate(last=Max('id'))['last'] or 0
+                try:
+                    results.append((name, *self.measure(run), self.drain()))
+                finally:
+                    OutboxMessage.objects.filter(id__gt=last_message).delete()
+                    owner.delete()
+                    User.objects.filter(id__in=[b.id for b in bidders]).delete()
+                    # bulk_create and deletes skip the stats counters, so recount them
+                    system_stats.refresh()
+
+        self.stdout.write("\n📈 Results (closing, then draining the outbox):")
+        for name, elapsed, queries, counts, (delivered, drain_time) in results:
+            self.stdout.write(
+                f"   {name:<8} {elapsed:8.2f}s   {counts['closed'] / elapsed if elapsed else 0:9.1f} auctions/s   "
+                f"{queries:6} queries   {counts['errors']} errors   "
+                f"delivered {delivered} message(s) in {drain_time:.2f}s"
+            )
+
+    def measure(self, run: Any) -> Tuple[float, int, Dict[str, int]]:
+        # Counted with a wrapper rather than connection.queries, which keeps
+        # only the last 9000
+        queries = 0
+
+        def count(execute: Any, sql: str, params: Any, many: bool, context: Any) -> Any:
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            counts = run()
+            elapsed = time.perf_counter() - started
+        return elapsed, queries, counts
+
+    def drain(self) -> Tuple[int, float]:
+        """Deliver everything the run queued, as deliver_outbox --once would"""
+        delivered = 0
+        started = time.perf_counter()
+        while True:
+            counts = outbox.deliver()
+            if not any(counts.values()):
+                return delivered, time.perf_counter() - started
+            delivered += counts['sent']
+
+    def generate(self, count: int, bids: int) -> Tuple[User, List[User]]:
+        """Bulk create ended auctions, each with bids from distinct bidders"""
+        rng = random.Random(42)
+        tag = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        now = timezone.now()
+
+        with transaction.atomic():
+            owner = User.objects.create(username=f'bench_close_{tag}', email=f'bench_close_{tag}@example.com')
+            bidders = User.objects.bulk_create([
+                User(username=f'bench_close_{tag}_{n}', email=f'bench_close_{tag}_{n}@example.com')
+                for n in range(bids)
+            ])
+            auctions = AuctionItem.objects.bulk_create([
+                AuctionItem(
+                    title=f'Benchmark auction {i}',
+                    description='Generated for the close benchmark',
+                    starting_price=Decimal('10.00'),
+                    current_price=Decimal('10.00') + bids,
+                    bid_count=bids,
+                    ends_at=now - timedelta(minutes=rng.randint(1, 60)),
+                    owner=owner,
+                )
+                for i in range(count)
+            ], batch_size=1000)
+            Bid.objects.bulk_create([
+                Bid(item=auction, user=bidder, bid_amount=Decimal('11.00') + n)
+                for auction in auctions
+                for n, bidder in enumerate(bidders)
+            ], batch_size=5000)
+
+        return owner, bidders
@@ -0,0 +1,158 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils import timezone
+from decimal import Decimal
+from datetime import timedelta
+import csv
+import multiprocessing
+import random
+import resource
+import time
+from typing import Dict, Any, List, Tuple
+
+from api import system_stats
+from api.models import AuctionItem, User
+from api.views import export_auctions_csv
+
+
+def buffered_export() -> int:
+    """The export as it was: every row written into one in-memory response"""
+    response = HttpResponse(content_type='text/csv')
+    writer = csv.writer(response)
+    writer.writerow([
+        'ID', 'Title', 'Owner', 'Category', 'Starting Price',
+        'Current Price', 'Bids Count', 'Status', 'Created At', 'Ends At'
+    ])
+    for auction in AuctionItem.objects.select_related('owner').all():
+        writer.writerow([
+            auction.id,
+            auction.title,
+            auction.owner.email,
+            auction.category,
+            auction.starting_price,
+            auction.current_price,
+            auction.bid_count,
+            'Active' if auction.ends_at > timezone.now() else 'Ended',
+            auction.created_at.isoformat(),
+            auction.ends_at.isoformat()
+        ])
+    return len(response.content)
+
+
+def streaming_export(query: str) -> int:
+    """Drain the streaming view the way a WSGI server would"""
+    response = export_auctions_csv(RequestFactory().get('/api/auctions/export/' + query))
+    size = 0
+    for chunk in response.streaming_content:
+        size += len(chunk)
+    response.close()
+    return size
+
+
+VARIANTS = {
+    'buffered': buffered_export,
+    'streaming': lambda: streaming_export(''),
+    'streaming+gzip': lambda: streaming_export('?gzip=1'),
+}
+
+
+def measure(name: str, pipe: Any) -> None:
+    """
+    Run one export in a forked child and report its RSS growth, so the
+    variants don't share a high-water mark.
+    """
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    size = VARIANTS[name]()
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pipe.send((elapsed, size, (peak - baseline) / 1024))
+    pipe.close()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark peak memory and time of the streaming CSV export against the in-memory one'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--auctions',
+            type=int,
+            default=1000000,
+            help='Number of auctions to generate',
+        )
+        parser.add_argument(
+            '--skip-buffered',
+            action='store_true',
+            help='Only run the streaming variants (the in-memory export needs a lot of RAM at 1M rows)',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the generated auctions instead of deleting them',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        self.stdout.write(f"🚀 Generating {options['auctions']} auctions ({connection.vendor})")
+        owner = self.generate(options['auctions'])
+        total = AuctionItem.objects.count()
+
+        names = [n for n in VARIANTS if not (options['skip_buffered'] and n == 'buffered')]
+        try:
+            results = [(name, *self.run(name)) for name in names]
+        finally:
+            if not options['keep']:
+                self.stdout.write("🧹 Removing generated auctions...")
+                owner.delete()
+            # bulk_create and deletes skip the stats counters, so recount them
+            system_stats.refresh()
+
+        self.stdout.write(f"\n📈 Exporting {total} auctions:")
+        for name, elapsed, size, rss in results:
+            self.stdout.write(
+                f"   {name:<15} {elapsed:7.2f}s   {size / 1024 / 1024:8.1f} MiB out   "
+                f"peak RSS +{rss:8.1f} MiB"
+            )
+
+    def run(self, name: str) -> Tuple[float, int, float]:
+        # The child must open its own database connection
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=measure, args=(name, sender))
+        process.start()
+        sender.close()
+        result = receiver.recv()
+        process.join()
+        return result
+
+    def generate(self, count: int) -> User:
+        """Bulk create auctions across every category"""
+        rng = random.Random(42)
+        tag = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        owner = User.objects.create(username=f'bench_export_{tag}', email=f'bench_export_{tag}@example.com')
+        categories = [c for c, _ in AuctionItem.CATEGORY_CHOICES]
+        now = timezone.now()
+
+        batch: List[AuctionItem] = []
+        with transaction.atomic():
+            for i in range(count):
+                price = Decimal(rng.randint(1000, 100000)) / 100
+                batch.append(AuctionItem(
+                    title=f'Benchmark auction {i}',
+                    description='Generated for the export benchmark',
+                    starting_price=price,
+                    current_price=price,
+                    bid_count=rng.randint(0, 40),
+                    category=rng.choice(categories),
+                    ends_at=now + timedelta(days=rng.randint(-5, 30)),
+                    owner=owner,
+                ))
+                if len(batch) == 5000:
+                    AuctionItem.objects.bulk_create(batch)
+                    batch = []
+            if batch:
+                AuctionItem.objects.bulk_create(batch)
+
+        return owner
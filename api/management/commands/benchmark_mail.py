@@ -0,0 +1,175 @@
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+import asyncio
+import threading
+import time
+from typing import Dict, Any, List, Tuple
+
+from api.mailer import Mailer, RateLimiter, TrackedEmail
+
+DOMAINS = ['gmail.com', 'outlook.com', 'yahoo.com', 'example.com']
+
+
+class SmtpSink:
+    """
+    Minimal SMTP server on a background event loop that accepts and
+    discards mail. Each reply waits rtt seconds, and each new connection
+    connect_latency more, standing in for the network and the TLS
+    handshake and login of a real provider.
+    """
+
+    def __init__(self, rtt: float, connect_latency: float):
+        self.rtt = rtt
+        self.connect_latency = connect_latency
+        self.connections = 0
+        self.messages = 0
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.port = 0
+
+    def start(self) -> int:
+        threading.Thread(target=self.run, daemon=True).start()
+        self.ready.wait()
+        return self.port
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(asyncio.start_server(self.session, '127.0.0.1', 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def reply(self, writer: asyncio.StreamWriter, line: str) -> None:
+        await asyncio.sleep(self.rtt)
+        writer.write(line.encode() + b'\r\n')
+        await writer.drain()
+
+    async def session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await asyncio.sleep(self.connect_latency)
+        await self.reply(writer, '220 sink ESMTP')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line[:4].upper()
+                if command == b'EHLO':
+                    await self.reply(writer, '250-sink\r\n250 8BITMIME')
+                elif command == b'DATA':
+                    await self.reply(writer, '354 End data with <CR><LF>.<CR><LF>')
+                    await reader.readuntil(b'\r\n.\r\n')
+                    self.messages += 1
+                    await self.reply(writer, '250 OK')
+                elif command == b'QUIT':
+                    await self.reply(writer, '221 Bye')
+                    break
+                else:
+                    await self.reply(writer, '250 OK')
+        finally:
+            writer.close()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark sending notification emails one connection per message against a pooled Mailer'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=1000,
+            help='Emails sent by each variant',
+        )
+        parser.add_argument(
+            '--rtt',
+            type=float,
+            default=0.005,
+            help='Seconds the sink waits before each SMTP reply',
+        )
+        parser.add_argument(
+            '--connect-latency',
+            type=float,
+            default=0.1,
+            help='Extra seconds each new connection takes, standing in for TLS and login',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=0,
+            help='Messages per second per recipient domain for the Mailer (0: unlimited)',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        sink = SmtpSink(options['rtt'], options['connect_latency'])
+        port = sink.start()
+        count = options['messages']
+
+        self.stdout.write(
+            f"🚀 Sending {count} emails to a local SMTP sink "
+            f"({options['rtt'] * 1000:.0f}ms per reply, {options['connect_latency'] * 1000:.0f}ms per connection)"
+        )
+        variants = {
+            'send_mail': self.send_each,
+            'Mailer': lambda emails: self.send_pooled(emails, options['rate']),
+        }
+        results: List[Tuple[str, float, int, int]] = []
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=port,
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        ):
+            try:
+                for name, send in variants.items():
+                    connections, messages = sink.connections, sink.messages
+                    started = time.perf_counter()
+                    send(self.emails(count))
+                    elapsed = time.perf_counter() - started
+                    results.append((name, elapsed, sink.connections - connections, sink.messages - messages))
+            finally:
+                sink.stop()
+
+        self.stdout.write("\n📈 Results:")
+        for name, elapsed, connections, messages in results:
+            self.stdout.write(
+                f"   {name:<10} {elapsed:7.2f}s   {messages / elapsed:8.1f} messages/s   "
+                f"{messages} delivered over {connections} connection(s)"
+            )
+
+    def emails(self, count: int) -> List[TrackedEmail]:
+        html = '<p>' + 'Your auction has ended. ' * 400 + '</p>'
+        emails = []
+        for i in range(count):
+            email = TrackedEmail(
+                subject=f'Benchmark email {i}',
+                body='Your auction has ended.',
+                from_email='noreply@auctionsite.com',
+                to=[f'bench{i}@{DOMAINS[i % len(DOMAINS)]}'],
+            )
+            email.attach_alternative(html, 'text/html')
+            emails.append(email)
+        return emails
+
+    def send_each(self, emails: List[TrackedEmail]) -> None:
+        """What close_auctions used to do: send_mail, and so a new connection, per email"""
+        for email in emails:
+            send_mail(
+                subject=email.subject,
+                message=email.body,
+                from_email=email.from_email,
+                recipient_list=email.to,
+                html_message=email.alternatives[0][0],
+                fail_silently=False,
+            )
+
+    def send_pooled(self, emails: List[TrackedEmail], rate: float) -> None:
+        with Mailer(RateLimiter({'default': rate})) as mailer:
+            errors = [e for e in mailer.send(emails) if e is not None]
+        if errors:
+            self.stdout.write(self.style.ERROR(f"❌ {len(errors)} send(s) failed: {errors[0]}"))
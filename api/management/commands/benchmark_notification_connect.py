@@ -0,0 +1,142 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+import asyncio
+import statistics
+import time
+from typing import Dict, Any, List
+
+from api import notification_counts, system_stats
+from api.models import Notification, User
+from api.routing import websocket_urlpatterns
+
+
+class Command(BaseCommand):
+    help = 'Benchmark a storm of notification WebSocket connects against one worker event loop'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--connections',
+            type=int,
+            default=500,
+            help='Total connections to open',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=50,
+            help='Connections in flight at once',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=50,
+            help='Number of distinct users connecting',
+        )
+        parser.add_argument(
+            '--notifications',
+            type=int,
+            default=30,
+            help='Notifications created per user',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the benchmark users instead of deleting them',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        self.stdout.write(
+            f"🚀 Opening {options['connections']} connection(s), {options['concurrency']} at a time, "
+            f"for {options['users']} user(s) ({connection.vendor})"
+        )
+
+        users = self.create_fixtures(options['users'], options['notifications'])
+        try:
+            latencies, frames, lag, elapsed = asyncio.run(
+                self.storm(users, options['connections'], options['concurrency'])
+            )
+        finally:
+            if not options['keep']:
+                User.objects.filter(id__in=[u.id for u in users]).delete()
+            # bulk_create and deletes skip the stats counters, so recount them
+            system_stats.refresh()
+
+        latencies.sort()
+        self.stdout.write(
+            f"\n📈 Results:"
+            f"\n   Elapsed: {elapsed:.2f}s"
+            f"\n   Throughput: {len(latencies) / elapsed:.1f} connections/sec"
+            f"\n   Connect to snapshot: median {statistics.median(latencies):.1f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f}ms"
+            f"\n   Frames per connect: {frames / len(latencies):.1f}"
+            f"\n   Worst event loop stall: {lag:.1f}ms"
+        )
+
+    async def storm(self, users: List[User], total: int, concurrency: int):
+        """
+        Connect, wait for the initial snapshot, disconnect. A heartbeat task
+        records how long the event loop was blocked at worst.
+        """
+        application = URLRouter(websocket_urlpatterns)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+        frames = 0
+        worst_lag = 0.0
+        running = True
+
+        async def heartbeat() -> None:
+            nonlocal worst_lag
+            while running:
+                started = time.perf_counter()
+                await asyncio.sleep(0.005)
+                worst_lag = max(worst_lag, (time.perf_counter() - started) * 1000 - 5)
+
+        async def connect_once(i: int) -> None:
+            nonlocal frames
+            async with semaphore:
+                communicator = WebsocketCommunicator(application, '/ws/notifications/')
+                communicator.scope['user'] = users[i % len(users)]
+                started = time.perf_counter()
+                connected, _ = await communicator.connect(timeout=30)
+                if connected:
+                    await communicator.receive_from(timeout=30)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    frames += 1
+                    # Count any further frames the connect produced
+                    while not await communicator.receive_nothing(timeout=0.002, interval=0.001):
+                        await communicator.receive_from()
+                        frames += 1
+                await communicator.disconnect()
+
+        monitor = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        await asyncio.gather(*(connect_once(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+        running = False
+        await monitor
+
+        return latencies, frames, worst_lag, elapsed
+
+    def create_fixtures(self, users: int, notifications: int) -> List[User]:
+        """Create users with a mix of read and unread notifications"""
+        tag = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        created = [
+            User.objects.create(username=f'bench_notify_{tag}_{i}', email=f'bench_notify_{tag}_{i}@example.com')
+            for i in range(users)
+        ]
+        Notification.objects.bulk_create([
+            Notification(
+                user=user,
+                type='new_bid',
+                message=f'Benchmark notification {n}',
+                is_read=n % 3 == 0,
+            )
+            for user in created
+            for n in range(notifications)
+        ])
+        # bulk_create skips the unread counters
+        notification_counts.reconcile([user.id for user in created])
+        return created
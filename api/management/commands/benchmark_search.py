@@ -0,0 +1,144 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from decimal import Decimal
+from datetime import timedelta
+import random
+import statistics
+import time
+from typing import Dict, Any, List
+
+from api import search, system_stats
+from api.models import AuctionItem, User
+
+WORDS = [
+    'vintage', 'camera', 'lens', 'leather', 'handbag', 'designer', 'sofa', 'oak',
+    'table', 'mountain', 'bike', 'carbon', 'painting', 'abstract', 'canvas', 'classic',
+    'car', 'engine', 'watch', 'gold', 'silver', 'ring', 'guitar', 'amplifier', 'vinyl',
+    'record', 'console', 'controller', 'laptop', 'monitor', 'keyboard', 'chair', 'lamp',
+    'rug', 'jacket', 'boots', 'sneakers', 'racket', 'helmet', 'tent', 'sculpture', 'print',
+]
+# Filler so descriptions read like real listings instead of every one matching every query
+FILLER = [
+    ''.join(random.Random(n).choice('abcdefghijklmnopqrstuvwxyz') for _ in range(7))
+    for n in range(5000)
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full-text auction search against the original icontains search'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--auctions',
+            type=int,
+            default=100000,
+            help='Number of auctions to generate',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=20,
+            help='Number of distinct queries to time',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Timed runs per query and backend',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the generated auctions instead of deleting them',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        rng = random.Random(42)
+        fts_backend = search.get_backend()
+        basic_backend = search.BasicSearchBackend()
+
+        self.stdout.write(
+            f"🚀 Generating {options['auctions']} auctions ({connection.vendor}, "
+            f"backend: {fts_backend.name})"
+        )
+        owner = self.generate(options['auctions'], rng)
+
+        queries = self.sample_queries(options['queries'], rng)
+        results = {basic_backend.name: [], fts_backend.name: []}
+
+        for query in queries:
+            for backend in (basic_backend, fts_backend):
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    list(
+                        backend.search(AuctionItem.objects.all(), query)
+                        .filter(ends_at__gt=timezone.now())
+                        .order_by('-search_rank', '-ends_at', '-id')
+                        .values_list('id', flat=True)
+                    )
+                    results[backend.name].append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write("\n📈 Latency per query (ms):")
+        for name, timings in results.items():
+            timings.sort()
+            self.stdout.write(
+                f"   {name:<12} median {statistics.median(timings):8.2f}   "
+                f"p95 {timings[int(len(timings) * 0.95) - 1]:8.2f}   "
+                f"max {timings[-1]:8.2f}"
+            )
+
+        if fts_backend.name != basic_backend.name:
+            speedup = statistics.median(results[basic_backend.name]) / statistics.median(results[fts_backend.name])
+            self.stdout.write(self.style.SUCCESS(f"✅ {fts_backend.name} is {speedup:.1f}x faster at the median"))
+
+        if not options['keep']:
+            self.stdout.write("🧹 Removing generated auctions...")
+            owner.delete()
+        # bulk_create and deletes skip the stats counters, so recount them
+        system_stats.refresh()
+
+    def generate(self, count: int, rng: random.Random) -> User:
+        """Bulk create auctions with random titles and descriptions"""
+        tag = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        owner = User.objects.create(username=f'bench_search_{tag}', email=f'bench_search_{tag}@example.com')
+        now = timezone.now()
+
+        batch: List[AuctionItem] = []
+        with transaction.atomic():
+            for i in range(count):
+                title = ' '.join(rng.sample(WORDS, 3)).title()
+                description = ' '.join(
+                    [rng.choice(WORDS) for _ in range(2)] + rng.sample(FILLER, 25)
+                )
+                batch.append(AuctionItem(
+                    title=title,
+                    description=description,
+                    starting_price=Decimal('10.00'),
+                    current_price=Decimal('10.00'),
+                    ends_at=now + timedelta(days=rng.randint(-5, 30)),
+                    owner=owner,
+                ))
+                if len(batch) == 5000:
+                    AuctionItem.objects.bulk_create(batch)
+                    batch = []
+            if batch:
+                AuctionItem.objects.bulk_create(batch)
+
+            # bulk_create skips the signals that keep the SQLite index in step
+            search.install(connection)
+
+        return owner
+
+    def sample_queries(self, count: int, rng: random.Random) -> List[str]:
+        """Mix of single words, word prefixes and two-word queries"""
+        queries = []
+        for i in range(count):
+            kind = i % 3
+            if kind == 0:
+                queries.append(rng.choice(WORDS))
+            elif kind == 1:
+                queries.append(rng.choice(WORDS)[:4])
+            else:
+                queries.append(' '.join(rng.sample(WORDS, 2)))
+        return queries
@@ -1,20 +1,21 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.db import transaction
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
-from decimal import Decimal
+from django.db.models import OuterRef, Subquery
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
-from api.models import AuctionItem, Bid, User
+from api import email_rendering, order_book, outbox, response_cache
+from api.models import AuctionItem, Bid, OutboxMessage, User
+from api.utils import send_auction_update
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 200
+
 
 class Command(BaseCommand):
-    help = 'Close ended auctions and send winner notification emails'
+    help = 'Close ended auctions and queue winner notification emails'
 
     def add_arguments(self, parser: Any) -> None:
         parser.add_argument(
@@ -27,6 +28,12 @@ class Command(BaseCommand):
             type=str,
             help='Send test email to this address instead of actual winner',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Auctions closed per transaction; 0 closes them one at a time',
+        )
 
     def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
         dry_run = options['dry_run']
@@ -40,10 +47,7 @@ class Command(BaseCommand):
         )
         
         # Find auctions that have ended but are still active
-        ended_auctions = AuctionItem.objects.filter(
-            ends_at__lte=timezone.now(),
-            status='active'
-        ).select_related('owner').prefetch_related('bids__user')
+        ended_auctions = self.ended_auctions()
         
         if not ended_auctions.exists():
             self.stdout.write(
@@ -57,23 +61,60 @@ class Command(BaseCommand):
             )
         )
         
-        closed_count = 0
-        email_sent_count = 0
-        error_count = 0
+        if dry_run or options['batch_size'] <= 0:
+            counts = self.close(ended_auctions, dry_run, test_email)
+        else:
+            counts = self.close_batched(options['batch_size'], test_email)
+        
+        # Summary
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\n📈 Summary:"
+                f"\n   ✅ Auctions processed: {counts['processed']}"
+                f"\n   🔒 Auctions closed: {counts['closed']}"
+                f"\n   📧 Emails queued: {counts['emails_queued']}"
+                f"\n   ❌ Errors: {counts['errors']}"
+                f"\n   {'🧪 DRY RUN MODE' if dry_run else '🚀 LIVE MODE'}"
+            )
+        )
+
+    def ended(self, ids: Optional[List[int]] = None):
+        """Auctions that have ended but are still active, optionally limited to ids"""
+        auctions = AuctionItem.objects.filter(
+            ends_at__lte=timezone.now(),
+            status='active'
+        )
+        if ids is not None:
+            auctions = auctions.filter(id__in=ids)
+        return auctions
+
+    def ended_auctions(self, ids: Optional[List[int]] = None):
+        return self.ended(ids).select_related('owner').prefetch_related('bids__user')
+
+    def close(self, ended_auctions, dry_run: bool = False, test_email: Optional[str] = None) -> Dict[str, int]:
+        """Process each ended auction in its own transaction"""
+        counts = {'processed': 0, 'closed': 0, 'emails_queued': 0, 'errors': 0}
         
         for auction in ended_auctions:
+            counts['processed'] += 1
             try:
                 with transaction.atomic():
+                    if not dry_run:
+                        # Lock the row and re-check it is still active, as
+                        # close_batch does, so two closers cannot both close it
+                        auction = self.ended([auction.id]).select_for_update(of=('self',)).select_related('owner').first()
+                        if auction is None:
+                            continue
                     result = self.process_auction(auction, dry_run, test_email)
                     if result['closed']:
-                        closed_count += 1
-                    if result['email_sent']:
-                        email_sent_count += 1
+                        counts['closed'] += 1
+                    if result['emails_queued']:
+                        counts['emails_queued'] += 1
                     if result['error']:
-                        error_count += 1
+                        counts['errors'] += 1
                         
             except Exception as e:
-                error_count += 1
+                counts['errors'] += 1
                 logger.error(f"Error processing auction {auction.id}: {str(e)}")
                 self.stdout.write(
                     self.style.ERROR(
@@ -81,23 +122,151 @@ class Command(BaseCommand):
                     )
                 )
         
-        # Summary
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"\n📈 Summary:"
-                f"\n   ✅ Auctions processed: {ended_auctions.count()}"
-                f"\n   🔒 Auctions closed: {closed_count}"
-                f"\n   📧 Emails sent: {email_sent_count}"
-                f"\n   ❌ Errors: {error_count}"
-                f"\n   {'🧪 DRY RUN MODE' if dry_run else '🚀 LIVE MODE'}"
+        return counts
+
+    def close_batched(self, batch_size: int, test_email: Optional[str] = None, ids: Optional[List[int]] = None) -> Dict[str, int]:
+        """
+        Close ended auctions batch_size at a time. Each batch is one
+        transaction with a fixed number of queries, which also queues the
+        closing emails and notifications in the outbox.
+        """
+        counts = {'processed': 0, 'closed': 0, 'emails_queued': 0, 'errors': 0}
+
+        last_id = 0
+        while True:
+            batch = list(
+                self.ended(ids).filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
             )
-        )
+            if not batch:
+                break
+            last_id = batch[-1]
+            counts['processed'] += len(batch)
+
+            try:
+                closed = self.close_batch(batch, test_email)
+            except Exception as e:
+                counts['errors'] += len(batch)
+                logger.error(f"Error closing auctions {batch[0]}-{batch[-1]}: {str(e)}")
+                self.stdout.write(self.style.ERROR(f"❌ Error closing auctions {batch[0]}-{batch[-1]}: {str(e)}"))
+                continue
+
+            counts['closed'] += len(closed)
+            # Counted per auction, as in the serial path
+            counts['emails_queued'] += len(closed)
+            for auction in closed:
+                self.announce(auction)
+
+        return counts
+
+    def close_batch(self, batch: List[int], test_email: Optional[str] = None) -> List[AuctionItem]:
+        """
+        Lock and close a batch of auctions. Winners come from one query, the
+        closing from one bulk update, the losing bidders from one more and
+        every email and notification is queued with one insert.
+        """
+        now = timezone.now()
+        top_bid = Bid.objects.filter(item=OuterRef('pk')).order_by('-bid_amount', '-timestamp').values('id')[:1]
+
+        with transaction.atomic():
+            auctions = list(
+                self.ended(batch)
+                .select_for_update(of=('self',))
+                .select_related('owner')
+                .annotate(winning_bid_id=Subquery(top_bid))
+                .order_by('id')
+            )
+            winning_bids = Bid.objects.select_related('user').in_bulk(
+                [a.winning_bid_id for a in auctions if a.winning_bid_id]
+            )
+
+            for auction in auctions:
+                winning_bid = winning_bids.get(auction.winning_bid_id)
+                auction.status = 'closed'
+                auction.closed_at = now
+                if winning_bid:
+                    auction.winner = winning_bid.user
+                    auction.winning_bid_amount = winning_bid.bid_amount
+            AuctionItem.objects.bulk_update(auctions, ['status', 'closed_at', 'winner', 'winning_bid_amount'])
+
+            winners = {a.id: a.winner_id for a in auctions if a.winner_id}
+            losing: Dict[int, List[int]] = {}
+            for item_id, user_id in Bid.objects.filter(item_id__in=winners).values_list('item_id', 'user_id').distinct():
+                if user_id != winners[item_id]:
+                    losing.setdefault(item_id, []).append(user_id)
+
+            messages = self.closing_messages(
+                [(a, winning_bids.get(a.winning_bid_id), losing.get(a.id, [])) for a in auctions],
+                test_email,
+            )
+            OutboxMessage.objects.bulk_create(messages, batch_size=500)
+
+        return auctions
+
+    def announce(self, auction: AuctionItem) -> None:
+        """Live update for a closed auction"""
+        order_book.invalidate(auction.id)
+        response_cache.bump(auction.id)
+        send_auction_update(auction.id, {
+            'event': 'closed',
+            'item_id': auction.id,
+            'winner_id': auction.winner_id,
+        })
+
+    def closing_messages(self, closings: List[Tuple[AuctionItem, Optional[Bid], List[int]]], test_email: Optional[str]) -> List[OutboxMessage]:
+        """
+        Unsaved outbox messages for everything the closed auctions send, given
+        each auction's winning bid and losing bidder ids. Each email template
+        is rendered for the whole list at once.
+        """
+        winner_emails: List[Tuple[Dict[str, Any], User, str]] = []
+        seller_emails: List[Tuple[Dict[str, Any], User, str]] = []
+        notifications: List[OutboxMessage] = []
+
+        for auction, winning_bid, loser_ids in closings:
+            winner = winning_bid.user if winning_bid else None
+            amount = winning_bid.bid_amount if winning_bid else None
+            context = email_rendering.auction_context(auction, winner, amount)
+            seller_emails.append((context, auction.owner, auction.owner.email))
+            if winner is None:
+                continue
+
+            winner_emails.append((context, winner, test_email or winner.email))
+            notifications.append(outbox.notification_message(
+                winner.id,
+                'auction_won',
+                f'🎉 Congratulations! You won the auction for "{auction.title}" with a bid of ${amount:.2f}',
+            ))
+            notifications += [
+                outbox.notification_message(
+                    bidder_id,
+                    'auction_lost',
+                    f'The auction "{auction.title}" has ended. The winning bid was ${amount:.2f}',
+                )
+                for bidder_id in loser_ids
+            ]
+
+        messages: List[OutboxMessage] = []
+        for name, subject, emails in (
+            ('winner_notification', "🎉 Congratulations! You won the auction for {title}", winner_emails),
+            ('seller_notification', "🏆 Your auction '{title}' has ended", seller_emails),
+        ):
+            rendered = email_rendering.render_many(name, [(context, reader) for context, reader, _ in emails])
+            messages += [
+                outbox.email_message(
+                    subject=subject.format(title=context['auction_title']),
+                    body=parts.text,
+                    recipients=[recipient],
+                    html_body=parts.html,
+                )
+                for (context, _, recipient), parts in zip(emails, rendered)
+            ]
+        return messages + notifications
 
     def process_auction(self, auction: AuctionItem, dry_run: bool = False, test_email: Optional[str] = None) -> Dict[str, Any]:
         """Process a single ended auction"""
         result = {
             'closed': False,
-            'email_sent': False,
+            'emails_queued': False,
             'error': False,
             'winner': None,
             'winning_bid': None
@@ -113,30 +282,15 @@ class Command(BaseCommand):
                 )
             )
             
-            # Prepare email data for seller notification (no bids)
-            email_data = {
-                'auction': auction,
-                'winner': None,
-                'winning_bid': None,
-                'winning_amount': None,
-                'seller': auction.owner,
-                'site_url': getattr(settings, 'SITE_URL', 'http://localhost:8000'),
-            }
-            
             if not dry_run:
-                # Send seller notification about no bids
-                seller_sent = self.send_seller_notification(auction.owner.email, email_data)
-                
-                if seller_sent:
-                    result['email_sent'] = True
-                    
-                    # Close the auction
-                    auction.status = 'closed'
-                    auction.closed_at = timezone.now()
-                    auction.save()
-                    result['closed'] = True
-                else:
-                    result['error'] = True
+                # Close the auction and queue the seller notification about no bids
+                auction.status = 'closed'
+                auction.closed_at = timezone.now()
+                auction.save()
+                OutboxMessage.objects.bulk_create(self.closing_messages([(auction, None, [])], test_email))
+                transaction.on_commit(lambda: self.announce(auction))
+                result['emails_queued'] = True
+                result['closed'] = True
             else:
                 self.stdout.write(
                     self.style.WARNING(
@@ -155,166 +309,48 @@ class Command(BaseCommand):
         # Determine winner and email recipient
         winner = highest_bid.user
         winning_amount = highest_bid.bid_amount
-        
-        # Prepare email data for winner (using winner's currency)
-        winner_email_data = {
-            'auction': auction,
-            'winner': winner,
-            'winning_bid': winner.format_currency(winning_amount),
-            'starting_price': winner.format_currency(auction.starting_price),
-            'winning_amount': winning_amount,
-            'seller': auction.owner,
-            'site_url': getattr(settings, 'SITE_URL', 'http://localhost:8000'),
-        }
-        
-        # Prepare email data for seller (using seller's currency)
-        seller_email_data = {
-            'auction': auction,
-            'winner': winner,
-            'winning_bid': auction.owner.format_currency(winning_amount),
-            'starting_price': auction.owner.format_currency(auction.starting_price),
-            'winning_amount': winning_amount,
-            'seller': auction.owner,
-            'site_url': getattr(settings, 'SITE_URL', 'http://localhost:8000'),
-        }
-        
-        # Send winner notification
         email_recipient = test_email if test_email else winner.email
         
-        try:
-            if not dry_run:
-                # Send email to winner
-                winner_sent = self.send_winner_email(email_recipient, winner_email_data)
-                
-                # Also notify seller
-                seller_sent = self.send_seller_notification(auction.owner.email, seller_email_data)
-                
-                if winner_sent and seller_sent:
-                    result['email_sent'] = True
-                    
-                    # Close the auction
-                    auction.status = 'closed'
-                    auction.winner = winner
-                    auction.winning_bid_amount = winning_amount
-                    auction.closed_at = timezone.now()
-                    auction.save()
-                    result['closed'] = True
-                    result['winner'] = winner
-                    result['winning_bid'] = highest_bid
-                    
-                    # Create in-app notifications
-                    # Winner notification
-                    from api.models import Notification
-                    from api.utils import create_and_send_notification
-                    create_and_send_notification(
-                        winner,
-                        'auction_won',
-                        f'🎉 Congratulations! You won the auction for "{auction.title}" with a bid of ${winning_amount:.2f}',
-                    )
-                    
-                    # Notify all other bidders that they lost
-                    other_bidders = Bid.objects.filter(item=auction).exclude(user=winner).values_list('user', flat=True).distinct()
-                    for bidder_id in other_bidders:
-                        from django.contrib.auth import get_user_model
-                        User = get_user_model()
-                        bidder = User.objects.get(id=bidder_id)
-                        create_and_send_notification(
-                            bidder,
-                            'auction_lost',
-                            f'The auction "{auction.title}" has ended. The winning bid was ${winning_amount:.2f}',
-                        )
-                else:
-                    result['error'] = True
-            else:
-                self.stdout.write(
-                    self.style.WARNING(
-                        f"🧪 DRY RUN: Would send winner email to {email_recipient}"
-                    )
+        if not dry_run:
+            # Close the auction
+            auction.status = 'closed'
+            auction.winner = winner
+            auction.winning_bid_amount = winning_amount
+            auction.closed_at = timezone.now()
+            auction.save()
+            
+            # Queue the winner and seller emails and the in-app notifications
+            # for the winner and every other bidder with the closing
+            other_bidders = list(
+                Bid.objects.filter(item=auction).exclude(user=winner).values_list('user', flat=True).distinct()
+            )
+            OutboxMessage.objects.bulk_create(self.closing_messages([(auction, highest_bid, other_bidders)], test_email))
+            transaction.on_commit(lambda: self.announce(auction))
+            
+            result['emails_queued'] = True
+            result['closed'] = True
+            result['winner'] = winner
+            result['winning_bid'] = highest_bid
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"🧪 DRY RUN: Would send winner email to {email_recipient}"
                 )
-                self.stdout.write(
-                    self.style.WARNING(
-                        f"🧪 DRY RUN: Would close auction {auction.id} - {auction.title}"
-                    )
+            )
+            self.stdout.write(
+                self.style.WARNING(
+                    f"🧪 DRY RUN: Would close auction {auction.id} - {auction.title}"
                 )
-                result['closed'] = True  # Simulate closing in dry run
-                
-        except Exception as e:
-            logger.error(f"Failed to send email for auction {auction.id}: {str(e)}")
-            result['error'] = True
+            )
+            result['closed'] = True  # Simulate closing in dry run
         
         # Log the result
-        if result['email_sent']:
+        if result['emails_queued']:
             self.stdout.write(
                 self.style.SUCCESS(
                     f"✅ Auction {auction.id} closed - Winner: {winner.username} "
                     f"(${winning_amount:.2f})"
                 )
             )
-        elif result['error']:
-            self.stdout.write(
-                self.style.ERROR(
-                    f"❌ Failed to process auction {auction.id}"
-                )
-            )
         
         return result
-
-    def send_winner_email(self, recipient_email: str, email_data: Dict[str, Any]) -> bool:
-        """Send winner notification email"""
-        try:
-            subject = f"🎉 Congratulations! You won the auction for {email_data['auction'].title}"
-            
-            # Create HTML email content
-            html_message = render_to_string('emails/winner_notification.html', email_data)
-            plain_message = render_to_string('emails/winner_notification.txt', email_data)
-            
-            # Send email
-            sent = send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@auctionsite.com'),
-                recipient_list=[recipient_email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            
-            if sent:
-                logger.info(f"Winner notification sent to {recipient_email}")
-                return True
-            else:
-                logger.error(f"Failed to send winner notification to {recipient_email}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error sending winner email to {recipient_email}: {str(e)}")
-            return False
-
-    def send_seller_notification(self, seller_email: str, email_data: Dict[str, Any]) -> bool:
-        """Send notification to seller about auction ending"""
-        try:
-            subject = f"🏆 Your auction '{email_data['auction'].title}' has ended"
-            
-            # Create HTML email content
-            html_message = render_to_string('emails/seller_notification.html', email_data)
-            plain_message = render_to_string('emails/seller_notification.txt', email_data)
-            
-            # Send email
-            sent = send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@auctionsite.com'),
-                recipient_list=[seller_email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            
-            if sent:
-                logger.info(f"Seller notification sent to {seller_email}")
-                return True
-            else:
-                logger.error(f"Failed to send seller notification to {seller_email}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error sending seller email to {seller_email}: {str(e)}")
-            return False
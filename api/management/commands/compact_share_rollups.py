@@ -0,0 +1,88 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+from api import shares
+from api.models import ShareAnalytics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild recent daily share rollups from the raw events and prune events past retention'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=2,
+            help='Number of most recent days (including today) to recount from the raw events',
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=None,
+            help='Keep raw events this many days (default: SHARE_RAW_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of raw events deleted per statement',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be rebuilt and pruned',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+
+        retention = options['retention_days']
+        if retention is None:
+            retention = shares.raw_retention_days()
+        dry_run = options['dry_run']
+        today = timezone.localdate()
+
+        # Days whose raw events have been pruned only exist in the rollups
+        days = options['days']
+        if retention is not None and days > retention:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  Raw events are only kept {retention} day(s); rebuilding {retention} instead of {days}"
+            ))
+            days = retention
+
+        since = today - timedelta(days=days - 1)
+        self.stdout.write(
+            f"🔄 Compacting share analytics {'(DRY RUN)' if dry_run else ''}"
+        )
+
+        if dry_run:
+            self.stdout.write(f"📊 Would rebuild rollups from {since}")
+        else:
+            written = shares.rebuild(since)
+            self.stdout.write(f"📊 Rebuilt {written} rollup row(s) from {since}")
+
+        if retention is None:
+            self.stdout.write("⏭️  Raw event retention disabled, nothing pruned")
+            return
+
+        cutoff = timezone.make_aware(datetime.combine(today - timedelta(days=retention), datetime.min.time()))
+        expired = ShareAnalytics.objects.filter(timestamp__lt=cutoff)
+        if dry_run:
+            self.stdout.write(f"🗑️  Would prune {expired.count()} raw event(s) before {cutoff.date()}")
+            return
+
+        pruned = 0
+        while True:
+            batch = list(expired.order_by().values_list('id', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                pruned += ShareAnalytics.objects.filter(id__in=batch).delete()[0]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Pruned {pruned} raw event(s) before {cutoff.date()}")
+        )
@@ -6,6 +6,7 @@ from datetime import timedelta
 from typing import Dict, Any, List
 import random
 
+from api import response_cache
 from api.models import AuctionItem, Bid, Question, Reply
 
 class Command(BaseCommand):
@@ -33,6 +34,9 @@ class Command(BaseCommand):
         # Add replies
         replies = self.create_test_replies(users, questions)
         self.stdout.write(f"✅ Created {len(replies)} replies")
+
+        # New auctions are not in any cached listing page yet
+        response_cache.bump_listing()
         
         self.stdout.write(
             self.style.SUCCESS(
@@ -243,8 +247,12 @@ class Command(BaseCommand):
                 bids.append(bid)
                 current_price = new_bid_amount
             
-            # Update auction's current price
+            # Update auction's current price and bid summary
             auction.current_price = Decimal(str(current_price))
+            auction.bid_count = min(num_bids, len(bidders))
+            if bids and bids[-1].item_id == auction.id:
+                auction.leading_bidder = bids[-1].user
+                auction.last_bid_at = bids[-1].timestamp
             auction.save()
         
         return bids
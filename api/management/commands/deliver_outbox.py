@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+import time
+from typing import Dict, Any
+
+from api import outbox
+from api.mailer import Mailer
+
+# Seconds between prunes of delivered messages
+PRUNE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails and notifications from the outbox, retrying failures with backoff'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the messages due now and exit instead of running as a worker',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait between polls when the outbox is empty',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Messages leased per batch (default: OUTBOX_BATCH_SIZE)',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        if not options['once']:
+            self.stdout.write(self.style.SUCCESS(f"🚀 Outbox worker started (polling every {options['interval']}s)"))
+
+        next_prune = 0.0
+        # One mail connection for the life of the worker, reopened as needed
+        mailer = Mailer()
+        try:
+            while True:
+                counts = outbox.deliver(options['batch_size'], mailer)
+                if any(counts.values()):
+                    self.stdout.write(
+                        f"📧 {counts['sent']} sent, {counts['retried']} to retry, {counts['failed']} failed"
+                    )
+                    continue
+
+                if time.monotonic() >= next_prune:
+                    pruned = outbox.prune()
+                    if pruned:
+                        self.stdout.write(f"🧹 Pruned {pruned} delivered message(s)")
+                    next_prune = time.monotonic() + PRUNE_INTERVAL
+
+                if options['once']:
+                    return
+                # Don't hold database or mail connections open while idle
+                connection.close()
+                mailer.close()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("👋 Outbox worker stopped")
+        finally:
+            mailer.close()
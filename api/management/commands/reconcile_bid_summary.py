@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from typing import Dict, Any
+
+from api import order_book, response_cache
+from api.models import AuctionItem, Bid
+
+
+class Command(BaseCommand):
+    help = 'Backfill and reconcile AuctionItem.bid_count, leading_bidder and last_bid_at from the bids table'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of auctions updated per statement',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many auctions are out of step',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        bids = Bid.objects.filter(item=OuterRef('pk'))
+        bid_count = Coalesce(
+            Subquery(
+                bids.order_by().values('item').annotate(c=Count('id')).values('c'),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+        leading_bidder = Subquery(
+            bids.order_by('-bid_amount', '-timestamp').values('user')[:1]
+        )
+        last_bid_at = Subquery(
+            bids.order_by().values('item').annotate(m=Max('timestamp')).values('m')
+        )
+
+        self.stdout.write(
+            f"🔄 Reconciling bid summaries {'(DRY RUN)' if dry_run else ''}"
+        )
+
+        # last_bid_at is stamped when the price is updated, a moment before the
+        # bid row's own timestamp, so only a missing value counts as drift.
+        # NOT (a = b) is true when both are NULL, so leaders are only compared
+        # when both are set and a missing one is checked on its own
+        drifted = list(
+            AuctionItem.objects
+            .annotate(
+                actual_count=bid_count,
+                actual_leader=leading_bidder,
+                actual_last=last_bid_at,
+            )
+            .filter(
+                ~Q(bid_count=F('actual_count'))
+                | (Q(leading_bidder__isnull=False, actual_leader__isnull=False) & ~Q(leading_bidder=F('actual_leader')))
+                | Q(leading_bidder__isnull=True, actual_leader__isnull=False)
+                | Q(leading_bidder__isnull=False, actual_leader__isnull=True)
+                | Q(last_bid_at__isnull=True, actual_last__isnull=False)
+                | Q(last_bid_at__isnull=False, actual_last__isnull=True)
+            )
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        self.stdout.write(f"📊 {len(drifted)} auction(s) out of step")
+
+        if dry_run or not drifted:
+            return
+
+        updated = 0
+        for start in range(0, len(drifted), batch_size):
+            batch = drifted[start:start + batch_size]
+            with transaction.atomic():
+                updated += AuctionItem.objects.filter(id__in=batch).update(
+                    bid_count=bid_count,
+                    leading_bidder=leading_bidder,
+                    last_bid_at=last_bid_at,
+                )
+            for item_id in batch:
+                order_book.invalidate(item_id)
+                response_cache.bump(item_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Reconciled {updated} auction(s) in batches of {batch_size}")
+        )
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from typing import Dict, Any
+
+from api import notification_counts
+from api.utils import send_unread_count_update
+
+
+class Command(BaseCommand):
+    help = 'Recount User.unread_notifications for users whose counter has drifted from their notifications'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of users updated per statement',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many users are out of step',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        self.stdout.write(
+            f"🔄 Reconciling unread notification counts {'(DRY RUN)' if dry_run else ''}"
+        )
+        drifted = notification_counts.drifted()
+        self.stdout.write(f"📊 {len(drifted)} user(s) out of step")
+
+        if dry_run or not drifted:
+            return
+
+        updated = 0
+        for start in range(0, len(drifted), batch_size):
+            batch = drifted[start:start + batch_size]
+            with transaction.atomic():
+                updated += notification_counts.reconcile(batch)
+            # Correct any badge that is open now
+            for user_id, count in notification_counts.unread(batch).items():
+                send_unread_count_update(user_id, count)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Reconciled {updated} user(s) in batches of {batch_size}")
+        )
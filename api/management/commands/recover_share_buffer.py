@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from pathlib import Path
+from typing import Dict, Any
+
+from api import share_buffer
+
+
+class Command(BaseCommand):
+    help = 'Write share events left in spill files by processes on this host that have exited'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--dir',
+            default=None,
+            help='Spill directory (default: SHARE_BUFFER_DIR)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the spill files that would be replayed',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        directory = Path(options['dir']) if options['dir'] else share_buffer.spill_dir()
+        if not directory.is_dir():
+            self.stdout.write(f"📭 No spill directory at {directory}")
+            return
+
+        orphans = share_buffer.orphaned_spills(directory)
+        self.stdout.write(f"🔄 {len(orphans)} orphaned spill file(s) in {directory}")
+
+        if options['dry_run']:
+            for path in orphans:
+                self.stdout.write(f"   {path.name}: {len(share_buffer.read_spill(path))} event(s)")
+            return
+
+        stored = share_buffer.recover(directory)
+        self.stdout.write(self.style.SUCCESS(f"✅ Stored {stored} share event(s)"))
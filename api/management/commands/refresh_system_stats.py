@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from typing import Dict, Any
+
+from api import system_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount the materialised /api/system/stats snapshot from the tables'
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        self.stdout.write("🔄 Refreshing system statistics...")
+        stats = system_stats.refresh()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {stats.users_total} users, {stats.auctions_total} auctions "
+                f"({stats.auctions_active} active), {stats.bids_total} bids"
+            )
+        )
@@ -0,0 +1,142 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from datetime import timedelta
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional
+
+from api.management.commands.close_auctions import DEFAULT_BATCH_SIZE, Command as CloseAuctionsCommand
+from api.models import AuctionItem
+from api.scheduler import GROUP, DeadlineQueue
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Close auctions as they end, sleeping until the next deadline instead of polling'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            '--horizon',
+            type=int,
+            default=3600,
+            help='Seconds ahead to keep deadlines in memory',
+        )
+        parser.add_argument(
+            '--resync',
+            type=int,
+            default=60,
+            help='Seconds between rereads of the deadline window from the database',
+        )
+        parser.add_argument(
+            '--retry',
+            type=int,
+            default=60,
+            help='Seconds to wait before retrying an auction that failed to close',
+        )
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        if options['resync'] < 1 or options['horizon'] < options['resync']:
+            raise CommandError('--horizon must be at least --resync, which must be at least 1 second')
+
+        self.horizon = timedelta(seconds=options['horizon'])
+        self.resync_interval = options['resync']
+        self.retry = timedelta(seconds=options['retry'])
+        self.verbosity = options['verbosity']
+        self.closer = CloseAuctionsCommand(stdout=self.stdout._out, stderr=self.stderr._out)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"🚀 Auction scheduler started (horizon {options['horizon']}s, "
+                f"resync every {options['resync']}s)"
+            )
+        )
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            self.stdout.write("👋 Auction scheduler stopped")
+
+    async def run(self) -> None:
+        channel_layer = get_channel_layer()
+        channel = await channel_layer.new_channel() if channel_layer else None
+        queue = DeadlineQueue()
+        next_resync = 0.0
+
+        while True:
+            if time.monotonic() >= next_resync:
+                queue = DeadlineQueue(await self.load_window())
+                if channel_layer:
+                    # Rejoin on every resync: group membership expires
+                    await channel_layer.group_add(GROUP, channel)
+                next_resync = time.monotonic() + self.resync_interval
+                if self.verbosity > 1:
+                    self.stdout.write(f"🔄 {len(queue)} auction(s) ending within the horizon")
+
+            due = queue.pop_due(timezone.now())
+            if due:
+                for item_id, ends_at in (await self.close(due)).items():
+                    queue.schedule(item_id, ends_at)
+
+            # Sleep until the next deadline or resync, waking early for schedule changes
+            timeout = next_resync - time.monotonic()
+            deadline = queue.next_deadline()
+            if deadline is not None:
+                timeout = min(timeout, (deadline - timezone.now()).total_seconds())
+            message = await self.receive(channel_layer, channel, max(timeout, 0))
+            if message:
+                self.apply(queue, message)
+
+    async def receive(self, channel_layer: Any, channel: Optional[str], timeout: float) -> Optional[Dict[str, Any]]:
+        if not channel_layer:
+            await asyncio.sleep(timeout)
+            return None
+        try:
+            return await asyncio.wait_for(channel_layer.receive(channel), timeout)
+        except asyncio.TimeoutError:
+            return None
+        except Exception as e:
+            # The layer is unavailable; fall back to the periodic resync
+            logger.error(f"Scheduler channel receive failed: {str(e)}")
+            await asyncio.sleep(timeout)
+            return None
+
+    def apply(self, queue: DeadlineQueue, message: Dict[str, Any]) -> None:
+        """Move an auction in the queue after it was created, edited, closed or deleted"""
+        if message.get('type') != 'auction_schedule':
+            return
+        ends_at = parse_datetime(message['ends_at']) if message.get('ends_at') else None
+        if ends_at is None or ends_at > timezone.now() + self.horizon:
+            # Closed, deleted or beyond the horizon: a later resync picks it up
+            queue.discard(message['item_id'])
+        else:
+            queue.schedule(message['item_id'], ends_at)
+
+    @database_sync_to_async
+    def load_window(self) -> List[Any]:
+        return list(
+            AuctionItem.objects
+            .filter(status='active', ends_at__lte=timezone.now() + self.horizon)
+            .values_list('id', 'ends_at')
+        )
+
+    @database_sync_to_async
+    def close(self, item_ids: List[int]) -> Dict[int, Any]:
+        """
+        Close the due auctions. Returns the ones still open, rescheduled:
+        moved deadlines at their new time, failures after the retry delay.
+        """
+        counts = self.closer.close_batched(DEFAULT_BATCH_SIZE, ids=item_ids)
+        self.stdout.write(
+            f"🔒 Closed {counts['closed']} of {len(item_ids)} due auction(s)"
+            + (f", {counts['errors']} error(s)" if counts['errors'] else '')
+        )
+
+        now = timezone.now()
+        pending = {}
+        for item_id, ends_at in AuctionItem.objects.filter(id__in=item_ids, status='active').values_list('id', 'ends_at'):
+            pending[item_id] = ends_at if ends_at > now else now + self.retry
+        return pending
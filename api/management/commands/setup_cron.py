@@ -33,6 +33,18 @@ class Command(BaseCommand):
         self.stdout.write(f"2. Add this line:")
         self.stdout.write(f"   {cron_command}")
         self.stdout.write("3. Save and exit")
+        self.stdout.write(
+            "\n💡 To close auctions within seconds of ending instead, run this as a service:"
+            f"\n   {python_path} {manage_py} run_auction_scheduler"
+        )
+        self.stdout.write(
+            "\n📬 Emails and notifications are queued; run the outbox worker as a service to deliver them:"
+            f"\n   {python_path} {manage_py} deliver_outbox"
+        )
+        self.stdout.write(
+            "\n🗄️  To keep the notifications table small, archive old read notifications nightly:"
+            f"\n   0 3 * * * cd {settings.BASE_DIR} && {python_path} {manage_py} archive_notifications >> {settings.BASE_DIR}/logs/cron.log 2>&1"
+        )
         
         self.stdout.write(
             self.style.SUCCESS(
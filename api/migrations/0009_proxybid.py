@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_shareanalytics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bid",
+            name="is_proxy",
+            field=models.BooleanField(
+                default=False, help_text="Placed automatically on behalf of a proxy bid"
+            ),
+        ),
+        migrations.CreateModel(
+            name="ProxyBid",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("max_amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="proxy_bids",
+                        to="api.auctionitem",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="proxy_bids",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "proxy_bids",
+                "ordering": ["-max_amount", "created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["item", "is_active"],
+                        name="proxy_bids_item_id_bb31f5_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "item"), name="unique_proxy_bid_per_user_item"
+                    )
+                ],
+            },
+        ),
+    ]
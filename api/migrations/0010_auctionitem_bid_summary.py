@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_bid_summary(apps, schema_editor):
+    AuctionItem = apps.get_model("api", "AuctionItem")
+    Bid = apps.get_model("api", "Bid")
+    bids = Bid.objects.filter(item=OuterRef("pk"))
+    AuctionItem.objects.update(
+        bid_count=Coalesce(
+            Subquery(
+                bids.order_by().values("item").annotate(c=Count("id")).values("c"),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+        leading_bidder=Subquery(bids.order_by("-bid_amount", "-timestamp").values("user")[:1]),
+        last_bid_at=Subquery(
+            bids.order_by().values("item").annotate(m=Max("timestamp")).values("m")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_proxybid"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auctionitem",
+            name="bid_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="auctionitem",
+            name="last_bid_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="auctionitem",
+            name="leading_bidder",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="leading_auctions",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(backfill_bid_summary, migrations.RunPython.noop),
+    ]
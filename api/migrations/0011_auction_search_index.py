@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# Frozen copy of the full-text index DDL; api/search.py may change after
+# this migration has run, so it is not imported here.
+INSTALL_SQL = {
+    "postgresql": [
+        "ALTER TABLE auction_items ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        ") STORED",
+        "CREATE INDEX IF NOT EXISTS auction_items_search_vector_gin "
+        "ON auction_items USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS auction_items_fts USING fts5(title, description)",
+        "DELETE FROM auction_items_fts",
+        "INSERT INTO auction_items_fts(rowid, title, description) "
+        "SELECT id, title, description FROM auction_items",
+    ],
+}
+
+UNINSTALL_SQL = {
+    "postgresql": [
+        "DROP INDEX IF EXISTS auction_items_search_vector_gin",
+        "ALTER TABLE auction_items DROP COLUMN IF EXISTS search_vector",
+    ],
+    "sqlite": [
+        "DROP TABLE IF EXISTS auction_items_fts",
+    ],
+}
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_auctionitem_bid_summary"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_for_vendor(INSTALL_SQL), run_for_vendor(UNINSTALL_SQL)),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_auction_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="question",
+            index=models.Index(
+                fields=["item", "-timestamp"], name="questions_item_id_953186_idx"
+            ),
+        ),
+    ]
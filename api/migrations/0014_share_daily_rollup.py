@@ -0,0 +1,83 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    ShareAnalytics = apps.get_model("api", "ShareAnalytics")
+    ShareDailyRollup = apps.get_model("api", "ShareDailyRollup")
+    counts = (
+        ShareAnalytics.objects
+        .annotate(day=TruncDate("timestamp"))
+        .order_by()
+        .values("auction_id", "platform", "day")
+        .annotate(count=Count("id"))
+    )
+    ShareDailyRollup.objects.bulk_create(
+        [ShareDailyRollup(**row) for row in counts], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_cache_table"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShareDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "platform",
+                    models.CharField(
+                        choices=[
+                            ("facebook", "Facebook"),
+                            ("twitter", "Twitter"),
+                            ("whatsapp", "WhatsApp"),
+                            ("email", "Email"),
+                            ("copy-link", "Copy Link"),
+                            ("embed", "Embed Code"),
+                            ("qr-download", "QR Code Download"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "auction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="share_rollups",
+                        to="api.auctionitem",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "share_daily_rollups",
+                "indexes": [
+                    models.Index(fields=["day"], name="share_daily_day_e2d599_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("auction", "platform", "day"),
+                        name="unique_share_rollup_per_auction_platform_day",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0014_share_daily_rollup"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="shareanalytics",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+from api.hyperloglog import HyperLogLog, hash_value
+
+
+def backfill_sketches(apps, schema_editor):
+    # Same sharer identity and day boundary as api.shares at the time of writing
+    ShareAnalytics = apps.get_model("api", "ShareAnalytics")
+    ShareSketch = apps.get_model("api", "ShareSketch")
+    events = (
+        ShareAnalytics.objects
+        .order_by("auction_id", "timestamp")
+        .values_list("auction_id", "timestamp", "ip_address", "user_agent")
+        .iterator(chunk_size=2000)
+    )
+
+    def save(auction_id, days):
+        all_time = HyperLogLog()
+        for sketch in days.values():
+            all_time.merge(sketch)
+        ShareSketch.objects.bulk_create(
+            [ShareSketch(auction_id=auction_id, day=day, registers=sketch.to_bytes()) for day, sketch in days.items()]
+            + [ShareSketch(auction_id=auction_id, day=None, registers=all_time.to_bytes())]
+        )
+
+    current, days = None, {}
+    for auction_id, timestamp, ip_address, user_agent in events:
+        if auction_id != current:
+            if days:
+                save(current, days)
+            current, days = auction_id, {}
+        day = timezone.localdate(timestamp)
+        days.setdefault(day, HyperLogLog()).add_hash(hash_value(f"{ip_address or ''}|{user_agent or ''}"))
+    if days:
+        save(current, days)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0015_share_analytics_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShareSketch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(blank=True, null=True)),
+                ("registers", models.BinaryField()),
+                (
+                    "auction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="share_sketches",
+                        to="api.auctionitem",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "share_sketches",
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("day__isnull", False)),
+                        fields=("auction", "day"),
+                        name="unique_share_sketch_per_auction_day",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("day__isnull", True)),
+                        fields=("auction",),
+                        name="unique_share_sketch_per_auction",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_sketches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0016_share_sketch"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SystemStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("users_total", models.IntegerField(default=0)),
+                ("users_new_24h", models.IntegerField(default=0)),
+                ("users_new_7d", models.IntegerField(default=0)),
+                ("auctions_total", models.IntegerField(default=0)),
+                ("auctions_active", models.IntegerField(default=0)),
+                ("auctions_ended", models.IntegerField(default=0)),
+                ("auctions_recent", models.IntegerField(default=0)),
+                ("bids_total", models.IntegerField(default=0)),
+                ("bids_24h", models.IntegerField(default=0)),
+                (
+                    "bid_amount_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                ("questions_total", models.IntegerField(default=0)),
+                ("replies_total", models.IntegerField(default=0)),
+                ("categories", models.JSONField(default=dict)),
+                (
+                    "refreshed_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "system stats",
+                "db_table": "system_stats",
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:37
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread(apps, schema_editor):
+    User = apps.get_model("api", "User")
+    Notification = apps.get_model("api", "Notification")
+    unread = (
+        Notification.objects
+        .filter(user=OuterRef("pk"), is_read=False)
+        .order_by()
+        .values("user")
+        .annotate(c=Count("id"))
+        .values("c")
+    )
+    User.objects.update(
+        unread_notifications=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0018_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="unread_notifications",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_unread, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0019_user_unread_notifications"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedNotification",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("outbid", "Outbid"),
+                            ("question_answered", "Question Answered"),
+                            ("auction_ending", "Auction Ending"),
+                            ("auction_won", "Auction Won"),
+                            ("auction_lost", "Auction Lost"),
+                            ("new_bid", "New Bid"),
+                            ("new_question", "New Question"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                ("message", models.TextField()),
+                ("timestamp", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "archived_notifications",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "-timestamp"], name="notificatio_user_id_5d4812_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivednotification",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="archived_notifications",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivednotification",
+            index=models.Index(
+                fields=["user", "-timestamp"], name="archived_no_user_id_e9ec31_idx"
+            ),
+        ),
+    ]
@@ -43,6 +43,9 @@ class User(AbstractUser):
         help_text="User's preferred currency for display"
     )
 
+    # Kept in step by api.notification_counts; recounted by reconcile_unread_counts
+    unread_notifications = models.IntegerField(default=0)
+
     class Meta:
         db_table = "users"
         verbose_name = "User"
@@ -147,6 +150,20 @@ class AuctionItem(models.Model):
         blank=True
     )
 
+    # Denormalised bid summary, kept in step with the bids table by api.bidding
+    bid_count = models.PositiveIntegerField(default=0)
+    leading_bidder = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="leading_auctions"
+    )
+    last_bid_at = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="items")
 
     class Meta:
@@ -187,6 +204,10 @@ class Bid(models.Model):
     bid_amount = models.DecimalField(max_digits=10, decimal_places=2)
     timestamp = models.DateTimeField(auto_now_add=True)
     is_winning = models.BooleanField(default=False)
+    is_proxy = models.BooleanField(
+        default=False,
+        help_text="Placed automatically on behalf of a proxy bid"
+    )
 
     class Meta:
         db_table = "bids"
@@ -196,6 +217,33 @@ class Bid(models.Model):
         return f"{self.user.username} - ${self.bid_amount} on {self.item.title}"
 
 
+class ProxyBid(models.Model):
+    """
+    Proxy (maximum) bid for an auction item.
+    The server bids on the user's behalf up to max_amount whenever they are outbid.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="proxy_bids")
+    item = models.ForeignKey(AuctionItem, on_delete=models.CASCADE, related_name="proxy_bids")
+    max_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "proxy_bids"
+        ordering = ["-max_amount", "created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'item'], name='unique_proxy_bid_per_user_item'),
+        ]
+        indexes = [
+            models.Index(fields=['item', 'is_active']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - up to ${self.max_amount} on {self.item.title}"
+
+
 class Question(models.Model):
     """
     Question model for auction item Q&A.
@@ -209,6 +257,9 @@ class Question(models.Model):
     class Meta:
         db_table = "questions"
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=['item', '-timestamp']),
+        ]
 
     def __str__(self):
         return f"{self.user.username}: {self.question_text[:50]}"
@@ -254,6 +305,7 @@ class Notification(models.Model):
         db_table = "notifications"
         indexes = [
             models.Index(fields=['user', 'is_read']),
+            models.Index(fields=['user', '-timestamp']),
             models.Index(fields=['-timestamp']),
         ]
     
@@ -261,6 +313,30 @@ class Notification(models.Model):
         return f"{self.user.username} - {self.get_type_display()}"
 
 
+class ArchivedNotification(models.Model):
+    """
+    Read notifications moved out of the notifications table by
+    archive_notifications (api/notification_archive.py), keeping their
+    original id. Only read notifications are archived, so there is no
+    is_read flag.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_notifications")
+    type = models.CharField(max_length=50, choices=Notification.NOTIFICATION_TYPES)
+    message = models.TextField()
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        db_table = "archived_notifications"
+        indexes = [
+            models.Index(fields=['user', '-timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.get_type_display()} (archived)"
+
+
 class ShareAnalytics(models.Model):
     """
     Model to track sharing analytics for auctions
@@ -287,7 +363,9 @@ class ShareAnalytics(models.Model):
     url = models.URLField()
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the share is accepted, which can be a moment before the
+    # buffered event is written (api/share_buffer.py)
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         db_table = "share_analytics"
@@ -299,3 +377,137 @@ class ShareAnalytics(models.Model):
     
     def __str__(self):
         return f"{self.auction.title} - {self.platform} - {self.timestamp}"
+
+
+class ShareDailyRollup(models.Model):
+    """
+    Shares per auction, platform and day, kept in step with ShareAnalytics
+    by api.shares so the analytics endpoints never scan the raw events
+    """
+
+    auction = models.ForeignKey(
+        'AuctionItem',
+        on_delete=models.CASCADE,
+        related_name='share_rollups'
+    )
+    platform = models.CharField(
+        max_length=20,
+        choices=ShareAnalytics.PLATFORM_CHOICES
+    )
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "share_daily_rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['auction', 'platform', 'day'],
+                name='unique_share_rollup_per_auction_platform_day'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.auction_id} - {self.platform} - {self.day}: {self.count}"
+
+
+class ShareSketch(models.Model):
+    """
+    HyperLogLog sketch of the distinct people sharing an auction, one per
+    day plus an all-time sketch with no day (api/shares.py)
+    """
+
+    auction = models.ForeignKey(
+        'AuctionItem',
+        on_delete=models.CASCADE,
+        related_name='share_sketches'
+    )
+    day = models.DateField(null=True, blank=True)
+    registers = models.BinaryField()
+
+    class Meta:
+        db_table = "share_sketches"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['auction', 'day'],
+                condition=models.Q(day__isnull=False),
+                name='unique_share_sketch_per_auction_day'
+            ),
+            models.UniqueConstraint(
+                fields=['auction'],
+                condition=models.Q(day__isnull=True),
+                name='unique_share_sketch_per_auction'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.auction_id} - {self.day or 'all time'}"
+
+
+class SystemStats(models.Model):
+    """
+    Snapshot behind GET /api/system/stats, kept in a single row. Totals are
+    bumped as rows are created; time windows, categories and anything
+    deleted by cascade are recounted by api.system_stats.refresh()
+    """
+
+    users_total = models.IntegerField(default=0)
+    users_new_24h = models.IntegerField(default=0)
+    users_new_7d = models.IntegerField(default=0)
+    auctions_total = models.IntegerField(default=0)
+    auctions_active = models.IntegerField(default=0)
+    auctions_ended = models.IntegerField(default=0)
+    auctions_recent = models.IntegerField(default=0)
+    bids_total = models.IntegerField(default=0)
+    bids_24h = models.IntegerField(default=0)
+    bid_amount_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    questions_total = models.IntegerField(default=0)
+    replies_total = models.IntegerField(default=0)
+    categories = models.JSONField(default=dict)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "system_stats"
+        verbose_name_plural = "system stats"
+
+    def __str__(self):
+        return f"System stats refreshed {self.refreshed_at}"
+
+
+class OutboxMessage(models.Model):
+    """
+    An email or in-app notification written in the same transaction as the
+    change that caused it, and delivered afterwards by the deliver_outbox
+    worker with retries (api/outbox.py)
+    """
+
+    KIND_CHOICES = [
+        ('email', 'Email'),
+        ('notification', 'Notification'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "outbox_messages"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['status', 'sent_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.status})"
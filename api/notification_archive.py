@@ -0,0 +1,71 @@
+"""
+Retention for the notifications table.
+
+Every notification query reads a user's newest rows, so read
+notifications older than NOTIFICATION_RETENTION_DAYS only make the table
+and its indexes bigger. archive() moves them to ArchivedNotification in
+batches: each batch is locked, copied and deleted in one transaction, so
+a notification lives in exactly one of the two tables and concurrent
+archivers skip each other's rows. Unread notifications stay however old
+they are, so the unread counters (api/notification_counts.py) never change.
+The archive_notifications command runs it from cron.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from api.models import ArchivedNotification, Notification
+
+
+def retention_days() -> Optional[int]:
+    return getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 30)
+
+
+def batch_size() -> int:
+    return getattr(settings, 'NOTIFICATION_ARCHIVE_BATCH_SIZE', 1000)
+
+
+def cutoff(days: int) -> datetime:
+    return timezone.now() - timedelta(days=days)
+
+
+def expired(before: datetime) -> QuerySet:
+    """Read notifications created before the cutoff"""
+    return Notification.objects.filter(is_read=True, timestamp__lt=before).order_by()
+
+
+def archive_batch(before: datetime, limit: int) -> int:
+    """Move up to limit expired notifications to the archive; returns how many moved"""
+    with transaction.atomic():
+        batch = list(
+            expired(before)
+            .order_by('id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', 'user_id', 'type', 'message', 'timestamp')[:limit]
+        )
+        if not batch:
+            return 0
+        ArchivedNotification.objects.bulk_create(
+            [
+                ArchivedNotification(id=id, user_id=user_id, type=type, message=message, timestamp=timestamp)
+                for id, user_id, type, message, timestamp in batch
+            ],
+            ignore_conflicts=True,
+        )
+        Notification.objects.filter(id__in=[row[0] for row in batch]).delete()
+    return len(batch)
+
+
+def archive(before: datetime, limit: Optional[int] = None) -> int:
+    """Archive every expired notification, limit rows per transaction"""
+    limit = limit or batch_size()
+    archived = 0
+    while True:
+        moved = archive_batch(before, limit)
+        archived += moved
+        if moved < limit:
+            return archived
@@ -0,0 +1,82 @@
+"""
+Per-user unread notification counters.
+
+User.unread_notifications is changed with F() expressions in the same
+transaction as the notifications it counts: creating notifications adds
+to it, and marking them read subtracts exactly the rows that changed from
+unread to read, so concurrent marks of the same notification count once.
+Unread badges then read one row instead of counting the user's whole
+notification history. reconcile() recounts drifted users from the table
+for anything changed behind these helpers (the admin, raw SQL); the
+reconcile_unread_counts command runs it periodically.
+"""
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from api.models import Notification, User
+
+
+def add(deltas: Dict[int, int]) -> None:
+    """Add to users' counters: one UPDATE per distinct delta, usually one"""
+    by_delta: Dict[int, List[int]] = {}
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(user_id)
+    for delta, user_ids in by_delta.items():
+        User.objects.filter(id__in=user_ids).update(unread_notifications=F('unread_notifications') + delta)
+
+
+def unread(user_ids: Iterable[int]) -> Dict[int, int]:
+    return dict(User.objects.filter(id__in=set(user_ids)).values_list('id', 'unread_notifications'))
+
+
+def unread_count(user_id: int) -> int:
+    return unread([user_id]).get(user_id, 0)
+
+
+def mark_read(user_id: int, notification_id: int) -> bool:
+    """Mark one of the user's notifications read; False if it was not unread"""
+    with transaction.atomic():
+        changed = Notification.objects.filter(id=notification_id, user_id=user_id, is_read=False).update(is_read=True)
+        add({user_id: -changed})
+    return changed > 0
+
+
+def mark_all_read(user_id: int) -> int:
+    """Mark all the user's notifications read; returns how many were unread"""
+    with transaction.atomic():
+        changed = Notification.objects.filter(user_id=user_id, is_read=False).update(is_read=True)
+        add({user_id: -changed})
+    return changed
+
+
+def actual_unread() -> Coalesce:
+    """Each user's unread count from the notifications table"""
+    counts = (
+        Notification.objects
+        .filter(user=OuterRef('pk'), is_read=False)
+        .order_by()
+        .values('user')
+        .annotate(c=Count('id'))
+        .values('c')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def drifted() -> List[int]:
+    """Users whose counter differs from their unread notifications"""
+    return list(
+        User.objects
+        .annotate(actual=actual_unread())
+        .filter(~Q(unread_notifications=F('actual')))
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def reconcile(user_ids: List[int]) -> int:
+    """Recount the given users' counters; returns the number updated"""
+    return User.objects.filter(id__in=user_ids).update(unread_notifications=actual_unread())
@@ -0,0 +1,365 @@
+"""
+Per-auction order book for hot auctions.
+Keeps the current price, leading bidder, bid count and the last few bids for
+an auction in memory (or in the shared Django cache) so bid validation and
+detail reads do not need to query the bids table.
+
+The book is write-through: commit_bid records each bid once its transaction
+has committed, and any other change to an auction invalidates its entry so
+the next read reloads it from the database. Every write also bumps the
+item's generation; a read that missed loads the entry from the database and
+only adds it if the generation is unchanged and no other reader got there
+first, so a load that raced a bid never replaces the newer entry.
+
+The local store only sees its own process's writes: an edit or close in
+another worker is not invalidated here, so a stale ends_at or status can be
+served until the entry's TTL runs out. Use the cache store whenever more
+than one worker serves the site.
+"""
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from api.cache_keys import ORDER_BOOK, ORDER_BOOK_GENERATION, ORDER_BOOK_LOCK
+from api.models import AuctionItem, Bid
+
+Entry = Dict[str, Any]
+
+
+class LocalOrderBookStore:
+    """
+    In-process store. Bounded LRU so only the hottest auctions stay resident.
+    Entries expire after ``ttl`` seconds so bids written by other workers are
+    picked up; use the cache store when several workers take bids.
+    """
+
+    def __init__(self, max_items: int = 1000, ttl: int = 60) -> None:
+        self.max_items = max_items
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Entry]" = OrderedDict()
+        self._expires: Dict[int, float] = {}
+        self._generations: "OrderedDict[int, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, item_id: int) -> Optional[Entry]:
+        with self._lock:
+            entry = self._live(item_id)
+            if entry is not None:
+                self._entries.move_to_end(item_id)
+                return dict(entry)
+            return None
+
+    def set(self, item_id: int, entry: Entry) -> None:
+        with self._lock:
+            self._put(item_id, entry)
+
+    def generation(self, item_id: int) -> int:
+        with self._lock:
+            return self._generations.get(item_id, 0)
+
+    def add(self, item_id: int, entry: Entry, generation: int) -> Entry:
+        with self._lock:
+            resident = self._live(item_id)
+            if resident is not None:
+                return dict(resident)
+            if self._generations.get(item_id, 0) == generation:
+                self._put(item_id, entry)
+            return entry
+
+    def update(self, item_id: int, fn: Callable[[Entry], Optional[Entry]]) -> None:
+        with self._lock:
+            self._bump(item_id)
+            entry = self._live(item_id)
+            if entry is None:
+                return
+            updated = fn(dict(entry))
+            if updated is None:
+                self._drop(item_id)
+            else:
+                self._entries[item_id] = updated
+
+    def delete(self, item_id: int) -> None:
+        with self._lock:
+            self._bump(item_id)
+            self._drop(item_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._expires.clear()
+            self._generations.clear()
+
+    def _live(self, item_id: int) -> Optional[Entry]:
+        entry = self._entries.get(item_id)
+        if entry is not None and self._expires[item_id] <= time.monotonic():
+            self._drop(item_id)
+            return None
+        return entry
+
+    def _drop(self, item_id: int) -> None:
+        self._entries.pop(item_id, None)
+        self._expires.pop(item_id, None)
+
+    def _put(self, item_id: int, entry: Entry) -> None:
+        self._entries[item_id] = entry
+        self._expires[item_id] = time.monotonic() + self.ttl
+        self._entries.move_to_end(item_id)
+        while len(self._entries) > self.max_items:
+            oldest, _ = self._entries.popitem(last=False)
+            self._expires.pop(oldest, None)
+
+    def _bump(self, item_id: int) -> None:
+        self._generations[item_id] = self._generations.get(item_id, 0) + 1
+        self._generations.move_to_end(item_id)
+        # Generations only matter while a load is in flight, so keep the
+        # recently written ones
+        while len(self._generations) > self.max_items * 4:
+            self._generations.popitem(last=False)
+
+
+class CacheOrderBookStore:
+    """
+    Store backed by a Django cache alias so every worker sees the same book.
+    Updates take a short cache lock; if the lock cannot be had the entry is
+    dropped instead, so a contended entry is reloaded rather than left stale.
+    Loaded entries are written with cache.add so they never overwrite one
+    another or an entry a bid has updated.
+    """
+
+    lock_timeout = 5
+    lock_wait = 0.05
+
+    def __init__(self, alias: str = 'default', timeout: int = 60) -> None:
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, item_id: int) -> str:
+        return ORDER_BOOK(item_id)
+
+    def get(self, item_id: int) -> Optional[Entry]:
+        return self.cache.get(self.key(item_id))
+
+    def set(self, item_id: int, entry: Entry) -> None:
+        self.cache.set(self.key(item_id), entry, self.timeout)
+
+    def generation(self, item_id: int) -> int:
+        return self.cache.get(ORDER_BOOK_GENERATION(item_id), 0)
+
+    def add(self, item_id: int, entry: Entry, generation: int) -> Entry:
+        if self.generation(item_id) != generation:
+            return entry
+        key = self.key(item_id)
+        if self.cache.add(key, entry, self.timeout):
+            # a bid may have bumped the generation between the check and
+            # the add; drop what we wrote so the next read reloads it
+            if self.generation(item_id) != generation:
+                self.cache.delete(key)
+            return entry
+        return self.cache.get(key) or entry
+
+    def bump(self, item_id: int) -> None:
+        key = ORDER_BOOK_GENERATION(item_id)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, self.timeout):
+                self.cache.incr(key)
+
+    def update(self, item_id: int, fn: Callable[[Entry], Optional[Entry]]) -> None:
+        self.bump(item_id)
+        key = self.key(item_id)
+        lock_key = ORDER_BOOK_LOCK(item_id)
+        deadline = time.monotonic() + self.lock_wait
+
+        while not self.cache.add(lock_key, 1, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                self.cache.delete(key)
+                return
+            time.sleep(0.005)
+
+        try:
+            entry = self.cache.get(key)
+            if entry is None:
+                return
+            updated = fn(entry)
+            if updated is None:
+                self.cache.delete(key)
+            else:
+                self.cache.set(key, updated, self.timeout)
+        finally:
+            self.cache.delete(lock_key)
+
+    def delete(self, item_id: int) -> None:
+        self.bump(item_id)
+        self.cache.delete(self.key(item_id))
+
+    def clear(self) -> None:
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Return the configured store, or None when the order book is disabled.
+    """
+    global _store
+    backend = getattr(settings, 'ORDER_BOOK_BACKEND', '')
+    if not backend:
+        return None
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                ttl = getattr(settings, 'ORDER_BOOK_TTL', 60)
+                if backend == 'cache':
+                    _store = CacheOrderBookStore(
+                        alias=getattr(settings, 'ORDER_BOOK_CACHE_ALIAS', 'default'),
+                        timeout=ttl,
+                    )
+                else:
+                    _store = LocalOrderBookStore(
+                        max_items=getattr(settings, 'ORDER_BOOK_MAX_ITEMS', 1000),
+                        ttl=ttl,
+                    )
+    return _store
+
+
+def recent_bids_limit() -> int:
+    return getattr(settings, 'ORDER_BOOK_RECENT_BIDS', 10)
+
+
+def bid_to_entry(bid_id: int, user_id: int, bid_amount, timestamp) -> Dict[str, Any]:
+    return {
+        'id': bid_id,
+        'user_id': user_id,
+        'bid_amount': bid_amount,
+        'timestamp': timestamp,
+    }
+
+
+def build_entry(item: AuctionItem) -> Entry:
+    """
+    Build an order book entry for an item from the database.
+    """
+    recent = [
+        bid_to_entry(b['id'], b['user_id'], b['bid_amount'], b['timestamp'])
+        for b in (
+            Bid.objects
+            .filter(item=item)
+            .order_by('-bid_amount', '-timestamp')
+            .values('id', 'user_id', 'bid_amount', 'timestamp')[:recent_bids_limit()]
+        )
+    ]
+
+    return {
+        'item_id': item.id,
+        'owner_id': item.owner_id,
+        'status': item.status,
+        'ends_at': item.ends_at,
+        'current_price': item.current_price,
+        'leader_id': item.leading_bidder_id,
+        'bid_count': item.bid_count,
+        'recent_bids': recent,
+    }
+
+
+def get_entry(item_id: int) -> Optional[Entry]:
+    """
+    Return the cached entry for an item without touching the database.
+    """
+    store = get_store()
+    if store is None:
+        return None
+    return store.get(item_id)
+
+
+def get_or_load(item: AuctionItem) -> Optional[Entry]:
+    """
+    Return the entry for an item, loading it from the database on a miss.
+    The item is re-read after the generation is taken, and the entry is
+    only cached if no bid or invalidation for the item happened meanwhile.
+    """
+    store = get_store()
+    if store is None:
+        return None
+
+    entry = store.get(item.id)
+    if entry is None:
+        generation = store.generation(item.id)
+        try:
+            current = AuctionItem.objects.only(
+                'owner_id', 'status', 'ends_at', 'current_price', 'leading_bidder_id', 'bid_count'
+            ).get(id=item.id)
+        except AuctionItem.DoesNotExist:
+            return None
+        entry = store.add(item.id, build_entry(current), generation)
+    return entry
+
+
+def record_bid(bid: Bid) -> None:
+    """
+    Write a committed bid through to the book. Entries that are not resident
+    are left alone; they are built from the database on the next read.
+    """
+    store = get_store()
+    if store is None:
+        return
+
+    # Match the precision of the DecimalField the bid was stored in
+    amount = Decimal(bid.bid_amount).quantize(Decimal('0.01'))
+
+    def apply(entry: Entry) -> Optional[Entry]:
+        if amount <= entry['current_price']:
+            # A late write; the book already reflects a higher bid.
+            return entry
+        recent: List[Dict[str, Any]] = [
+            bid_to_entry(bid.id, bid.user_id, amount, bid.timestamp)
+        ] + entry['recent_bids']
+        entry['recent_bids'] = recent[:recent_bids_limit()]
+        entry['current_price'] = amount
+        entry['leader_id'] = bid.user_id
+        entry['bid_count'] += 1
+        return entry
+
+    store.update(bid.item_id, apply)
+
+
+def invalidate(item_id: int) -> None:
+    """
+    Drop an item's entry after an edit, delete or close.
+    """
+    store = get_store()
+    if store is not None:
+        store.delete(item_id)
+
+
+def entry_to_dict(entry: Entry) -> Dict[str, Any]:
+    """
+    Serialise the bidding state of an entry for API responses.
+    """
+    return {
+        'current_price': str(entry['current_price']),
+        'bid_count': entry['bid_count'],
+        'leading_bidder_id': entry['leader_id'],
+        'recent_bids': [
+            {
+                'id': b['id'],
+                'user_id': b['user_id'],
+                'bid_amount': str(b['bid_amount']),
+                'timestamp': b['timestamp'].isoformat(),
+            }
+            for b in entry['recent_bids']
+        ],
+    }
@@ -0,0 +1,203 @@
+"""
+Transactional outbox for emails and in-app notifications.
+
+Code that changes state queues its emails and notifications with
+enqueue_email() and enqueue_notification() inside the same transaction,
+so they exist exactly when the change committed and nobody waits on SMTP.
+The deliver_outbox worker drains due messages with deliver(): it leases a
+batch by pushing their next attempt back, sends them outside any
+transaction (emails through a Mailer, api/mailer.py) and marks each sent, or schedules a retry with exponential
+backoff until OUTBOX_MAX_ATTEMPTS is reached and the message is marked
+failed. A worker that dies mid-batch leaves its messages to be picked up
+again once the lease runs out, so delivery is at least once.
+"""
+import logging
+import random
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.mailer import Mailer, TrackedEmail
+from api.models import OutboxMessage, User
+
+logger = logging.getLogger(__name__)
+
+
+def batch_size() -> int:
+    return getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+
+
+def max_attempts() -> int:
+    return getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 8)
+
+
+def retry_base() -> int:
+    return getattr(settings, 'OUTBOX_RETRY_BASE', 30)
+
+
+def retry_max() -> int:
+    return getattr(settings, 'OUTBOX_RETRY_MAX', 3600)
+
+
+def lease() -> int:
+    return getattr(settings, 'OUTBOX_LEASE', 300)
+
+
+def sent_retention_days() -> int:
+    return getattr(settings, 'OUTBOX_SENT_RETENTION_DAYS', 7)
+
+
+def email_message(subject: str, body: str, recipients: List[str], html_body: Optional[str] = None,
+                  from_email: Optional[str] = None) -> OutboxMessage:
+    """An unsaved email message, for callers queueing many with bulk_create"""
+    return OutboxMessage(kind='email', payload={
+        'subject': subject,
+        'body': body,
+        'html_body': html_body,
+        'from_email': from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@auctionsite.com'),
+        'recipients': recipients,
+    })
+
+
+def notification_message(user_id: int, notification_type: str, message: str) -> OutboxMessage:
+    """An unsaved in-app notification message, created and pushed when delivered"""
+    return OutboxMessage(kind='notification', payload={
+        'user_id': user_id,
+        'type': notification_type,
+        'message': message,
+    })
+
+
+def enqueue_email(subject: str, body: str, recipients: List[str], html_body: Optional[str] = None,
+                  from_email: Optional[str] = None) -> OutboxMessage:
+    """Queue an email; it is only delivered if the current transaction commits"""
+    message = email_message(subject, body, recipients, html_body, from_email)
+    message.save()
+    return message
+
+
+def enqueue_notification(user_id: int, notification_type: str, message: str) -> OutboxMessage:
+    """Queue an in-app notification; it is only delivered if the current transaction commits"""
+    queued = notification_message(user_id, notification_type, message)
+    queued.save()
+    return queued
+
+
+def backoff(attempts: int) -> timedelta:
+    """Delay before the next attempt: doubling from OUTBOX_RETRY_BASE, jittered, capped"""
+    delay = min(retry_base() * 2 ** (attempts - 1), retry_max())
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(limit: int) -> List[OutboxMessage]:
+    """
+    Lease up to limit due messages. Locked rows are skipped, so concurrent
+    workers take different messages.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:limit]
+        )
+        if messages:
+            OutboxMessage.objects.filter(id__in=[m.id for m in messages]).update(
+                next_attempt_at=now + timedelta(seconds=lease())
+            )
+    return messages
+
+
+def build_email(payload: Dict[str, Any]) -> TrackedEmail:
+    email = TrackedEmail(
+        subject=payload['subject'],
+        body=payload['body'],
+        from_email=payload['from_email'],
+        to=payload['recipients'],
+    )
+    if payload.get('html_body'):
+        email.attach_alternative(payload['html_body'], 'text/html')
+    return email
+
+
+def send_notifications(messages: List[OutboxMessage]) -> Dict[int, Optional[Exception]]:
+    """
+    Create and push a batch of notification messages together. Recent
+    duplicates are skipped rather than recreated, so a retried delivery
+    does not notify twice.
+    """
+    from api.utils import create_and_send_notifications_bulk
+
+    errors: Dict[int, Optional[Exception]] = {}
+    users = set(User.objects.filter(id__in={m.payload['user_id'] for m in messages}).values_list('id', flat=True))
+    deliverable = []
+    for message in messages:
+        if message.payload['user_id'] in users:
+            deliverable.append(message)
+        else:
+            errors[message.id] = User.DoesNotExist(f"user {message.payload['user_id']} does not exist")
+    try:
+        create_and_send_notifications_bulk(
+            (m.payload['user_id'], m.payload['type'], m.payload['message']) for m in deliverable
+        )
+        errors.update((m.id, None) for m in deliverable)
+    except Exception as e:
+        errors.update((m.id, e) for m in deliverable)
+    return errors
+
+
+def deliver(limit: Optional[int] = None, mailer: Optional[Mailer] = None) -> Dict[str, int]:
+    """
+    Deliver one batch of due messages, the emails through mailer (a Mailer
+    of its own, closed afterwards, if None). Returns counts of messages
+    sent, retried and failed for good.
+    """
+    counts = {'sent': 0, 'retried': 0, 'failed': 0}
+    messages = claim(limit or batch_size())
+    if not messages:
+        return counts
+
+    errors: Dict[int, Optional[Exception]] = {}
+    emails = [message for message in messages if message.kind == 'email']
+    if emails:
+        if mailer is None:
+            with Mailer() as own:
+                results = own.send([build_email(message.payload) for message in emails])
+        else:
+            results = mailer.send([build_email(message.payload) for message in emails])
+        errors.update(zip((message.id for message in emails), results))
+    notifications = [message for message in messages if message.kind == 'notification']
+    if notifications:
+        errors.update(send_notifications(notifications))
+
+    for message in messages:
+        message.attempts += 1
+        error = errors[message.id]
+        if error is None:
+            message.status = 'sent'
+            message.sent_at = timezone.now()
+            counts['sent'] += 1
+        elif message.attempts >= max_attempts():
+            message.last_error = str(error)
+            message.status = 'failed'
+            counts['failed'] += 1
+            logger.error(f"Outbox message {message.id} failed after {message.attempts} attempts: {str(error)}")
+        else:
+            message.last_error = str(error)
+            message.next_attempt_at = timezone.now() + backoff(message.attempts)
+            counts['retried'] += 1
+            logger.warning(f"Outbox message {message.id} attempt {message.attempts} failed: {str(error)}")
+
+    OutboxMessage.objects.bulk_update(messages, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return counts
+
+
+def prune() -> int:
+    """Delete sent messages older than OUTBOX_SENT_RETENTION_DAYS"""
+    cutoff = timezone.now() - timedelta(days=sent_retention_days())
+    deleted, _ = OutboxMessage.objects.filter(status='sent', sent_at__lt=cutoff).delete()
+    return deleted
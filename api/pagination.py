@@ -0,0 +1,111 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A page is read with a range condition on the ordering columns instead of
+OFFSET, so every page costs the same however deep the client has scrolled
+and rows inserted meanwhile never shift or repeat results. The ordering must
+end in a unique column (normally id) to break ties. Cursors are opaque to
+clients: base64 JSON holding the ordering and the last row's values.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not issued for this ordering"""
+
+
+def default_page_size() -> int:
+    return getattr(settings, 'PAGINATION_PAGE_SIZE', 20)
+
+
+def max_page_size() -> int:
+    return getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', 100)
+
+
+def page_size(request: HttpRequest, default: Optional[int] = None, param: str = 'page_size') -> int:
+    """
+    Read the requested page size, falling back to the default and capped at
+    PAGINATION_MAX_PAGE_SIZE.
+    """
+    default = default or default_page_size()
+    try:
+        size = int(request.GET.get(param, default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, max_page_size()))
+
+
+def encode_value(value: Any) -> Any:
+    # isoformat keeps microseconds, which DjangoJSONEncoder would truncate
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(ordering: Sequence[str], values: Sequence[Any]) -> str:
+    payload = json.dumps({'o': list(ordering), 'v': [encode_value(v) for v in values]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, ordering: Sequence[str]) -> List[Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload['v']
+        issued_for = payload['o']
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+        raise InvalidCursor('Invalid cursor')
+
+    if issued_for != list(ordering) or not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def after(ordering: Sequence[str], values: Sequence[Any]) -> Q:
+    """
+    Rows strictly after the given values in the given ordering, i.e. for
+    ('-ends_at', '-id'): ends_at < v0 OR (ends_at = v0 AND id < v1).
+    """
+    condition = Q()
+    for i, key in enumerate(ordering):
+        name = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        for previous, value in zip(ordering[:i], values[:i]):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def paginate(queryset: QuerySet, ordering: Sequence[str], cursor: Optional[str], size: int) -> Tuple[list, Optional[str]]:
+    """
+    Return one page of the queryset in the given ordering and the cursor for
+    the next page (None on the last page). Raises InvalidCursor.
+
+    Ordering names may refer to annotations; filters on aggregates become
+    HAVING clauses as usual.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(after(ordering, decode_cursor(cursor, ordering)))
+
+    # One extra row tells us whether there is a next page without a COUNT
+    rows = list(queryset[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+
+    rows = rows[:size]
+    last = rows[-1]
+    next_cursor = encode_cursor(ordering, [getattr(last, key.lstrip('-')) for key in ordering])
+    return rows, next_cursor
@@ -0,0 +1,135 @@
+"""
+Versioned response cache for auction reads.
+
+Every auction has a version number in the shared cache, and the listing has
+one of its own. Writes (bids, edits, closes, deletes, new auctions) bump the
+versions instead of deleting cached responses; reads look up the serialised
+response under the current version, so a repeat read is two cache gets and
+no ORM access. Responses for old versions are never read again and expire.
+
+Versions start from a nanosecond timestamp rather than 1 so a version key
+evicted from the cache can never come back pointing at an old response.
+"""
+import hashlib
+import time
+from datetime import datetime
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+
+from api.cache_keys import AUCTION_DETAIL, AUCTION_LIST, AUCTION_LIST_VERSION, AUCTION_VERSION
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def max_timeout() -> int:
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def new_version() -> int:
+    return time.time_ns()
+
+
+def current_version(key: str) -> int:
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        version = new_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def item_version(item_id: int) -> int:
+    return current_version(AUCTION_VERSION(item_id))
+
+
+def list_version() -> int:
+    return current_version(AUCTION_LIST_VERSION())
+
+
+def bump_key(key: str) -> None:
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Not cached yet (or evicted): any fresh version will do
+        cache.set(key, new_version(), None)
+
+
+def bump(item_id: int) -> None:
+    """
+    Mark an auction as changed. The listing shows every active auction, so
+    it moves on too.
+    """
+    bump_key(AUCTION_VERSION(item_id))
+    bump_listing()
+
+
+def bump_listing() -> None:
+    """
+    Mark the listing as changed, e.g. when an auction is created.
+    """
+    bump_key(AUCTION_LIST_VERSION())
+
+
+def origin(request: HttpRequest) -> str:
+    """
+    Image URLs are absolute, so responses differ per scheme and host.
+    """
+    return hashlib.sha1(request.build_absolute_uri('/').encode()).hexdigest()[:12]
+
+
+def page_digest(request: HttpRequest) -> str:
+    return hashlib.sha1(
+        f"{request.GET.get('cursor', '')}|{request.GET.get('page_size', '')}".encode()
+    ).hexdigest()[:16]
+
+
+def timeout_for(ends_at: Iterable[datetime]) -> int:
+    """
+    is_active is worked out from the clock, so a response must not outlive
+    the first active auction in it.
+    """
+    now = timezone.now()
+    timeout = max_timeout()
+    for end in ends_at:
+        if end > now:
+            timeout = min(timeout, int((end - now).total_seconds()) + 1)
+    return timeout
+
+
+def cached_response(key: str) -> Optional[HttpResponse]:
+    content = get_cache().get(key)
+    if content is None:
+        return None
+    return HttpResponse(content, content_type='application/json')
+
+
+def get_detail(request: HttpRequest, item_id: int, version: int) -> Optional[HttpResponse]:
+    return cached_response(AUCTION_DETAIL(item_id, version, origin(request)))
+
+
+def set_detail(request: HttpRequest, item_id: int, version: int, response: HttpResponse, ends_at: datetime) -> None:
+    get_cache().set(
+        AUCTION_DETAIL(item_id, version, origin(request)),
+        response.content,
+        timeout_for([ends_at]),
+    )
+
+
+def get_list(request: HttpRequest, version: int) -> Optional[HttpResponse]:
+    return cached_response(AUCTION_LIST(version, page_digest(request), origin(request)))
+
+
+def set_list(request: HttpRequest, version: int, response: HttpResponse, ends_at: Iterable[datetime]) -> None:
+    get_cache().set(
+        AUCTION_LIST(version, page_digest(request), origin(request)),
+        response.content,
+        timeout_for(ends_at),
+    )
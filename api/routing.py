@@ -3,4 +3,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
+    re_path(r'ws/auctions/(?P<item_id>\d+)/$', consumers.AuctionConsumer.as_asgi()),
 ]
@@ -0,0 +1,106 @@
+"""
+Deadline queue for the auction-closing daemon (run_auction_scheduler).
+
+The daemon keeps the auctions ending within its horizon in a min-heap
+keyed by ends_at and sleeps until the first one is due. Saving or deleting
+an auction publishes its new deadline to the scheduler channel group once
+the transaction commits, so the daemon updates the heap without
+rescanning the table. It still rereads its window now and then, to pick
+up auctions moving into the horizon and anything a message missed.
+"""
+import heapq
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.models import AuctionItem
+
+logger = logging.getLogger(__name__)
+
+# Channel group the daemon listens on for schedule changes
+GROUP = 'auction_scheduler'
+
+
+class DeadlineQueue:
+    """
+    Min-heap of (ends_at, item_id). Rescheduling or discarding an auction
+    leaves its old entry in the heap; entries that no longer match the
+    auction's current deadline are skipped when they reach the top.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, datetime]] = ()):
+        self.deadlines: Dict[int, datetime] = dict(entries)
+        self.heap = [(ends_at, item_id) for item_id, ends_at in self.deadlines.items()]
+        heapq.heapify(self.heap)
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+    def schedule(self, item_id: int, ends_at: datetime) -> None:
+        if self.deadlines.get(item_id) == ends_at:
+            return
+        self.deadlines[item_id] = ends_at
+        heapq.heappush(self.heap, (ends_at, item_id))
+
+    def discard(self, item_id: int) -> None:
+        self.deadlines.pop(item_id, None)
+
+    def prune(self) -> None:
+        while self.heap and self.deadlines.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    def next_deadline(self) -> Optional[datetime]:
+        self.prune()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now: datetime) -> List[int]:
+        """Remove and return every auction whose deadline has passed"""
+        due = []
+        while True:
+            self.prune()
+            if not self.heap or self.heap[0][0] > now:
+                return due
+            _, item_id = heapq.heappop(self.heap)
+            del self.deadlines[item_id]
+            due.append(item_id)
+
+
+def publish(item_id: int, ends_at: Optional[datetime]) -> None:
+    """
+    Tell the daemon an auction's deadline changed. None means it no
+    longer needs closing (closed or deleted).
+    """
+    try:
+        channel_layer = get_channel_layer()
+
+        async_to_sync(channel_layer.group_send)(
+            GROUP,
+            {
+                'type': 'auction_schedule',
+                'item_id': item_id,
+                'ends_at': ends_at.isoformat() if ends_at else None,
+            }
+        )
+    except Exception:
+        logger.exception("Could not publish schedule change for auction %s", item_id)
+
+
+@receiver(post_save, sender=AuctionItem)
+def schedule_auction(sender, instance: AuctionItem, update_fields=None, **kwargs) -> None:
+    if update_fields is not None and not {'ends_at', 'status'} & set(update_fields):
+        return
+    item_id = instance.id
+    ends_at = instance.ends_at if instance.status == 'active' else None
+    transaction.on_commit(lambda: publish(item_id, ends_at))
+
+
+@receiver(post_delete, sender=AuctionItem)
+def unschedule_auction(sender, instance: AuctionItem, **kwargs) -> None:
+    item_id = instance.id
+    transaction.on_commit(lambda: publish(item_id, None))
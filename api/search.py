@@ -0,0 +1,199 @@
+"""
+Full-text search backends for auction search.
+
+PostgreSQL uses a generated tsvector column with a GIN index and orders by
+ts_rank. SQLite (development) uses an FTS5 table kept in step from model
+signals and orders by bm25. Any other database falls back to the original
+icontains filter. Every backend annotates matching rows with search_rank,
+where a higher value is a better match.
+"""
+import re
+from typing import List
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, IntegerField, Q, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.models import AuctionItem
+
+FTS_TABLE = 'auction_items_fts'
+SEARCH_CONFIG = 'english'
+
+
+def tokenize(query: str) -> List[str]:
+    """
+    Split a user query into plain word tokens, dropping any search syntax.
+    """
+    return re.findall(r'\w+', query.lower())
+
+
+def no_matches(queryset: QuerySet) -> QuerySet:
+    """
+    An empty result for a query with no words, still annotated with
+    search_rank so callers can order by it.
+    """
+    return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class BasicSearchBackend:
+    """
+    Substring search with the original exact/prefix title heuristic.
+    Used on databases without a full-text index.
+    """
+
+    name = 'basic'
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        return queryset.filter(
+            Q(title__icontains=query) | Q(description__icontains=query)
+        ).annotate(
+            search_rank=Case(
+                When(title__iexact=query, then=Value(2)),
+                When(title__istartswith=query, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+
+
+class PostgresSearchBackend:
+    """
+    tsvector search. Every token is matched as a prefix so the live search
+    box finds results while the user is still typing.
+    """
+
+    name = 'postgres'
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        tokens = tokenize(query)
+        if not tokens:
+            return no_matches(queryset)
+
+        tsquery = ' & '.join(f"{token}:*" for token in tokens)
+        table = AuctionItem._meta.db_table
+        return queryset.annotate(
+            search_match=RawSQL(
+                f"{table}.search_vector @@ to_tsquery(%s, %s)",
+                [SEARCH_CONFIG, tsquery],
+                output_field=BooleanField(),
+            ),
+            search_rank=RawSQL(
+                f"ts_rank({table}.search_vector, to_tsquery(%s, %s))",
+                [SEARCH_CONFIG, tsquery],
+                output_field=FloatField(),
+            ),
+        ).filter(search_match=True)
+
+
+class SqliteFtsSearchBackend:
+    """
+    FTS5 search. Titles are weighted ten times higher than descriptions.
+    """
+
+    name = 'sqlite_fts'
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        tokens = tokenize(query)
+        if not tokens:
+            return no_matches(queryset)
+
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        table = AuctionItem._meta.db_table
+        # Joined rather than correlated so bm25 is computed once per match;
+        # an annotation (not extra select) so cursor pagination can filter on it
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {table}.id", f"{FTS_TABLE} MATCH %s"],
+            params=[match],
+        ).annotate(
+            search_rank=RawSQL(f"-bm25({FTS_TABLE}, 10.0, 1.0)", [], output_field=FloatField())
+        )
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (BasicSearchBackend, PostgresSearchBackend, SqliteFtsSearchBackend)
+}
+
+
+def get_backend():
+    """
+    Return the configured backend. 'auto' picks one from the database vendor.
+    """
+    name = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        name = {
+            'postgresql': PostgresSearchBackend.name,
+            'sqlite': SqliteFtsSearchBackend.name,
+        }.get(connection.vendor, BasicSearchBackend.name)
+    return BACKENDS[name]()
+
+
+def install(schema_connection) -> None:
+    """
+    Create the full-text index for the current database and fill it.
+    Safe to run more than once.
+    """
+    table = AuctionItem._meta.db_table
+    with schema_connection.cursor() as cursor:
+        if schema_connection.vendor == 'postgresql':
+            cursor.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ("
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+                f") STORED"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_search_vector_gin "
+                f"ON {table} USING GIN (search_vector)"
+            )
+        elif schema_connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, description)"
+            )
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+                f"SELECT id, title, description FROM {table}"
+            )
+
+
+def uninstall(schema_connection) -> None:
+    table = AuctionItem._meta.db_table
+    with schema_connection.cursor() as cursor:
+        if schema_connection.vendor == 'postgresql':
+            cursor.execute(f"DROP INDEX IF EXISTS {table}_search_vector_gin")
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+        elif schema_connection.vendor == 'sqlite':
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+@receiver(post_save, sender=AuctionItem)
+def index_auction(sender, instance: AuctionItem, update_fields=None, **kwargs) -> None:
+    """
+    Keep the SQLite FTS table in step. PostgreSQL's generated column needs no help.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [instance.id])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (%s, %s, %s)",
+            [instance.id, instance.title, instance.description],
+        )
+
+
+@receiver(post_delete, sender=AuctionItem)
+def unindex_auction(sender, instance: AuctionItem, **kwargs) -> None:
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [instance.id])
@@ -0,0 +1,377 @@
+"""
+Buffered ingestion of share events.
+
+track_share hands events to a per-process ShareBuffer instead of writing
+them itself. Each event is appended to the process's spill file before it
+is acknowledged, then written with bulk_create, together with its rollup
+counts, once SHARE_BUFFER_SIZE events are waiting or the oldest has waited
+SHARE_BUFFER_MAX_AGE seconds. A background thread does the writing, so
+requests never wait on the database.
+
+A flush renames the spill file aside and deletes it once the batch has
+committed. If a process dies, its spill files are replayed by the next
+process on the host to start buffering, or by the recover_share_buffer
+command. Delivery is at least once: a crash between the commit and the
+delete replays that batch. Spill writes are flushed to the OS, which
+covers a crashed process; only with SHARE_BUFFER_FSYNC are they also
+fsynced before the event is acknowledged, which covers a crashed host at
+the cost of a disk sync per share. A batch that still fails after
+SHARE_BUFFER_MAX_ATTEMPTS flushes is moved to the failed/ subdirectory
+of the spill directory, out of reach of retries and recovery, for
+someone to inspect.
+"""
+import atexit
+import ipaddress
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api import shares
+from api.models import AuctionItem, ShareAnalytics
+
+logger = logging.getLogger(__name__)
+
+PLATFORMS = {choice for choice, _ in ShareAnalytics.PLATFORM_CHOICES}
+# ShareAnalytics.url is a URLField with the default max_length
+MAX_URL_LENGTH = 200
+
+
+class InvalidShare(ValueError):
+    """Raised for a share event that fails validation"""
+
+
+def buffer_size() -> int:
+    return getattr(settings, 'SHARE_BUFFER_SIZE', 500)
+
+
+def max_age() -> float:
+    return getattr(settings, 'SHARE_BUFFER_MAX_AGE', 5)
+
+
+def max_attempts() -> int:
+    return getattr(settings, 'SHARE_BUFFER_MAX_ATTEMPTS', 5)
+
+
+def fsync_spills() -> bool:
+    return getattr(settings, 'SHARE_BUFFER_FSYNC', False)
+
+
+def spill_dir() -> Path:
+    return Path(getattr(settings, 'SHARE_BUFFER_DIR', Path(settings.BASE_DIR) / 'logs' / 'share_buffer'))
+
+
+def spill_prefix(pid: Optional[int] = None) -> str:
+    return f"shares-{socket.gethostname()}-{pid or os.getpid()}"
+
+
+def validate(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check an event without touching the database. Unknown auctions are
+    dropped when the batch is written.
+    """
+    auction_id = data.get('auction_id')
+    platform = data.get('platform')
+    url = data.get('url')
+
+    if not all([auction_id, platform, url]):
+        raise InvalidShare('Missing required fields')
+    try:
+        auction_id = int(auction_id)
+    except (TypeError, ValueError):
+        raise InvalidShare('Invalid auction_id')
+    if auction_id < 1:
+        raise InvalidShare('Invalid auction_id')
+    if platform not in PLATFORMS:
+        raise InvalidShare('Invalid platform')
+    if not isinstance(url, str) or len(url) > MAX_URL_LENGTH or not url.startswith(('http://', 'https://')):
+        raise InvalidShare('Invalid url')
+
+    return {'auction_id': auction_id, 'platform': platform, 'url': url}
+
+
+def clean_ip(value: Optional[str]) -> Optional[str]:
+    """
+    The address in canonical form, or None if it is not an IP address. It
+    comes from X-Forwarded-For, and one bad value would fail the batch's
+    insert into the inet column on PostgreSQL.
+    """
+    if not value:
+        return None
+    try:
+        return str(ipaddress.ip_address(value.strip()))
+    except ValueError:
+        return None
+
+
+def write(events: List[Dict[str, Any]]) -> int:
+    """
+    Insert a batch of events and add them to the daily rollups and sharer
+    sketches in one transaction. Returns the number of events stored.
+    """
+    known = set(
+        AuctionItem.objects
+        .filter(id__in={e['auction_id'] for e in events})
+        .values_list('id', flat=True)
+    )
+    rows = []
+    for event in events:
+        if event['auction_id'] not in known:
+            continue
+        rows.append(ShareAnalytics(
+            auction_id=event['auction_id'],
+            platform=event['platform'],
+            url=event['url'],
+            ip_address=clean_ip(event.get('ip_address')),
+            user_agent=event.get('user_agent', ''),
+            timestamp=parse_datetime(event['timestamp']),
+        ))
+    if len(rows) < len(events):
+        logger.info("Dropped %d share event(s) for unknown auctions", len(events) - len(rows))
+    if not rows:
+        return 0
+
+    counts: Counter = Counter()
+    sharers: Dict[Tuple[int, date], Set[int]] = defaultdict(set)
+    for row in rows:
+        day = shares.day_of(row.timestamp)
+        counts[(row.auction_id, row.platform, day)] += 1
+        sharers[(row.auction_id, day)].add(shares.sharer_hash(row.ip_address, row.user_agent))
+
+    with transaction.atomic():
+        ShareAnalytics.objects.bulk_create(rows, batch_size=1000)
+        for (auction_id, platform, day), count in counts.items():
+            shares.record(auction_id, platform, day, count)
+        for (auction_id, day), hashes in sharers.items():
+            shares.record_sharers(auction_id, day, hashes)
+    return len(rows)
+
+
+def read_spill(path: Path) -> List[Dict[str, Any]]:
+    events = []
+    with open(path, encoding='utf-8') as spill:
+        for line in spill:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A line cut short by the crash was never acknowledged
+                continue
+    return events
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def orphaned_spills(directory: Path) -> List[Path]:
+    """Spill files on this host whose process has exited"""
+    prefix = f"shares-{socket.gethostname()}-"
+    orphans = []
+    for path in sorted(directory.glob(prefix + '*')):
+        pid = path.name[len(prefix):].split('.', 1)[0]
+        if pid.isdigit() and (int(pid) == os.getpid() or not pid_alive(int(pid))):
+            orphans.append(path)
+    return orphans
+
+
+def quarantine(path: Path) -> Path:
+    """Move a batch that keeps failing to the failed/ subdirectory"""
+    target = path.parent / 'failed' / path.name
+    target.parent.mkdir(exist_ok=True)
+    os.replace(path, target)
+    return target
+
+
+def claim(path: Path) -> Optional[Path]:
+    """Rename an orphaned spill file to a name this process owns; None if another got it"""
+    prefix = spill_prefix()
+    if path.name.startswith(prefix + '.'):
+        return path
+    claimed = path.with_name(f"{prefix}.recovering.{path.name}")
+    try:
+        os.rename(path, claimed)
+    except FileNotFoundError:
+        return None
+    return claimed
+
+
+def recover(directory: Optional[Path] = None) -> int:
+    """
+    Replay spill files left behind by dead processes on this host. Returns
+    the number of events stored.
+
+    Each file is first claimed by renaming it under this process's own
+    prefix; workers starting together race for the rename, and only the
+    one that wins replays the file.
+    """
+    directory = directory or spill_dir()
+    if not directory.is_dir():
+        return 0
+    stored = 0
+    for path in orphaned_spills(directory):
+        claimed = claim(path)
+        if claimed is None:
+            continue
+        events = read_spill(claimed)
+        if events:
+            stored += write(events)
+        claimed.unlink()
+    return stored
+
+
+class ShareBuffer:
+    """In-memory batch of share events backed by an append-only spill file"""
+
+    def __init__(self, directory: Path, size: int, age: float, fsync: bool = False):
+        self.directory = directory
+        self.size = size
+        self.age = age
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.events: List[Dict[str, Any]] = []
+        self.oldest: Optional[float] = None
+        self.spill = None
+        self.batch = 0
+        # Batches waiting to be retried, with the attempts made so far
+        self.failed: Dict[Path, int] = {}
+        self.flusher: Optional[threading.Thread] = None
+
+    @property
+    def spill_path(self) -> Path:
+        return self.directory / f"{spill_prefix()}.jsonl"
+
+    def start(self) -> None:
+        # Replay what dead processes left behind before opening a spill file
+        # of our own, which recovery would otherwise claim
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            recovered = recover(self.directory)
+            if recovered:
+                logger.info("Recovered %d buffered share event(s)", recovered)
+        except Exception:
+            logger.exception("Could not recover buffered share events")
+        self.flusher = threading.Thread(target=self.run, name='share-buffer', daemon=True)
+        self.flusher.start()
+        atexit.register(self.flush)
+
+    def add(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, separators=(',', ':')) + '\n'
+        with self.lock:
+            if self.spill is None:
+                self.spill = open(self.spill_path, 'a', encoding='utf-8')
+            self.spill.write(line)
+            self.spill.flush()
+            if self.fsync:
+                os.fsync(self.spill.fileno())
+            self.events.append(event)
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+            full = len(self.events) >= self.size
+        if full:
+            self.wake.set()
+
+    def due(self) -> bool:
+        with self.lock:
+            return bool(self.events) and (
+                len(self.events) >= self.size or time.monotonic() - self.oldest >= self.age
+            )
+
+    def run(self) -> None:
+        while True:
+            self.wake.wait(self.age)
+            self.wake.clear()
+            if self.due():
+                try:
+                    self.flush()
+                finally:
+                    connections.close_all()
+
+    def take(self) -> Optional[Path]:
+        """Swap out the pending events' spill file, ready to be written"""
+        with self.lock:
+            if not self.events:
+                return None
+            self.spill.close()
+            self.spill = None
+            self.batch += 1
+            path = self.spill_path.with_suffix(f'.{self.batch}.flushing')
+            os.replace(self.spill_path, path)
+            self.events = []
+            self.oldest = None
+        return path
+
+    def flush(self) -> None:
+        """
+        Write everything pending, retrying earlier batches that failed and
+        quarantining those that have failed SHARE_BUFFER_MAX_ATTEMPTS times
+        """
+        with self.flush_lock:
+            path = self.take()
+            pending = list(self.failed.items()) + ([(path, 0)] if path else [])
+            self.failed = {}
+            for batch, attempts in pending:
+                try:
+                    write(read_spill(batch))
+                except Exception:
+                    attempts += 1
+                    if attempts < max_attempts():
+                        logger.exception("Could not write buffered share events, will retry")
+                        self.failed[batch] = attempts
+                    else:
+                        logger.exception(
+                            "Could not write buffered share events after %d attempts, moved to %s",
+                            attempts, quarantine(batch),
+                        )
+                else:
+                    batch.unlink()
+
+
+_buffer: Optional[ShareBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> ShareBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                buffer = ShareBuffer(spill_dir(), buffer_size(), max_age(), fsync_spills())
+                buffer.start()
+                _buffer = buffer
+    return _buffer
+
+
+def accept(data: Dict[str, Any], ip_address: Optional[str], user_agent: str) -> None:
+    """
+    Validate a share and queue it. With SHARE_BUFFER_SIZE set to 0 the
+    event is written straight away instead.
+    """
+    event = validate(data)
+    event.update(
+        ip_address=clean_ip(ip_address),
+        user_agent=user_agent,
+        timestamp=timezone.now().isoformat(),
+    )
+    if buffer_size() <= 0:
+        write([event])
+    else:
+        get_buffer().add(event)
@@ -0,0 +1,252 @@
+"""
+Daily share rollups and unique-sharer sketches.
+
+Every tracked share adds one to its (auction, platform, day) row in
+ShareDailyRollup, so analytics read a few hundred small rows instead of
+counting raw ShareAnalytics events. The sharer (IP address and user agent)
+goes into HyperLogLog sketches for the auction's day and for all time, so
+distinct sharers are estimated without a distinct scan. The
+compact_share_rollups command rebuilds recent days from the raw events and
+prunes events past the retention window; older days live on only in the
+rollups and sketches.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from api.hyperloglog import HyperLogLog, hash_value
+from api.models import ShareAnalytics, ShareDailyRollup, ShareSketch
+
+
+def raw_retention_days() -> Optional[int]:
+    return getattr(settings, 'SHARE_RAW_RETENTION_DAYS', 90)
+
+
+def day_of(moment: datetime) -> date:
+    # Same day boundary as TruncDate in rebuild()
+    return timezone.localdate(moment)
+
+
+def record(auction_id: int, platform: str, day: date, count: int = 1) -> None:
+    """
+    Add count shares to a rollup row, creating it on the first share of the
+    day. A concurrent first share loses the insert race and retries as an
+    update.
+    """
+    rollup = ShareDailyRollup.objects.filter(auction_id=auction_id, platform=platform, day=day)
+    if rollup.update(count=F('count') + count):
+        return
+    try:
+        with transaction.atomic():
+            ShareDailyRollup.objects.create(auction_id=auction_id, platform=platform, day=day, count=count)
+    except IntegrityError:
+        rollup.update(count=F('count') + count)
+
+
+def sharer_hash(ip_address: Optional[str], user_agent: Optional[str]) -> int:
+    """Who shared, as far as an anonymous click can tell"""
+    return hash_value(f"{ip_address or ''}|{user_agent or ''}")
+
+
+def merge_sketch(auction_id: int, day: Optional[date], sketch: HyperLogLog) -> None:
+    """
+    Fold a sketch into the stored one for the auction and day (None for all
+    time), locking the row while its registers are rewritten.
+    """
+    with transaction.atomic():
+        stored = ShareSketch.objects.select_for_update().filter(auction_id=auction_id, day=day).first()
+        if stored is None:
+            try:
+                with transaction.atomic():
+                    ShareSketch.objects.create(auction_id=auction_id, day=day, registers=sketch.to_bytes())
+                return
+            except IntegrityError:
+                stored = ShareSketch.objects.select_for_update().get(auction_id=auction_id, day=day)
+        merged = HyperLogLog.from_bytes(bytes(stored.registers))
+        merged.merge(sketch)
+        stored.registers = merged.to_bytes()
+        stored.save(update_fields=['registers'])
+
+
+def record_sharers(auction_id: int, day: date, hashes: Iterable[int]) -> None:
+    """Add sharers to the auction's sketches for the day and for all time"""
+    sketch = HyperLogLog()
+    sketch.update(hashes)
+    merge_sketch(auction_id, day, sketch)
+    merge_sketch(auction_id, None, sketch)
+
+
+def daily_sketches(events: Iterable[Tuple[int, datetime, Optional[str], Optional[str]]]) -> Iterator[Tuple[int, Dict[date, HyperLogLog]]]:
+    """
+    Group (auction_id, timestamp, ip_address, user_agent) rows, sorted by
+    auction, into one sketch per day, yielding each auction's sketches as
+    soon as its rows are done.
+    """
+    current: Optional[int] = None
+    days: Dict[date, HyperLogLog] = {}
+    for auction_id, timestamp, ip_address, user_agent in events:
+        if auction_id != current:
+            if days:
+                yield current, days
+            current, days = auction_id, {}
+        day = day_of(timestamp)
+        if day not in days:
+            days[day] = HyperLogLog()
+        days[day].add_hash(sharer_hash(ip_address, user_agent))
+    if days:
+        yield current, days
+
+
+def rebuild_sketches(since: date, start: datetime) -> int:
+    """
+    Recount day sketches from since onwards from the raw events, then
+    remerge the all-time sketch of every auction touched. Returns the number
+    of day sketches written.
+    """
+    events = (
+        ShareAnalytics.objects
+        .filter(timestamp__gte=start)
+        .order_by('auction_id', 'timestamp')
+        .values_list('auction_id', 'timestamp', 'ip_address', 'user_agent')
+        .iterator(chunk_size=2000)
+    )
+    touched: Set[int] = set(
+        ShareSketch.objects.filter(day__gte=since).values_list('auction_id', flat=True).distinct()
+    )
+    ShareSketch.objects.filter(day__gte=since).delete()
+
+    written = 0
+    for auction_id, days in daily_sketches(events):
+        ShareSketch.objects.bulk_create([
+            ShareSketch(auction_id=auction_id, day=day, registers=sketch.to_bytes())
+            for day, sketch in days.items()
+        ])
+        touched.add(auction_id)
+        written += len(days)
+
+    ShareSketch.objects.filter(auction_id__in=touched, day__isnull=True).delete()
+    all_time: Dict[int, HyperLogLog] = {}
+    stored = (
+        ShareSketch.objects
+        .filter(auction_id__in=touched, day__isnull=False)
+        .values_list('auction_id', 'registers')
+        .iterator(chunk_size=500)
+    )
+    for auction_id, registers in stored:
+        sketch = HyperLogLog.from_bytes(bytes(registers))
+        if auction_id in all_time:
+            all_time[auction_id].merge(sketch)
+        else:
+            all_time[auction_id] = sketch
+    ShareSketch.objects.bulk_create(
+        [
+            ShareSketch(auction_id=auction_id, day=None, registers=sketch.to_bytes())
+            for auction_id, sketch in all_time.items()
+        ],
+        batch_size=500,
+    )
+    return written
+
+
+def rebuild(since: date) -> int:
+    """
+    Recount every rollup from since onwards from the raw events, with one
+    grouped query, and the sharer sketches with them. Returns the number of
+    rollup rows written.
+    """
+    start = timezone.make_aware(datetime.combine(since, datetime.min.time()))
+    counts = (
+        ShareAnalytics.objects
+        .filter(timestamp__gte=start)
+        .annotate(day=TruncDate('timestamp'))
+        .order_by()
+        .values('auction_id', 'platform', 'day')
+        .annotate(count=Count('id'))
+    )
+    with transaction.atomic():
+        ShareDailyRollup.objects.filter(day__gte=since).delete()
+        rollups = ShareDailyRollup.objects.bulk_create(
+            [ShareDailyRollup(**row) for row in counts],
+            batch_size=1000,
+        )
+        rebuild_sketches(since, start)
+    return len(rollups)
+
+
+def totals(rows: List[Tuple[str, date, int]], today: date) -> Dict:
+    """
+    Summaries from (platform, day, count) rows: the total, the last seven
+    days, counts per platform and a 30-day series ending today.
+    """
+    by_platform: Dict[str, int] = {}
+    by_day: Dict[date, int] = {}
+    for platform, day, count in rows:
+        by_platform[platform] = by_platform.get(platform, 0) + count
+        by_day[day] = by_day.get(day, 0) + count
+
+    week_start = today - timedelta(days=6)
+    return {
+        'total': sum(by_platform.values()),
+        'recent': sum(count for day, count in by_day.items() if week_start <= day <= today),
+        'platforms': [
+            {'platform': platform, 'count': count}
+            for platform, count in sorted(by_platform.items(), key=lambda p: -p[1])
+        ],
+        'series': [
+            {
+                'date': (today - timedelta(days=n)).strftime('%Y-%m-%d'),
+                'shares': by_day.get(today - timedelta(days=n), 0),
+            }
+            for n in range(29, -1, -1)
+        ],
+    }
+
+
+def unique_sharers(auction_id: int) -> int:
+    """Estimated distinct sharers of the auction, from its all-time sketch"""
+    registers = (
+        ShareSketch.objects
+        .filter(auction_id=auction_id, day__isnull=True)
+        .values_list('registers', flat=True)
+        .first()
+    )
+    if registers is None:
+        return 0
+    return HyperLogLog.from_bytes(bytes(registers)).count()
+
+
+def auction_summary(auction_id: int) -> Dict:
+    """
+    Share summaries for one auction: one query over its rollup rows and one
+    for its sharer sketch.
+    """
+    rows = ShareDailyRollup.objects.filter(auction_id=auction_id).values_list('platform', 'day', 'count')
+    summary = totals(list(rows), timezone.localdate())
+    summary['unique'] = unique_sharers(auction_id)
+    return summary
+
+
+def global_summary(top: int = 10) -> Dict:
+    """
+    Share summaries across every auction, summed per platform and day in
+    the database, plus the most shared auctions.
+    """
+    rows = (
+        ShareDailyRollup.objects
+        .order_by()
+        .values_list('platform', 'day')
+        .annotate(count=Sum('count'))
+    )
+    summary = totals(list(rows), timezone.localdate())
+    summary['top_auctions'] = list(
+        ShareDailyRollup.objects
+        .values('auction__id', 'auction__title')
+        .annotate(share_count=Sum('count'))
+        .order_by('-share_count')[:top]
+    )
+    return summary
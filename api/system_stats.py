@@ -0,0 +1,155 @@
+"""
+Materialised statistics for GET /api/system/stats.
+
+The endpoint reads one SystemStats row instead of counting every table on
+each call. Users, bids, questions and replies are only counted by
+refresh(): bumping the single stats row on each of them would put one
+site-wide hot row on the bid and signup paths. Auctions, which are
+created far less often, are counted once the creating transaction
+commits, and the auction delete view takes them out with
+forget_auction(). There are no delete signals: bulk_create never counts
+rows, so decrementing on delete would drive totals negative, and a
+post_delete receiver turns off Django's fast delete for every cascade.
+Other deletes and bulk writes are left to refresh(). It recounts
+everything with one aggregate per table and one grouped query for the
+categories, which also ages out the 24-hour and 7-day windows and moves
+auctions from active to ended. It runs from the refresh_system_stats
+command and, when the snapshot is older than SYSTEM_STATS_MAX_AGE, on the
+next read; commands that bulk create or delete call it when they finish.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.models import AuctionItem, Bid, Question, Reply, SystemStats, User
+
+# The snapshot is always the row with this primary key
+SNAPSHOT_ID = 1
+
+
+def max_age() -> int:
+    return getattr(settings, 'SYSTEM_STATS_MAX_AGE', 300)
+
+
+def refresh() -> SystemStats:
+    """Recount the snapshot from the tables"""
+    now = timezone.now()
+    last_24h = now - timedelta(hours=24)
+    last_7d = now - timedelta(days=7)
+
+    users = User.objects.aggregate(
+        total=Count('id'),
+        new_24h=Count('id', filter=Q(date_joined__gte=last_24h)),
+        new_7d=Count('id', filter=Q(date_joined__gte=last_7d)),
+    )
+    auctions = AuctionItem.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(ends_at__gt=now)),
+        recent=Count('id', filter=Q(created_at__gte=last_24h)),
+    )
+    bids = Bid.objects.aggregate(
+        total=Count('id'),
+        last_24h=Count('id', filter=Q(timestamp__gte=last_24h)),
+        amount=Sum('bid_amount'),
+    )
+    categories = dict(
+        AuctionItem.objects
+        .order_by()
+        .values_list('category')
+        .annotate(count=Count('id'))
+    )
+
+    stats, _ = SystemStats.objects.update_or_create(
+        pk=SNAPSHOT_ID,
+        defaults={
+            'users_total': users['total'],
+            'users_new_24h': users['new_24h'],
+            'users_new_7d': users['new_7d'],
+            'auctions_total': auctions['total'],
+            'auctions_active': auctions['active'],
+            'auctions_ended': auctions['total'] - auctions['active'],
+            'auctions_recent': auctions['recent'],
+            'bids_total': bids['total'],
+            'bids_24h': bids['last_24h'],
+            'bid_amount_total': bids['amount'] or Decimal('0'),
+            'questions_total': Question.objects.count(),
+            'replies_total': Reply.objects.count(),
+            'categories': categories,
+            'refreshed_at': now,
+        },
+    )
+    return stats
+
+
+def snapshot() -> SystemStats:
+    """The current snapshot, refreshed first if it is missing or too old"""
+    stats = SystemStats.objects.filter(pk=SNAPSHOT_ID).first()
+    if stats is None or stats.refreshed_at < timezone.now() - timedelta(seconds=max_age()):
+        stats = refresh()
+    return stats
+
+
+def as_dict(stats: SystemStats) -> Dict[str, Any]:
+    average = stats.bid_amount_total / stats.bids_total if stats.bids_total > 0 else 0
+    return {
+        'users': {
+            'total': stats.users_total,
+            'new_24h': stats.users_new_24h,
+            'new_7d': stats.users_new_7d
+        },
+        'auctions': {
+            'total': stats.auctions_total,
+            'active': stats.auctions_active,
+            'ended': stats.auctions_ended,
+            'recent': stats.auctions_recent
+        },
+        'bids': {
+            'total': stats.bids_total,
+            'last_24h': stats.bids_24h,
+            'average_amount': float(average)
+        },
+        'qa': {
+            'total_questions': stats.questions_total,
+            'total_replies': stats.replies_total
+        },
+        'categories': {category: count for category, count in stats.categories.items() if count > 0},
+        'refreshed_at': stats.refreshed_at.isoformat(),
+    }
+
+
+def bump(**deltas: Any) -> None:
+    """
+    Add to snapshot counters after the current transaction commits, so the
+    single stats row is never locked for the length of the transaction.
+    Counters never go below zero.
+    """
+    updates = {
+        field: F(field) + delta if delta >= 0 else Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    }
+    transaction.on_commit(lambda: SystemStats.objects.filter(pk=SNAPSHOT_ID).update(**updates))
+
+
+@receiver(post_save, sender=AuctionItem)
+def count_auction(sender, instance: AuctionItem, created: bool, **kwargs) -> None:
+    if created:
+        state = 'auctions_active' if instance.ends_at > timezone.now() else 'auctions_ended'
+        bump(auctions_total=1, auctions_recent=1, **{state: 1})
+
+
+def forget_auction(item: AuctionItem) -> None:
+    """Take a deleted auction out of the counters it was counted in"""
+    now = timezone.now()
+    deltas = {'auctions_total': -1}
+    deltas['auctions_active' if item.ends_at > now else 'auctions_ended'] = -1
+    if item.created_at >= now - timedelta(hours=24):
+        deltas['auctions_recent'] = -1
+    bump(**deltas)
@@ -1,3 +1,1160 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import json
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from api import (
+    email_rendering, exports, notification_counts, order_book, outbox, pagination, response_cache,
+    share_buffer, shares, system_stats,
+)
+from api.bidding import BidRejected, commit_bid, commit_proxy_bid
+from api.consumers import NotificationConsumer
+from api.hyperloglog import HyperLogLog
+from api.idempotency import get_cache, idempotent, storage_key
+from api.mailer import Mailer, RateLimiter, TrackedEmail
+from api.management.commands.close_auctions import Command as CloseAuctionsCommand
+from api.models import (
+    AuctionItem, Bid, Notification, OutboxMessage, ProxyBid, Question, ShareAnalytics,
+    ShareDailyRollup, SystemStats, User,
+)
+from api.routing import websocket_urlpatterns
+from api.scheduler import DeadlineQueue
+from api.utils import (
+    create_and_send_notification, create_and_send_notifications_bulk, send_auction_update,
+    send_to_users,
+)
+
+# Tests run against an in-memory cache and channel layer and without the
+# order book, so every bid goes through the database and nothing leaks
+# between tests
+TEST_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'CHANNEL_LAYERS': {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    'ORDER_BOOK_BACKEND': '',
+    'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
+}
+
+
+def make_user(username: str) -> User:
+    return User.objects.create_user(username=username, email=f'{username}@example.com', password='pw123456')
+
+
+def make_auction(owner: User, price: str = '10.00', **fields) -> AuctionItem:
+    fields.setdefault('title', 'Test auction')
+    fields.setdefault('description', 'A test auction')
+    fields.setdefault('ends_at', timezone.now() + timedelta(days=1))
+    return AuctionItem.objects.create(
+        starting_price=Decimal(price),
+        current_price=Decimal(price),
+        owner=owner,
+        **fields,
+    )
+
+
+def end_auctions(*items: AuctionItem) -> None:
+    """Move auctions' end time into the past, as if they had run their course"""
+    AuctionItem.objects.filter(id__in=[item.id for item in items]).update(
+        ends_at=timezone.now() - timedelta(minutes=1)
+    )
+
+
+@override_settings(**TEST_SETTINGS)
+class BidCommitTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.item = make_auction(self.seller)
+
+    def test_higher_bid_updates_price(self):
+        result = commit_bid(self.alice, self.item.id, Decimal('12.00'))
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_price, Decimal('12.00'))
+        self.assertTrue(result.bid.is_winning)
+
+    def test_bid_not_above_current_price_is_rejected(self):
+        commit_bid(self.alice, self.item.id, Decimal('12.00'))
+
+        with self.assertRaises(BidRejected):
+            commit_bid(self.bob, self.item.id, Decimal('12.00'))
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_price, Decimal('12.00'))
+        self.assertEqual(Bid.objects.filter(item=self.item).count(), 1)
+
+    def test_owner_and_ended_auctions_are_rejected(self):
+        with self.assertRaises(BidRejected):
+            commit_bid(self.seller, self.item.id, Decimal('20.00'))
+
+        ended = make_auction(self.seller, ends_at=timezone.now() - timedelta(minutes=1))
+        with self.assertRaises(BidRejected):
+            commit_bid(self.alice, ended.id, Decimal('20.00'))
+
+    def test_missing_auction_is_404(self):
+        with self.assertRaises(BidRejected) as raised:
+            commit_bid(self.alice, self.item.id + 1000, Decimal('20.00'))
+        self.assertEqual(raised.exception.status, 404)
+
+    def test_outbid_leader_loses_winning_flag(self):
+        commit_bid(self.alice, self.item.id, Decimal('12.00'))
+        commit_bid(self.bob, self.item.id, Decimal('15.00'))
+
+        winning = Bid.objects.filter(item=self.item, is_winning=True)
+        self.assertEqual(list(winning.values_list('user_id', flat=True)), [self.bob.id])
+
+    def test_proxy_outbids_a_manual_bid(self):
+        commit_proxy_bid(self.alice, self.item.id, Decimal('50.00'))
+        result = commit_bid(self.bob, self.item.id, Decimal('20.00'))
+
+        self.item.refresh_from_db()
+        self.assertEqual(result.leader_id, self.alice.id)
+        self.assertEqual(result.outbid_user_ids, [self.bob.id])
+        self.assertEqual(self.item.current_price, Decimal('21.00'))
+
+    def test_higher_proxy_wins_one_increment_above_the_other(self):
+        commit_proxy_bid(self.bob, self.item.id, Decimal('30.00'))
+        result = commit_proxy_bid(self.alice, self.item.id, Decimal('50.00'))
+
+        self.item.refresh_from_db()
+        self.assertEqual(result.leader_id, self.alice.id)
+        self.assertEqual(self.item.current_price, Decimal('31.00'))
+        self.assertFalse(ProxyBid.objects.get(user=self.bob, item=self.item).is_active)
+
+    def test_equal_proxies_go_to_the_earlier_one(self):
+        commit_proxy_bid(self.alice, self.item.id, Decimal('40.00'))
+        result = commit_proxy_bid(self.bob, self.item.id, Decimal('40.00'))
+
+        self.item.refresh_from_db()
+        self.assertEqual(result.leader_id, self.alice.id)
+        self.assertEqual(self.item.current_price, Decimal('40.00'))
+
+    def test_direct_bid_matching_a_proxy_maximum_loses_the_tie(self):
+        commit_proxy_bid(self.alice, self.item.id, Decimal('50.00'))
+        result = commit_bid(self.bob, self.item.id, Decimal('50.00'))
+
+        self.item.refresh_from_db()
+        self.assertEqual(result.leader_id, self.alice.id)
+        self.assertEqual(result.outbid_user_ids, [self.bob.id])
+        self.assertEqual(self.item.current_price, Decimal('50.00'))
+        self.assertFalse(result.bid.is_winning)
+
+    def test_bids_keep_the_summary_in_step(self):
+        commit_bid(self.alice, self.item.id, Decimal('12.00'))
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.bid_count, self.item.leading_bidder_id), (1, self.alice.id))
+        self.assertIsNotNone(self.item.last_bid_at)
+
+        # The proxy's automatic bid is counted like any other
+        commit_proxy_bid(self.bob, self.item.id, Decimal('30.00'))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.leading_bidder_id, self.bob.id)
+        self.assertEqual(self.item.bid_count, Bid.objects.filter(item=self.item).count())
+
+
+@override_settings(**{**TEST_SETTINGS, 'ORDER_BOOK_BACKEND': 'local'})
+class OrderBookTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.item = make_auction(self.seller)
+        # A fresh store per test, built from the overridden settings
+        patcher = mock.patch.object(order_book, '_store', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def bid(self, user: User, amount: str):
+        with self.captureOnCommitCallbacks(execute=True):
+            return commit_bid(user, self.item.id, Decimal(amount))
+
+    def test_committed_bids_are_written_through(self):
+        order_book.get_or_load(self.item)
+        self.bid(self.alice, '12.00')
+
+        entry = order_book.get_entry(self.item.id)
+        self.assertEqual(entry['current_price'], Decimal('12.00'))
+        self.assertEqual(entry['leader_id'], self.alice.id)
+        self.assertEqual([b['user_id'] for b in entry['recent_bids']], [self.alice.id])
+
+    def test_losing_bid_is_rejected_from_memory(self):
+        order_book.get_or_load(self.item)
+        self.bid(self.alice, '12.00')
+
+        with self.assertNumQueries(0), self.assertRaises(BidRejected):
+            commit_bid(self.bob, self.item.id, Decimal('11.00'))
+
+    def test_invalidated_entry_is_reloaded(self):
+        order_book.get_or_load(self.item)
+        AuctionItem.objects.filter(id=self.item.id).update(current_price=Decimal('25.00'))
+        order_book.invalidate(self.item.id)
+
+        self.assertIsNone(order_book.get_entry(self.item.id))
+        self.item.refresh_from_db()
+        self.assertEqual(order_book.get_or_load(self.item)['current_price'], Decimal('25.00'))
+
+    def stores(self):
+        cache_store = order_book.CacheOrderBookStore()
+        cache_store.cache.clear()
+        return [order_book.LocalOrderBookStore(), cache_store]
+
+    def test_load_that_raced_a_write_is_not_kept(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                generation = store.generation(self.item.id)
+                store.delete(self.item.id)
+
+                store.add(self.item.id, {'current_price': Decimal('10.00')}, generation)
+                self.assertIsNone(store.get(self.item.id))
+
+    def test_load_never_replaces_a_resident_entry(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                store.set(self.item.id, {'current_price': Decimal('12.00')})
+
+                loaded = store.add(self.item.id, {'current_price': Decimal('10.00')}, store.generation(self.item.id))
+                self.assertEqual(loaded['current_price'], Decimal('12.00'))
+                self.assertEqual(store.get(self.item.id)['current_price'], Decimal('12.00'))
+
+    def test_cache_add_racing_a_write_is_dropped(self):
+        store = self.stores()[1]
+        store.bump(self.item.id)
+        generation = store.generation(self.item.id)
+        real_add = store.cache.add
+
+        def add_then_bump(*args, **kwargs):
+            # A bid lands between the generation check and the add
+            added = real_add(*args, **kwargs)
+            store.bump(self.item.id)
+            return added
+
+        with mock.patch.object(store.cache, 'add', add_then_bump):
+            store.add(self.item.id, {'current_price': Decimal('10.00')}, generation)
+        self.assertIsNone(store.get(self.item.id))
+
+
+@override_settings(**TEST_SETTINGS)
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.seller = make_user('seller')
+        self.alice = make_user('alice')
+        self.item = make_auction(self.seller)
+        self.client.force_login(self.alice)
+
+    def bid(self, amount: str, key: str = 'bid-1'):
+        return self.client.post(
+            '/api/bids/',
+            data=json.dumps({'item_id': self.item.id, 'bid_amount': amount}),
+            content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.bid('12.00')
+        retry = self.bid('12.00')
+
+        self.assertEqual(first.status_code, retry.status_code)
+        self.assertEqual(first.content, retry.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Bid.objects.filter(item=self.item).count(), 1)
+
+    def test_key_reused_with_another_body_is_422(self):
+        self.bid('12.00')
+        self.assertEqual(self.bid('13.00').status_code, 422)
+
+    def test_request_in_flight_is_409(self):
+        request = RequestFactory().post('/api/bids/')
+        request.user = self.alice
+        body = json.dumps({'item_id': self.item.id, 'bid_amount': '12.00'}).encode()
+        get_cache().set(
+            storage_key(request, 'place_bid', 'bid-1'),
+            {'state': 'pending', 'fingerprint': hashlib.sha256(body).hexdigest()},
+        )
+
+        self.assertEqual(self.bid('12.00').status_code, 409)
+        self.assertFalse(Bid.objects.filter(item=self.item).exists())
+
+    @override_settings(IDEMPOTENCY_PENDING_TTL=5)
+    def test_claim_of_a_dead_worker_expires(self):
+        class WorkerKilled(BaseException):
+            pass
+
+        @idempotent('test')
+        def dies(request):
+            raise WorkerKilled()
+
+        @idempotent('test')
+        def succeeds(request):
+            return JsonResponse({'ok': True}, status=201)
+
+        def request():
+            req = RequestFactory().post('/', data='{}', content_type='application/json', HTTP_IDEMPOTENCY_KEY='k')
+            req.user = self.alice
+            return req
+
+        with self.assertRaises(WorkerKilled):
+            dies(request())
+        self.assertEqual(succeeds(request()).status_code, 409)
+
+        later = time.time() + 10
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual(succeeds(request()).status_code, 201)
+
+
+@override_settings(**TEST_SETTINGS)
+class ReconcileBidSummaryTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.alice = make_user('alice')
+
+    def run_command(self, *args: str) -> str:
+        out = StringIO()
+        call_command('reconcile_bid_summary', *args, stdout=out)
+        return out.getvalue()
+
+    def test_drift_is_corrected(self):
+        item = make_auction(self.seller)
+        commit_bid(self.alice, item.id, Decimal('12.00'))
+        AuctionItem.objects.filter(id=item.id).update(bid_count=5, leading_bidder=None)
+
+        self.assertIn('1 auction(s) out of step', self.run_command())
+        item.refresh_from_db()
+        self.assertEqual(item.bid_count, 1)
+        self.assertEqual(item.leading_bidder_id, self.alice.id)
+
+    def test_auctions_without_bids_are_not_drift(self):
+        make_auction(self.seller)
+        commit_bid(self.alice, make_auction(self.seller).id, Decimal('12.00'))
+
+        self.assertIn('0 auction(s) out of step', self.run_command('--dry-run'))
+
+
+@override_settings(**TEST_SETTINGS)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.lamp = make_auction(self.seller, title='Brass desk lamp', description='Works on any bulb')
+        self.table = make_auction(self.seller, title='Oak table', description='Comes with a lamp')
+
+    def search(self, query: str):
+        response = self.client.get('/api/auctions/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [auction['id'] for auction in response.json()['auctions']]
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search('lamp'), [self.lamp.id, self.table.id])
+
+    def test_words_match_as_prefixes(self):
+        self.assertEqual(self.search('bras'), [self.lamp.id])
+        self.assertEqual(self.search('oak tab'), [self.table.id])
+
+    def test_search_syntax_is_ignored(self):
+        self.assertEqual(self.search('"desk* (lamp'), [self.lamp.id])
+
+    def test_query_without_words_matches_nothing(self):
+        self.assertEqual(self.search('***'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.table.title = 'Pine table'
+        self.table.save()
+        self.lamp.delete()
+
+        self.assertEqual(self.search('pine'), [self.table.id])
+        self.assertEqual(self.search('oak'), [])
+        self.assertEqual(self.search('brass'), [])
+
+
+@override_settings(**TEST_SETTINGS)
+class CursorPaginationTests(TestCase):
+    ordering = ('-created_at', '-id')
+
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.items = [make_auction(self.seller) for _ in range(7)]
+        # Ties on created_at are broken by id
+        AuctionItem.objects.update(created_at=timezone.now())
+
+    def walk(self, size: int):
+        seen, cursor = [], None
+        while True:
+            page, cursor = pagination.paginate(AuctionItem.objects.all(), self.ordering, cursor, size)
+            seen += [item.id for item in page]
+            if cursor is None:
+                return seen
+
+    def test_pages_cover_every_row_once(self):
+        ids = self.walk(3)
+        self.assertEqual(ids, sorted((item.id for item in self.items), reverse=True))
+
+    def test_rows_added_between_pages_do_not_shift_later_pages(self):
+        first, cursor = pagination.paginate(AuctionItem.objects.all(), self.ordering, None, 3)
+        make_auction(self.seller)
+        rest = []
+        while cursor:
+            page, cursor = pagination.paginate(AuctionItem.objects.all(), self.ordering, cursor, 3)
+            rest += [item.id for item in page]
+
+        self.assertEqual(
+            [item.id for item in first] + rest,
+            sorted((item.id for item in self.items), reverse=True),
+        )
+
+    def test_invalid_cursor_is_400(self):
+        response = self.client.get('/api/auctions/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(**TEST_SETTINGS)
+class AuctionConsumerTests(TransactionTestCase):
+    # Committed transactions, so bids broadcast as they would in production
+
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.alice = make_user('alice')
+        self.item = make_auction(self.seller)
+
+    def communicator(self, item_id: int) -> WebsocketCommunicator:
+        return WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/auctions/{item_id}/')
+
+    def test_snapshot_then_bid_updates(self):
+        async def run():
+            communicator = self.communicator(self.item.id)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            snapshot = await communicator.receive_json_from()
+            self.assertEqual(snapshot['type'], 'auction_snapshot')
+            self.assertEqual(snapshot['auction']['current_price'], '10.00')
+
+            await database_sync_to_async(commit_bid)(self.alice, self.item.id, Decimal('12.00'))
+            update = await communicator.receive_json_from()
+            self.assertEqual(update['type'], 'auction_update')
+            self.assertEqual((update['update']['event'], update['update']['current_price']), ('bid', '12.00'))
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_unknown_auction_is_refused(self):
+        async def run():
+            connected, _ = await self.communicator(self.item.id + 1000).connect()
+            self.assertFalse(connected)
+
+        async_to_sync(run)()
+
+    def test_failed_update_is_logged(self):
+        with mock.patch('api.utils.get_channel_layer', side_effect=RuntimeError('layer down')):
+            with self.assertLogs('api.utils', 'ERROR'):
+                send_auction_update(self.item.id, {'event': 'closed', 'item_id': self.item.id})
+
+
+@override_settings(**TEST_SETTINGS)
+class NotificationConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.alice = make_user('alice')
+
+    def communicator(self, user) -> WebsocketCommunicator:
+        communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), '/ws/notifications/')
+        communicator.scope['user'] = user
+        return communicator
+
+    def test_connect_sends_one_snapshot_frame(self):
+        create_and_send_notification(self.alice, 'outbid', 'one')
+        create_and_send_notification(self.alice, 'outbid', 'two')
+
+        async def run():
+            communicator = self.communicator(self.alice)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            snapshot = await communicator.receive_json_from()
+            self.assertEqual(snapshot['type'], 'notifications_snapshot')
+            self.assertEqual(snapshot['unread_count'], 2)
+            self.assertEqual([n['message'] for n in snapshot['notifications']], ['two', 'one'])
+            self.assertTrue(await communicator.receive_nothing())
+
+            await communicator.send_json_to({'type': 'mark_all_read'})
+            update = await communicator.receive_json_from()
+            self.assertEqual((update['type'], update['count']), ('unread_count_update', 0))
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_anonymous_users_are_refused(self):
+        async def run():
+            connected, _ = await self.communicator(AnonymousUser()).connect()
+            self.assertFalse(connected)
+
+        async_to_sync(run)()
+
+    def test_failed_snapshot_is_logged(self):
+        async def run():
+            communicator = self.communicator(self.alice)
+            await communicator.connect()
+            await communicator.disconnect()
+
+        with mock.patch.object(NotificationConsumer, 'get_snapshot', side_effect=RuntimeError('db down')):
+            with self.assertLogs('api.consumers', 'ERROR'):
+                async_to_sync(run)()
+
+
+@override_settings(**TEST_SETTINGS)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.seller = make_user('seller')
+        self.alice = make_user('alice')
+        self.item = make_auction(self.seller)
+
+    def detail(self):
+        return self.client.get(f'/api/auctions/{self.item.id}/').json()['item']
+
+    def listed(self):
+        return self.client.get('/api/auctions/').json()['items'][0]
+
+    def test_repeat_reads_come_from_the_cache_until_a_bump(self):
+        self.assertEqual(self.detail()['title'], 'Test auction')
+        AuctionItem.objects.filter(id=self.item.id).update(title='Renamed behind the cache')
+        self.assertEqual(self.detail()['title'], 'Test auction')
+
+        response_cache.bump(self.item.id)
+        self.assertEqual(self.detail()['title'], 'Renamed behind the cache')
+
+    def test_bids_move_the_detail_and_listing_on(self):
+        self.assertEqual(self.detail()['current_price'], '10.00')
+        self.assertEqual(self.listed()['current_price'], '10.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            commit_bid(self.alice, self.item.id, Decimal('12.00'))
+
+        self.assertEqual(self.detail()['current_price'], '12.00')
+        self.assertEqual(self.listed()['current_price'], '12.00')
+
+    def test_responses_do_not_outlive_an_active_auction(self):
+        ends_at = timezone.now() + timedelta(seconds=30)
+        self.assertLessEqual(response_cache.timeout_for([ends_at]), 31)
+        self.assertEqual(response_cache.timeout_for([]), response_cache.max_timeout())
+
+
+@override_settings(**TEST_SETTINGS)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.seller = make_user('seller')
+        self.alice = make_user('alice')
+        self.item = make_auction(self.seller)
+        self.url = f'/api/auctions/{self.item.id}/'
+
+    def test_unchanged_auction_is_304(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            commit_bid(self.alice, self.item.id, Decimal('12.00'))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_new_question_changes_the_questions_etag(self):
+        url = f'/api/questions/?item_id={self.item.id}'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Question.objects.create(user=self.alice, item=self.item, question_text='Still available?')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_auction_etag_turns_over_when_it_ends(self):
+        etag = self.client.get(self.url)['ETag']
+        end_auctions(self.item)
+        # A cached body never outlives the end time it was built with
+        response_cache.get_cache().clear()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['item']['is_active'])
+
+
+@override_settings(**TEST_SETTINGS, EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.art = make_auction(self.seller, category='art')
+        self.home = make_auction(self.seller, category='home')
+        self.old = make_auction(self.seller, category='art')
+        AuctionItem.objects.filter(id=self.old.id).update(created_at=timezone.now() - timedelta(days=10))
+
+    def export(self, **params):
+        response = self.client.get('/api/auctions/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def ids(self, body: bytes):
+        return [int(row[0]) for row in list(csv.reader(StringIO(body.decode())))[1:]]
+
+    def test_streams_every_auction_in_id_order(self):
+        response, body = self.export()
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(next(csv.reader(StringIO(body.decode()))), exports.HEADER)
+        self.assertEqual(self.ids(body), [self.art.id, self.home.id, self.old.id])
+
+    def test_gzip_download_holds_the_same_csv(self):
+        _, plain = self.export()
+        response, body = self.export(gzip='1')
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('auctions_export.csv.gz', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(body), plain)
+
+    def test_filters(self):
+        today = timezone.localdate()
+        _, body = self.export(category='art')
+        self.assertEqual(self.ids(body), [self.art.id, self.old.id])
+
+        _, body = self.export(created_from=str(today - timedelta(days=5)), created_to=str(today))
+        self.assertEqual(self.ids(body), [self.art.id, self.home.id])
+
+    def test_bad_filters_are_400(self):
+        for params in ({'category': 'spaceships'}, {'created_from': 'last week'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/auctions/export/', params).status_code, 400)
+
+
+@override_settings(**TEST_SETTINGS, SHARE_BUFFER_SIZE=0)
+class ShareRollupTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.item = make_auction(self.seller)
+
+    def track(self, platform: str = 'facebook', **extra):
+        return self.client.post(
+            '/api/shares/track',
+            data=json.dumps({'auction_id': self.item.id, 'platform': platform, 'url': 'https://example.com/a/1'}),
+            content_type='application/json',
+            **extra,
+        )
+
+    def test_tracked_shares_are_rolled_up_by_day(self):
+        for platform in ('facebook', 'facebook', 'twitter'):
+            self.assertLess(self.track(platform).status_code, 300)
+
+        self.assertEqual(ShareDailyRollup.objects.count(), 2)
+        analytics = self.client.get(f'/api/shares/analytics/{self.item.id}').json()
+        self.assertEqual(analytics['totalShares'], 3)
+        self.assertEqual(analytics['recentShares'], 3)
+
+    def test_rebuild_recounts_from_raw_events(self):
+        for platform in ('facebook', 'twitter', 'twitter'):
+            self.track(platform)
+        ShareDailyRollup.objects.update(count=100)
+
+        call_command('compact_share_rollups', stdout=StringIO())
+
+        self.assertEqual(
+            dict(ShareDailyRollup.objects.values_list('platform', 'count')),
+            {'facebook': 1, 'twitter': 2},
+        )
+
+
+@override_settings(**TEST_SETTINGS)
+class ShareBufferTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.item = make_auction(self.seller)
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def event(self, **fields):
+        return {
+            'auction_id': self.item.id,
+            'platform': 'facebook',
+            'url': 'https://example.com/a/1',
+            'ip_address': '203.0.113.5',
+            'user_agent': 'test',
+            'timestamp': timezone.now().isoformat(),
+            **fields,
+        }
+
+    def dead_spill(self, *events) -> Path:
+        # No process has a pid this high, so the file counts as orphaned
+        path = self.directory / f"{share_buffer.spill_prefix(999999999)}.jsonl"
+        path.write_text(''.join(json.dumps(event) + '\n' for event in events) + '{"cut short')
+        return path
+
+    def test_flush_writes_the_batch_and_drops_its_spill(self):
+        buffer = share_buffer.ShareBuffer(self.directory, 10, 60)
+        buffer.add(self.event())
+        buffer.add(self.event(platform='twitter'))
+        self.assertFalse(ShareAnalytics.objects.exists())
+
+        buffer.flush()
+        self.assertEqual(ShareAnalytics.objects.count(), 2)
+        self.assertEqual(ShareDailyRollup.objects.count(), 2)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_spills_of_dead_processes_are_replayed(self):
+        spill = self.dead_spill(self.event(), self.event(auction_id=self.item.id + 1000))
+
+        self.assertEqual(share_buffer.recover(self.directory), 1)
+        self.assertFalse(spill.exists())
+        self.assertEqual(ShareAnalytics.objects.count(), 1)
+
+    @override_settings(SHARE_BUFFER_SIZE=0)
+    def test_invalid_shares_are_rejected(self):
+        response = self.client.post(
+            '/api/shares/track',
+            data=json.dumps({'auction_id': self.item.id, 'platform': 'myspace', 'url': 'https://example.com'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(SHARE_BUFFER_MAX_ATTEMPTS=2)
+    def test_batch_that_keeps_failing_is_quarantined(self):
+        buffer = share_buffer.ShareBuffer(self.directory, 10, 60)
+        buffer.add(self.event())
+
+        with mock.patch('api.share_buffer.write', side_effect=RuntimeError('db down')):
+            with self.assertLogs('api.share_buffer', 'ERROR'):
+                buffer.flush()
+                self.assertEqual(len(buffer.failed), 1)
+                buffer.flush()
+
+        self.assertEqual(buffer.failed, {})
+        self.assertEqual(len(list((self.directory / 'failed').iterdir())), 1)
+
+    @override_settings(SHARE_BUFFER_SIZE=0)
+    def test_bad_forwarded_address_is_stored_as_null(self):
+        response = self.client.post(
+            '/api/shares/track',
+            data=json.dumps({'auction_id': self.item.id, 'platform': 'email', 'url': 'https://example.com/a/1'}),
+            content_type='application/json',
+            HTTP_X_FORWARDED_FOR='not-an-address, 10.0.0.1',
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertIsNone(ShareAnalytics.objects.get().ip_address)
+        self.assertEqual(share_buffer.clean_ip(' 2001:DB8::1 '), '2001:db8::1')
+
+    def test_a_spill_is_replayed_only_by_the_worker_that_claims_it(self):
+        spill = self.dead_spill(self.event())
+
+        claimed = share_buffer.claim(spill)
+        self.assertFalse(spill.exists())
+        self.assertIsNone(share_buffer.claim(spill))
+
+        self.assertEqual(share_buffer.recover(self.directory), 1)
+        self.assertFalse(claimed.exists())
+
+
+@override_settings(**TEST_SETTINGS, SHARE_BUFFER_SIZE=0)
+class HyperLogLogTests(TestCase):
+    def test_estimate_is_within_a_few_percent(self):
+        sketch = HyperLogLog()
+        for n in range(20000):
+            sketch.add(f'sharer-{n}')
+        self.assertAlmostEqual(sketch.count(), 20000, delta=1000)
+
+    def test_merge_counts_the_union(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for n in range(3000):
+            first.add(str(n))
+            second.add(str(n + 1500))
+        first.merge(HyperLogLog.from_bytes(second.to_bytes()))
+        self.assertAlmostEqual(first.count(), 4500, delta=225)
+
+    def test_unique_sharers_are_counted_once(self):
+        item = make_auction(make_user('seller'))
+        for ip_address, platform in (('203.0.113.1', 'facebook'), ('203.0.113.1', 'twitter'), ('203.0.113.2', 'email')):
+            self.client.post(
+                '/api/shares/track',
+                data=json.dumps({'auction_id': item.id, 'platform': platform, 'url': 'https://example.com/a/1'}),
+                content_type='application/json',
+                REMOTE_ADDR=ip_address,
+            )
+
+        self.assertEqual(shares.unique_sharers(item.id), 2)
+        self.assertEqual(self.client.get(f'/api/shares/analytics/{item.id}').json()['uniqueSharers'], 2)
+
+
+@override_settings(**TEST_SETTINGS)
+class SystemStatsTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        system_stats.refresh()
+
+    def stats(self) -> SystemStats:
+        return SystemStats.objects.get(pk=system_stats.SNAPSHOT_ID)
+
+    def test_new_auctions_are_counted_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_auction(self.seller)
+
+        stats = self.stats()
+        self.assertEqual((stats.auctions_total, stats.auctions_active, stats.auctions_recent), (1, 1, 1))
+
+    def test_users_and_bids_are_counted_on_refresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            commit_bid(make_user('alice'), make_auction(self.seller).id, Decimal('12.00'))
+        self.assertEqual((self.stats().users_total, self.stats().bids_total), (1, 0))
+
+        system_stats.refresh()
+        self.assertEqual((self.stats().users_total, self.stats().bids_total), (2, 1))
+
+    def test_bulk_created_rows_deleted_never_go_negative(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            users = User.objects.bulk_create([User(username=f'bulk{i}') for i in range(3)])
+            User.objects.filter(id__in=[u.id for u in users]).delete()
+
+        self.assertEqual(self.stats().users_total, 1)
+
+    def test_deleted_auction_leaves_every_counter(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item = make_auction(self.seller)
+        self.client.force_login(self.seller)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f'/api/auctions/{item.id}/').status_code, 200)
+
+        stats = self.stats()
+        self.assertEqual((stats.auctions_total, stats.auctions_active, stats.auctions_recent), (0, 0, 0))
+
+    def test_decrements_stop_at_zero(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            system_stats.bump(auctions_recent=-1)
+        self.assertEqual(self.stats().auctions_recent, 0)
+
+
+@override_settings(**TEST_SETTINGS)
+class AuctionSchedulerTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_due_auctions_pop_in_deadline_order(self):
+        queue = DeadlineQueue([
+            (1, self.now + timedelta(seconds=30)),
+            (2, self.now - timedelta(seconds=5)),
+            (3, self.now - timedelta(seconds=10)),
+        ])
+
+        self.assertEqual(queue.pop_due(self.now), [3, 2])
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.next_deadline(), self.now + timedelta(seconds=30))
+
+    def test_moved_and_discarded_deadlines_are_skipped(self):
+        queue = DeadlineQueue()
+        queue.schedule(1, self.now - timedelta(seconds=1))
+        queue.schedule(1, self.now + timedelta(minutes=1))
+        queue.schedule(2, self.now - timedelta(seconds=1))
+        queue.discard(2)
+
+        self.assertEqual(queue.pop_due(self.now), [])
+        self.assertEqual(queue.next_deadline(), self.now + timedelta(minutes=1))
+
+    def test_saves_publish_the_deadline_after_commit(self):
+        seller = make_user('seller')
+        with mock.patch('api.scheduler.publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                item = make_auction(seller)
+            publish.assert_called_once_with(item.id, item.ends_at)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                item.status = 'closed'
+                item.save(update_fields=['status'])
+            publish.assert_called_with(item.id, None)
+
+    def test_failed_publish_is_logged(self):
+        with mock.patch('api.scheduler.get_channel_layer', side_effect=RuntimeError('layer down')):
+            with self.assertLogs('api.scheduler', 'ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    make_auction(make_user('seller'))
+
+
+@override_settings(**TEST_SETTINGS)
+class CloseAuctionsTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.items = [make_auction(self.seller) for _ in range(3)]
+        commit_bid(self.alice, self.items[0].id, Decimal('12.00'))
+        commit_bid(self.bob, self.items[0].id, Decimal('15.00'))
+        end_auctions(*self.items)
+        self.open = make_auction(self.seller)
+
+    def test_batches_close_every_ended_auction(self):
+        call_command('close_auctions', '--batch-size', '2', stdout=StringIO())
+
+        closed = AuctionItem.objects.filter(status='closed')
+        self.assertEqual(sorted(closed.values_list('id', flat=True)), [item.id for item in self.items])
+        won = closed.get(id=self.items[0].id)
+        self.assertEqual((won.winner_id, won.winning_bid_amount), (self.bob.id, Decimal('15.00')))
+        self.assertIsNone(closed.get(id=self.items[1].id).winner_id)
+
+    def test_batch_skips_auctions_closed_meanwhile(self):
+        AuctionItem.objects.filter(id=self.items[1].id).update(status='closed')
+
+        closed = CloseAuctionsCommand(stdout=StringIO()).close_batch([item.id for item in self.items])
+        self.assertEqual([item.id for item in closed], [self.items[0].id, self.items[2].id])
+
+    def test_serial_close_skips_auctions_closed_meanwhile(self):
+        command = CloseAuctionsCommand(stdout=StringIO())
+        ended = list(command.ended_auctions())
+        AuctionItem.objects.filter(id=self.items[1].id).update(status='closed', closed_at=None)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = command.close(ended)
+        self.assertEqual((counts['processed'], counts['closed']), (3, 2))
+        self.assertIsNone(AuctionItem.objects.get(id=self.items[1].id).closed_at)
+
+
+@override_settings(**TEST_SETTINGS)
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice')
+
+    def test_claim_leases_messages(self):
+        queued = outbox.enqueue_notification(self.alice.id, 'outbid', 'You were outbid')
+
+        self.assertEqual([m.id for m in outbox.claim(10)], [queued.id])
+        self.assertEqual(outbox.claim(10), [])
+        queued.refresh_from_db()
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+
+    def test_delivery_marks_sent(self):
+        outbox.enqueue_notification(self.alice.id, 'outbid', 'You were outbid')
+        outbox.enqueue_email('Subject', 'Body', ['alice@example.com'])
+
+        self.assertEqual(outbox.deliver(), {'sent': 2, 'retried': 0, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertTrue(Notification.objects.filter(user=self.alice, message='You were outbid').exists())
+        self.assertFalse(OutboxMessage.objects.exclude(status='sent').exists())
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_retry_with_backoff_then_fail(self):
+        queued = outbox.enqueue_notification(self.alice.id + 1000, 'outbid', 'Nobody to notify')
+
+        self.assertEqual(outbox.deliver(), {'sent': 0, 'retried': 1, 'failed': 0})
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('pending', 1))
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+        self.assertTrue(queued.last_error)
+
+        # Not due again until the backoff has passed
+        self.assertEqual(outbox.deliver()['retried'], 0)
+        OutboxMessage.objects.filter(id=queued.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.deliver(), {'sent': 0, 'retried': 0, 'failed': 1})
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 2))
+
+    def test_closing_an_auction_queues_its_emails_and_notifications(self):
+        seller, bob = make_user('seller'), make_user('bob')
+        item = make_auction(seller)
+        commit_bid(self.alice, item.id, Decimal('12.00'))
+        commit_bid(bob, item.id, Decimal('15.00'))
+        end_auctions(item)
+
+        call_command('close_auctions', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboxMessage.objects.filter(status='pending')
+        self.assertEqual(queued.filter(kind='email').count(), 2)
+        self.assertEqual(queued.filter(kind='notification').count(), 2)
+
+
+class BouncingBackend(locmem.EmailBackend):
+    """locmem backend that fails on the first message to bounce@example.com"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            message.message()
+            if 'bounce@example.com' in message.to:
+                raise ConnectionError('Recipient refused')
+            super().send_messages([message])
+        return len(messages)
+
+
+@override_settings(**TEST_SETTINGS)
+class MailerTests(TestCase):
+    def email(self, to: str) -> TrackedEmail:
+        return TrackedEmail('Subject', 'Body', 'auctions@example.com', [to])
+
+    @override_settings(MAIL_SEND_BATCH=2, MAIL_CONNECTION_MAX_MESSAGES=3)
+    def test_connection_is_reused_then_recycled(self):
+        with mock.patch('api.mailer.get_connection', wraps=get_connection) as connect:
+            with Mailer(RateLimiter({})) as mailer:
+                errors = mailer.send([self.email(f'user{n}@example.com') for n in range(5)])
+
+        self.assertEqual(errors, [None] * 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(connect.call_count, 2)
+
+    def test_failure_resends_the_rest_on_a_new_connection(self):
+        emails = [self.email(to) for to in ('a@example.com', 'bounce@example.com', 'c@example.com')]
+
+        with self.assertLogs('api.mailer', 'WARNING'):
+            with Mailer(RateLimiter({}), backend='api.tests.BouncingBackend') as mailer:
+                errors = mailer.send(emails)
+
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], ConnectionError)
+        self.assertIsNone(errors[2])
+        self.assertEqual([m.to for m in mail.outbox], [['a@example.com'], ['c@example.com']])
+
+    def test_rate_limits_apply_per_provider(self):
+        limiter = RateLimiter({'default': 2, 'slow.example': 1})
+
+        self.assertEqual([limiter.acquire('fast.example') for _ in range(2)], [0, 0])
+        self.assertGreater(limiter.acquire('fast.example'), 0)
+        self.assertEqual(limiter.acquire('slow.example'), 0)
+        self.assertGreater(limiter.acquire('slow.example'), 0)
+        self.assertEqual(RateLimiter({'default': 0}).acquire('any.example'), 0)
+
+
+@override_settings(**TEST_SETTINGS)
+class EmailRenderingTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.alice = make_user('alice')
+        self.item = make_auction(self.seller, title='Salt & pepper set')
+
+    def test_readers_sharing_a_locale_share_one_rendering(self):
+        bob = make_user('bob')
+        carol = make_user('carol')
+        carol.preferred_currency = 'EUR'
+        context = email_rendering.auction_context(self.item, self.alice, Decimal('15.00'))
+
+        with mock.patch('api.email_rendering.render', wraps=email_rendering.render) as render:
+            rendered = email_rendering.render_many(
+                'winner_notification', [(context, self.alice), (context, bob), (context, carol)]
+            )
+
+        self.assertEqual(render.call_count, 2)
+        self.assertIs(rendered[0], rendered[1])
+        self.assertIn('$15.00', rendered[0].text)
+        self.assertIn('€15.00', rendered[2].text)
+
+    def test_only_the_html_part_is_escaped(self):
+        context = email_rendering.auction_context(self.item, self.alice, Decimal('15.00'))
+        rendered = email_rendering.render_many('winner_notification', [(context, self.alice)])[0]
+
+        self.assertIn('Salt & pepper set', rendered.text)
+        self.assertIn('Salt &amp; pepper set', rendered.html)
+
+
+@override_settings(**TEST_SETTINGS)
+class NotificationFanOutTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.layer = get_channel_layer()
+
+    def listen(self, user: User) -> str:
+        channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)(f'user_{user.id}_notifications', channel)
+        return channel
+
+    def test_bulk_notifications_reach_each_user_once(self):
+        channel = self.listen(self.bob)
+        create_and_send_notification(self.alice, 'outbid', 'one')
+
+        created = create_and_send_notifications_bulk([
+            (self.alice, 'outbid', 'one'),
+            (self.bob.id, 'outbid', 'one'),
+            (self.bob.id, 'outbid', 'one'),
+        ])
+
+        self.assertEqual([n.user_id for n in created], [self.bob.id])
+        message = async_to_sync(self.layer.receive)(channel)
+        self.assertEqual((message['type'], message['notification']['message']), ('notification_message', 'one'))
+
+    def test_failed_fan_out_is_logged(self):
+        with mock.patch('api.utils.async_to_sync', side_effect=RuntimeError('no event loop')):
+            with self.assertLogs('api.utils', 'ERROR'):
+                send_to_users([(self.alice.id, {'type': 'notification_message'})])
+
+    def test_one_failed_send_does_not_stop_the_rest(self):
+        channel = self.listen(self.bob)
+        group_send = self.layer.group_send
+
+        async def refuse_alice(group, message):
+            if group == f'user_{self.alice.id}_notifications':
+                raise RuntimeError('layer down')
+            await group_send(group, message)
+
+        with mock.patch.object(self.layer, 'group_send', refuse_alice), self.assertLogs('api.utils', 'ERROR'):
+            send_to_users([
+                (self.alice.id, {'type': 'notification_message', 'notification': {}}),
+                (self.bob.id, {'type': 'notification_message', 'notification': {}}),
+            ])
+
+        self.assertEqual(async_to_sync(self.layer.receive)(channel)['type'], 'notification_message')
+
+
+@override_settings(**TEST_SETTINGS)
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+
+    def unread(self, user: User) -> int:
+        return notification_counts.unread_count(user.id)
+
+    def test_created_notifications_are_counted(self):
+        create_and_send_notification(self.alice, 'outbid', 'one')
+        create_and_send_notification(self.alice, 'outbid', 'one')  # duplicate, skipped
+        create_and_send_notifications_bulk([(self.alice, 'outbid', 'two'), (self.bob.id, 'outbid', 'two')])
+
+        self.assertEqual(self.unread(self.alice), 2)
+        self.assertEqual(self.unread(self.bob), 1)
+
+    def test_marking_read_counts_each_notification_once(self):
+        first = create_and_send_notification(self.alice, 'outbid', 'one')
+        create_and_send_notification(self.alice, 'outbid', 'two')
+
+        self.assertTrue(notification_counts.mark_read(self.alice.id, first.id))
+        self.assertFalse(notification_counts.mark_read(self.alice.id, first.id))
+        self.assertFalse(notification_counts.mark_read(self.bob.id, first.id))
+        self.assertEqual(self.unread(self.alice), 1)
+
+        self.assertEqual(notification_counts.mark_all_read(self.alice.id), 1)
+        self.assertEqual(self.unread(self.alice), 0)
+
+    def test_reconcile_recounts_drifted_users(self):
+        Notification.objects.bulk_create([Notification(user=self.alice, type='outbid', message='raw')])
+
+        self.assertEqual(notification_counts.drifted(), [self.alice.id])
+        notification_counts.reconcile([self.alice.id])
+        self.assertEqual(self.unread(self.alice), 1)
+        self.assertEqual(notification_counts.drifted(), [])
+
+    def test_archiving_keeps_unread_notifications(self):
+        create_and_send_notification(self.alice, 'outbid', 'unread')
+        read = create_and_send_notification(self.alice, 'outbid', 'read')
+        notification_counts.mark_read(self.alice.id, read.id)
+        Notification.objects.update(timestamp=timezone.now() - timedelta(days=60))
+
+        call_command('archive_notifications', '--retention-days', '30', stdout=StringIO())
+
+        self.assertEqual(list(Notification.objects.values_list('message', flat=True)), ['unread'])
+        self.assertEqual(self.alice.archived_notifications.count(), 1)
+        self.assertEqual(self.unread(self.alice), 1)
@@ -34,6 +34,7 @@ urlpatterns = [
     path("auctions/<int:item_id>/", views.auction_detail, name="auction-detail"),
     path("auctions/export/", views.export_auctions_csv, name="export-auctions"),
     path("bids/", views.place_bid, name="place-bid"),
+    path("bids/proxy/", views.place_proxy_bid, name="place-proxy-bid"),
     path("user/bids/", views.user_bids, name="user-bids"),
     path("questions/", views.questions, name="questions"),
     path("questions/<int:question_id>/reply/", views.question_reply, name="question-reply"),
@@ -1,9 +1,20 @@
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from typing import Dict, Any, Optional, Union
+from datetime import timedelta
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple, Union
+import asyncio
+import logging
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from . import notification_counts
 from .models import Notification
 
+logger = logging.getLogger(__name__)
+
+# Channel-layer sends in flight at once when fanning out notifications
+FAN_OUT_CONCURRENCY = 100
+
 
 def send_notification_to_user(user_id: int, notification_data: Dict[str, Any]) -> None:
     """
@@ -45,6 +56,67 @@ def send_unread_count_update(user_id: int, count: int) -> None:
         pass
 
 
+def send_to_users(messages: List[Tuple[int, Dict[str, Any]]]) -> None:
+    """
+    Send (user_id, message) pairs to each user's notification group from a
+    single event loop, keeping up to FAN_OUT_CONCURRENCY sends in flight
+    instead of waiting for each one in turn
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not messages:
+        return
+
+    async def send_all() -> None:
+        limit = asyncio.Semaphore(FAN_OUT_CONCURRENCY)
+
+        async def send(user_id: int, message: Dict[str, Any]) -> None:
+            async with limit:
+                await channel_layer.group_send(f"user_{user_id}_notifications", message)
+
+        # One failed send must not cancel the rest; report them together
+        results = await asyncio.gather(
+            *(send(user_id, message) for user_id, message in messages),
+            return_exceptions=True,
+        )
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            logger.error(
+                "Could not send %d of %d notification message(s)", len(failures), len(messages),
+                exc_info=failures[0],
+            )
+
+    try:
+        async_to_sync(send_all)()
+    except Exception:
+        logger.exception("Could not fan out %d notification message(s)", len(messages))
+
+
+def auction_group_name(item_id: int) -> str:
+    """
+    Channel group that viewers of an auction's detail page subscribe to
+    """
+    return f"auction_{item_id}"
+
+
+def send_auction_update(item_id: int, update: Dict[str, Any]) -> None:
+    """
+    Broadcast a compact change (new bids, closure, edits) to everyone
+    viewing an auction via WebSocket
+    """
+    try:
+        channel_layer = get_channel_layer()
+
+        async_to_sync(channel_layer.group_send)(
+            auction_group_name(item_id),
+            {
+                'type': 'auction_update',
+                'update': update
+            }
+        )
+    except Exception:
+        logger.exception("Could not send auction update for item %s", item_id)
+
+
 def create_and_send_notification(user: User, notification_type: str, message: str) -> Optional[Notification]:
     """
     Create notification in database and send via WebSocket
@@ -65,12 +137,14 @@ def create_and_send_notification(user: User, notification_type: str, message: st
         if existing_notification:
             return existing_notification
         
-        # Create notification in database
-        notification = Notification.objects.create(
-            user=user,
-            type=notification_type,
-            message=message
-        )
+        # Create notification in database and count it as unread
+        with transaction.atomic():
+            notification = Notification.objects.create(
+                user=user,
+                type=notification_type,
+                message=message
+            )
+            notification_counts.add({user.id: 1})
         
         # Prepare notification data for WebSocket
         notification_data = {
@@ -85,9 +159,77 @@ def create_and_send_notification(user: User, notification_type: str, message: st
         send_notification_to_user(user.id, notification_data)
         
         # Update unread count
-        unread_count = Notification.objects.filter(user=user, is_read=False).count()
+        unread_count = notification_counts.unread_count(user.id)
         send_unread_count_update(user.id, unread_count)
         
         return notification
     except Exception as e:
         return None
+
+
+def create_and_send_notifications_bulk(notifications: Iterable[Tuple[Union[User, int], str, str]]) -> List[Notification]:
+    """
+    Create many (user or user id, type, message) notifications and send them
+    via WebSocket with a fixed number of queries: one to find duplicates of
+    the last hour (repeats within the call are dropped too), one bulk
+    insert, one counter update per distinct number of notifications per
+    user (usually one) and one read of the counters. Database errors are raised so the
+    caller can retry; returns the notifications created.
+    """
+    wanted: List[Tuple[int, str, str]] = []
+    seen: Set[Tuple[int, str, str]] = set()
+    for user, notification_type, message in notifications:
+        key = (user if isinstance(user, int) else user.id, notification_type, message)
+        if key not in seen:
+            seen.add(key)
+            wanted.append(key)
+    if not wanted:
+        return []
+
+    user_ids = {user_id for user_id, _, _ in wanted}
+    existing = set(
+        Notification.objects.filter(
+            user_id__in=user_ids,
+            type__in={notification_type for _, notification_type, _ in wanted},
+            message__in={message for _, _, message in wanted},
+            timestamp__gte=timezone.now() - timedelta(hours=1),
+        ).values_list('user_id', 'type', 'message')
+    )
+
+    new = [key for key in wanted if key not in existing]
+    if not new:
+        return []
+    added: Dict[int, int] = {}
+    for user_id, _, _ in new:
+        added[user_id] = added.get(user_id, 0) + 1
+
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(
+            [
+                Notification(user_id=user_id, type=notification_type, message=message)
+                for user_id, notification_type, message in new
+            ],
+            batch_size=1000,
+        )
+        notification_counts.add(added)
+    unread = notification_counts.unread(added)
+
+    # Each user's count follows their notifications
+    send_to_users([
+        (n.user_id, {
+            'type': 'notification_message',
+            'notification': {
+                'id': n.id,
+                'type': n.type,
+                'message': n.message,
+                'is_read': n.is_read,
+                'timestamp': n.timestamp.isoformat(),
+            },
+        })
+        for n in created
+    ])
+    send_to_users([
+        (user_id, {'type': 'unread_count_update', 'count': count})
+        for user_id, count in unread.items()
+    ])
+    return created
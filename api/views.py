@@ -1,27 +1,33 @@
-from django.http import JsonResponse, HttpRequest, HttpResponse
+from django.http import JsonResponse, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
 from django.contrib.auth.views import LogoutView
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import condition, require_http_methods
+from django.views.decorators.cache import cache_control
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.utils.dateparse import parse_date
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.db import models, connection
+from django.db import connection
 import logging
 # Rate limiting is handled inline with graceful fallback
 
-from api.models import User, AuctionItem, Bid, Question, Reply, Notification, ShareAnalytics
+from api.models import User, AuctionItem, Bid, Question, Reply, Notification
 from api.forms import CustomAuthenticationForm, CustomUserCreationForm
-from api.utils import create_and_send_notification
+from api.utils import create_and_send_notification, send_auction_update
+from api.bidding import commit_bid, commit_proxy_bid, BidRejected
+from api import (
+    conditional, exports, order_book, pagination, response_cache, search,
+    share_buffer, shares, system_stats,
+)
+from api.idempotency import idempotent
 
 import json
 from typing import Dict, Any
 from decimal import Decimal, InvalidOperation
-from django.db.models import Count, Q, F
-from datetime import timedelta
+from django.db.models import Q, F, Max
 import os
 
 
@@ -282,6 +288,7 @@ def auction_item_to_dict(request: HttpRequest, item: AuctionItem) -> Dict[str, A
         "created_at": item.created_at.isoformat(),
         "ends_at": item.ends_at.isoformat(),
         "category": item.category,
+        "bid_count": item.bid_count,
         "owner": {
             "id": item.owner.id,
             "email": item.owner.email,
@@ -294,18 +301,36 @@ def auction_item_to_dict(request: HttpRequest, item: AuctionItem) -> Dict[str, A
 
 def auctions(request: HttpRequest) -> JsonResponse:
     """
-    GET  /api/auctions -> list ACTIVE auctions
+    GET  /api/auctions?cursor=X&page_size=N -> list ACTIVE auctions, newest first
     POST /api/auctions -> create auction
     """
     if request.method == "GET":
-        items = AuctionItem.objects.filter(ends_at__gt=timezone.now()).order_by(
-            "-created_at"
-        )
+        version = response_cache.list_version()
+        cached = response_cache.get_list(request, version)
+        if cached is not None:
+            return cached
+
+        items = AuctionItem.objects.filter(ends_at__gt=timezone.now()).select_related("owner")
+
+        try:
+            items, next_cursor = pagination.paginate(
+                items,
+                ("-created_at", "-id"),
+                request.GET.get("cursor"),
+                pagination.page_size(request),
+            )
+        except pagination.InvalidCursor as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
-        return JsonResponse(
-            {"items": [auction_item_to_dict(request, item) for item in items]},
+        response = JsonResponse(
+            {
+                "items": [auction_item_to_dict(request, item) for item in items],
+                "next_cursor": next_cursor,
+            },
             status=200,
         )
+        response_cache.set_list(request, version, response, [item.ends_at for item in items])
+        return response
 
     if request.method != "POST":
         return JsonResponse({"error": "Method not allowed"}, status=405)
@@ -361,6 +386,7 @@ def auctions(request: HttpRequest) -> JsonResponse:
         item.image = image
 
     item.save()
+    response_cache.bump_listing()
 
     return JsonResponse({
         "message": "Auction created successfully",
@@ -368,19 +394,38 @@ def auctions(request: HttpRequest) -> JsonResponse:
     }, status=201)
 
 
+@cache_control(no_cache=True)
+@condition(etag_func=conditional.auction_detail_etag)
 def auction_detail(request: HttpRequest, item_id: int) -> JsonResponse:
     """
     GET /api/auctions/<id> - Get auction details
     PUT /api/auctions/<id> - Update auction
     DELETE /api/auctions/<id> - Delete auction
     """
+    # Repeat reads are served from the response cache without touching the ORM
+    if request.method == "GET":
+        version = response_cache.item_version(item_id)
+        cached = response_cache.get_detail(request, item_id, version)
+        if cached is not None:
+            return cached
+
     try:
         item = AuctionItem.objects.select_related("owner").get(id=item_id)
     except AuctionItem.DoesNotExist:
         return JsonResponse({"error": "Auction item not found"}, status=404)
 
     if request.method == "GET":
-        return JsonResponse({"item": auction_item_to_dict(request, item)}, status=200)
+        data = auction_item_to_dict(request, item)
+
+        # Live bidding state comes from the order book when it is enabled
+        entry = order_book.get_or_load(item)
+        if entry is not None:
+            data["bidding"] = order_book.entry_to_dict(entry)
+            data["current_price"] = data["bidding"]["current_price"]
+
+        response = JsonResponse({"item": data}, status=200)
+        response_cache.set_detail(request, item.id, version, response, item.ends_at)
+        return response
     
     elif request.method == "PUT":
         if not request.user.is_authenticated:
@@ -435,6 +480,15 @@ def auction_detail(request: HttpRequest, item_id: int) -> JsonResponse:
                 return JsonResponse({'error': 'Invalid end date format'}, status=400)
         
         item.save()
+        order_book.invalidate(item.id)
+        response_cache.bump(item.id)
+        send_auction_update(item.id, {
+            "event": "updated",
+            "item_id": item.id,
+            "title": item.title,
+            "current_price": str(item.current_price),
+            "ends_at": item.ends_at.isoformat(),
+        })
         
         return JsonResponse({
             "message": "Auction updated successfully",
@@ -452,7 +506,11 @@ def auction_detail(request: HttpRequest, item_id: int) -> JsonResponse:
         if item.bids.exists():
             return JsonResponse({"error": "Cannot delete auction with existing bids"}, status=400)
         
+        order_book.invalidate(item.id)
+        send_auction_update(item.id, {"event": "deleted", "item_id": item.id})
         item.delete()
+        system_stats.forget_auction(item)
+        response_cache.bump(item_id)
         
         return JsonResponse({"message": "Auction deleted successfully"}, status=200)
     
@@ -460,12 +518,15 @@ def auction_detail(request: HttpRequest, item_id: int) -> JsonResponse:
         return JsonResponse({"error": "Method not allowed"}, status=405)
 
 
+@idempotent('place_bid')
 def place_bid(request: HttpRequest) -> JsonResponse:
     """
     POST /api/bids
     Place a bid on an auction item.
+    Honours the Idempotency-Key header so client retries are not placed twice.
     Validates bid_amount > current_price and auction hasn't ended.
-    Updates Item.current_price and marks previous bids as not winning.
+    The price update, winning flag and bid insert are committed atomically
+    by api.bidding.commit_bid; notifications go out after commit.
     """
     if request.method != "POST":
         return JsonResponse({"error": "Method not allowed"}, status=405)
@@ -493,49 +554,12 @@ def place_bid(request: HttpRequest) -> JsonResponse:
         return JsonResponse({"error": "Invalid bid_amount"}, status=400)
 
     try:
-        item = AuctionItem.objects.select_related("owner").get(id=item_id)
-    except AuctionItem.DoesNotExist:
-        return JsonResponse({"error": "Auction item not found"}, status=404)
-
-    if item.ends_at <= timezone.now():
-        return JsonResponse({"error": "Auction has ended"}, status=400)
-
-    if item.owner == request.user:
-        return JsonResponse({"error": "Cannot bid on your own auction"}, status=400)
-
-    if bid_amount <= item.current_price:
-        return JsonResponse({
-            "error": f"Bid must be greater than current price (${item.current_price})"
-        }, status=400)
-
-    Bid.objects.filter(item=item, is_winning=True).update(is_winning=False)
-
-    bid = Bid.objects.create(
-        user=request.user,
-        item=item,
-        bid_amount=bid_amount,
-        is_winning=True
-    )
-
-    # Find previous highest bidder to send outbid notification
-    previous_bids = Bid.objects.filter(item=item).exclude(user=request.user).order_by('-bid_amount')
-    if previous_bids.exists():
-        previous_highest_bidder = previous_bids.first().user
-        create_and_send_notification(
-            previous_highest_bidder,
-            'outbid',
-            f'You have been outbid on "{item.title}". New bid: ${bid_amount:.2f}',
-        )
+        result = commit_bid(request.user, item_id, bid_amount)
+    except BidRejected as e:
+        return JsonResponse({"error": e.message}, status=e.status)
 
-    # Send notification to auction owner about new bid
-    create_and_send_notification(
-        item.owner,
-        'new_bid',
-        f'New bid of ${bid_amount:.2f} placed on your auction "{item.title}"',
-    )
-
-    item.current_price = bid_amount
-    item.save()
+    bid = result.bid
+    item = result.item
 
     return JsonResponse({
         "message": "Bid placed successfully",
@@ -555,9 +579,59 @@ def place_bid(request: HttpRequest) -> JsonResponse:
     }, status=201)
 
 
+@idempotent('place_proxy_bid')
+def place_proxy_bid(request: HttpRequest) -> JsonResponse:
+    """
+    POST /api/bids/proxy
+    Set (or raise) a maximum bid on an auction item.
+    The server bids on the user's behalf up to max_amount, resolving all
+    competing proxies in one transaction.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    item_id = data.get("item_id")
+    max_amount_raw = data.get("max_amount")
+
+    if not item_id:
+        return JsonResponse({"error": "item_id is required"}, status=400)
+
+    if not max_amount_raw:
+        return JsonResponse({"error": "max_amount is required"}, status=400)
+
+    try:
+        max_amount = Decimal(str(max_amount_raw))
+    except (InvalidOperation, TypeError):
+        return JsonResponse({"error": "Invalid max_amount"}, status=400)
+
+    try:
+        result = commit_proxy_bid(request.user, item_id, max_amount)
+    except BidRejected as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+
+    return JsonResponse({
+        "message": "Maximum bid set successfully",
+        "proxy": {
+            "max_amount": str(max_amount),
+            "is_winning": result.leader_id == request.user.id,
+        },
+        "item": auction_item_to_dict(request, result.item)
+    }, status=201)
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=conditional.user_bids_etag)
 def user_bids(request: HttpRequest) -> JsonResponse:
     """
-    GET /api/user/bids
+    GET /api/user/bids?cursor=X&page_size=N
     Get all bids placed by the current user with auction details.
     Returns bid status (winning, outbid, won, lost) and time remaining.
     """
@@ -567,36 +641,44 @@ def user_bids(request: HttpRequest) -> JsonResponse:
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required"}, status=401)
 
-    # Get all bids by the user, grouped by auction item
-    user_bids_qs = Bid.objects.filter(user=request.user).select_related('item', 'item__owner').order_by('-timestamp')
-    
-    # Group bids by item to get the user's highest bid per item
-    items_with_bids = {}
-    for bid in user_bids_qs:
-        item_id = bid.item.id
-        if item_id not in items_with_bids:
-            items_with_bids[item_id] = {
-                'item': bid.item,
-                'user_highest_bid': bid,
-                'user_bid_amount': bid.bid_amount
-            }
-        elif bid.bid_amount > items_with_bids[item_id]['user_bid_amount']:
-            items_with_bids[item_id]['user_highest_bid'] = bid
-            items_with_bids[item_id]['user_bid_amount'] = bid.bid_amount
+    # One row per auction the user has bid on, most recently bid on first
+    items_qs = (
+        AuctionItem.objects
+        .filter(bids__user=request.user)
+        .annotate(last_user_bid_at=Max('bids__timestamp'))
+    )
+    try:
+        items, next_cursor = pagination.paginate(
+            items_qs,
+            ('-last_user_bid_at', '-id'),
+            request.GET.get('cursor'),
+            pagination.page_size(request),
+        )
+    except pagination.InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    # The user's highest bid on each auction in this page
+    highest_bids = {}
+    page_bids = (
+        Bid.objects
+        .filter(user=request.user, item_id__in=[item.id for item in items])
+        .order_by('item_id', '-bid_amount', '-timestamp')
+    )
+    for bid in page_bids:
+        highest_bids.setdefault(bid.item_id, bid)
 
     bids_list = []
     now = timezone.now()
 
-    for item_id, data in items_with_bids.items():
-        item = data['item']
-        user_bid = data['user_highest_bid']
-        
+    for item in items:
+        user_bid = highest_bids[item.id]
+
         # Determine bid status
         auction_ended = item.ends_at <= now
         
         if auction_ended:
             # For ended auctions, check if user is the winner
-            if hasattr(item, 'winner') and item.winner and item.winner.id == request.user.id:
+            if item.winner_id == request.user.id:
                 status = 'won'
                 status_text = 'Won'
             else:
@@ -641,12 +723,14 @@ def user_bids(request: HttpRequest) -> JsonResponse:
             'isActive': not auction_ended
         })
 
-    return JsonResponse({'bids': bids_list}, status=200)
+    return JsonResponse({'bids': bids_list, 'next_cursor': next_cursor}, status=200)
 
 
+@cache_control(no_cache=True)
+@condition(etag_func=conditional.questions_etag)
 def questions(request: HttpRequest) -> JsonResponse:
     """
-    GET  /api/questions?item_id=X -> list questions for an item (paginated, with nested replies)
+    GET  /api/questions?item_id=X&cursor=Y -> list questions for an item (newest first, with nested replies)
     POST /api/questions -> create a question
     """
     if request.method == "GET":
@@ -659,13 +743,17 @@ def questions(request: HttpRequest) -> JsonResponse:
         except AuctionItem.DoesNotExist:
             return JsonResponse({"error": "Auction item not found"}, status=404)
 
-        page = int(request.GET.get("page", 1))
-        per_page = int(request.GET.get("per_page", 10))
-        offset = (page - 1) * per_page
-
+        per_page = pagination.page_size(request, default=10, param="per_page")
         questions_qs = Question.objects.filter(item=item).select_related("user").prefetch_related("replies__user")
-        total = questions_qs.count()
-        questions_list = questions_qs[offset:offset + per_page]
+        try:
+            questions_list, next_cursor = pagination.paginate(
+                questions_qs,
+                ("-timestamp", "-id"),
+                request.GET.get("cursor"),
+                per_page,
+            )
+        except pagination.InvalidCursor as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
         result = []
         for q in questions_list:
@@ -698,10 +786,8 @@ def questions(request: HttpRequest) -> JsonResponse:
         return JsonResponse({
             "questions": result,
             "pagination": {
-                "page": page,
                 "per_page": per_page,
-                "total": total,
-                "total_pages": (total + per_page - 1) // per_page
+                "next_cursor": next_cursor
             }
         }, status=200)
 
@@ -886,6 +972,7 @@ def create_auction(request: HttpRequest) -> JsonResponse:
             owner=request.user,
             image=image_file
         )
+        response_cache.bump_listing()
 
         return JsonResponse({
             'message': 'Auction created successfully',
@@ -994,6 +1081,7 @@ def create_sample_auctions(request: HttpRequest) -> JsonResponse:
                 category=auction_data['category'],
                 owner=user,
             )
+        response_cache.bump_listing()
         
         return JsonResponse({
             'message': f'Created {len(sample_auctions)} sample auctions',
@@ -1012,8 +1100,8 @@ def health(request: HttpRequest) -> HttpResponse:
 
 def search_auctions(request: HttpRequest) -> JsonResponse:
     """
-    GET /api/auctions/search?q=keyword&min_price=100&max_price=1000&status=active
-    Search auctions with filters
+    GET /api/auctions/search?q=keyword&min_price=100&max_price=1000&status=active&cursor=X
+    Search auctions with filters, one page at a time
     """
     if request.method != 'GET':
         return JsonResponse({'error': 'Method not allowed'}, status=405)
@@ -1029,12 +1117,9 @@ def search_auctions(request: HttpRequest) -> JsonResponse:
     # Start with all auction items
     auctions = AuctionItem.objects.select_related('owner').all()
 
-    # Filter by search query (case-insensitive search on title and description)
+    # Filter by search query using the database's full-text index
     if query:
-        auctions = auctions.filter(
-            models.Q(title__icontains=query) | 
-            models.Q(description__icontains=query)
-        )
+        auctions = search.get_backend().search(auctions, query)
 
     # Filter by category
     if category:
@@ -1071,26 +1156,25 @@ def search_auctions(request: HttpRequest) -> JsonResponse:
             ends_at__lte=timezone.now() + timezone.timedelta(hours=24)
         )
 
-    # Order by relevance (for now, order by end time, then created time)
+    # Order by relevance when searching, otherwise by end time; id breaks ties
     if query:
-        # If there's a search query, prioritise exact title matches
-        auctions = auctions.annotate(
-            title_match=models.Case(
-                models.When(title__iexact=query, then=models.Value(0)),
-                models.When(title__istartswith=query, then=models.Value(1)),
-                default=models.Value(2),
-                output_field=models.IntegerField(),
-            )
-        ).order_by('title_match', '-ends_at', '-created_at')
+        ordering = ('-search_rank', '-ends_at', '-id')
     else:
-        auctions = auctions.order_by('-ends_at', '-created_at')
+        ordering = ('-ends_at', '-id')
+
+    try:
+        auctions, next_cursor = pagination.paginate(
+            auctions,
+            ordering,
+            request.GET.get('cursor'),
+            pagination.page_size(request),
+        )
+    except pagination.InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
     # Prepare response data
     auction_data = []
     for auction in auctions:
-        # Get bid count
-        bid_count = auction.bids.count()
-        
         # Calculate time left
         time_left = ""
         if auction.ends_at > timezone.now():
@@ -1115,7 +1199,7 @@ def search_auctions(request: HttpRequest) -> JsonResponse:
             'image': auction.image.url if auction.image else None,
             'starting_price': float(auction.starting_price),
             'current_price': float(auction.current_price),
-            'bid_count': bid_count,
+            'bid_count': auction.bid_count,
             'time_left': time_left,
             'ends_at': auction.ends_at.isoformat(),
             'category': auction.category,
@@ -1130,6 +1214,7 @@ def search_auctions(request: HttpRequest) -> JsonResponse:
     return JsonResponse({
         'auctions': auction_data,
         'count': len(auction_data),
+        'next_cursor': next_cursor,
         'query': query,
         'filters': {
             'min_price': min_price,
@@ -1397,6 +1482,8 @@ def set_currency(request: HttpRequest) -> JsonResponse:
 
 
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=conditional.notifications_etag)
 def get_notifications(request):
     """Get user's notifications with read status"""
     if not request.user.is_authenticated:
@@ -1405,7 +1492,7 @@ def get_notifications(request):
     try:
         notifications = Notification.objects.filter(
             user=request.user
-        ).order_by('-timestamp')[:20]  # Get latest 20
+        ).order_by('-timestamp')[:conditional.NOTIFICATIONS_LISTED]  # Get latest 20
         
         notifications_data = []
         for notif in notifications:
@@ -1430,39 +1517,26 @@ def track_share(request: HttpRequest) -> JsonResponse:
     """
     Track when an auction is shared on any platform
     POST /api/shares/track
+    The share is queued and written in a batch shortly after (202).
     """
     try:
         data = json.loads(request.body)
-        auction_id = data.get('auction_id')
-        platform = data.get('platform')
-        url = data.get('url')
-        
-        if not all([auction_id, platform, url]):
-            return JsonResponse({'error': 'Missing required fields'}, status=400)
-        
-        # Validate auction exists
-        try:
-            auction = AuctionItem.objects.get(id=auction_id)
-        except AuctionItem.DoesNotExist:
-            return JsonResponse({'error': 'Auction not found'}, status=404)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
         
         # Get client information
         ip_address = get_client_ip(request)
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         
-        # Create share analytics record
-        ShareAnalytics.objects.create(
-            auction=auction,
-            platform=platform,
-            url=url,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
+        # Validate without a database lookup and queue for the next batch
+        share_buffer.accept(data, ip_address, user_agent)
         
-        return JsonResponse({'message': 'Share tracked successfully'}, status=201)
+        return JsonResponse({'message': 'Share accepted'}, status=202)
         
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except share_buffer.InvalidShare as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'error': f'Server error: {str(e)}'}, status=500)
 
@@ -1480,47 +1554,14 @@ def get_analytics(request: HttpRequest, auction_id: int) -> JsonResponse:
         except AuctionItem.DoesNotExist:
             return JsonResponse({'error': 'Auction not found'}, status=404)
         
-        # Get total shares
-        total_shares = ShareAnalytics.objects.filter(auction=auction).count()
-        
-        # Get shares by platform
-        platform_stats = (
-            ShareAnalytics.objects
-            .filter(auction=auction)
-            .values('platform')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
-        
-        # Get recent shares (last 7 days)
-        seven_days_ago = timezone.now() - timedelta(days=7)
-        recent_shares = ShareAnalytics.objects.filter(
-            auction=auction,
-            timestamp__gte=seven_days_ago
-        ).count()
+        # Totals, platform breakdown and daily series from the rollups
+        summary = shares.auction_summary(auction.id)
+        total_shares = summary['total']
+        recent_shares = summary['recent']
         
         # Calculate daily average for recent shares
         daily_average = recent_shares / 7 if recent_shares > 0 else 0
         
-        # Get shares over time (last 30 days by day)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        shares_over_time = []
-        
-        for i in range(30):
-            date = thirty_days_ago + timedelta(days=i)
-            next_date = date + timedelta(days=1)
-            
-            day_shares = ShareAnalytics.objects.filter(
-                auction=auction,
-                timestamp__gte=date,
-                timestamp__lt=next_date
-            ).count()
-            
-            shares_over_time.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'shares': day_shares
-            })
-        
         # Calculate conversion rate (this is a placeholder - you'd need to track actual clicks)
         total_clicks = total_shares * 1.5  # Estimated 1.5 clicks per share
         conversion_rate = round((total_clicks / total_shares * 100) if total_shares > 0 else 0, 1)
@@ -1530,9 +1571,10 @@ def get_analytics(request: HttpRequest, auction_id: int) -> JsonResponse:
             'totalClicks': total_clicks,
             'conversionRate': conversion_rate,
             'recentShares': recent_shares,
+            'uniqueSharers': summary['unique'],
             'dailyAverage': round(daily_average, 1),
-            'platformStats': list(platform_stats),
-            'sharesOverTime': shares_over_time
+            'platformStats': summary['platforms'],
+            'sharesOverTime': summary['series']
         }
         
         return JsonResponse(analytics_data, status=200)
@@ -1548,35 +1590,13 @@ def get_global_analytics(request: HttpRequest) -> JsonResponse:
     GET /api/shares/analytics
     """
     try:
-        # Get total shares across all auctions
-        total_shares = ShareAnalytics.objects.count()
-        
-        # Get platform breakdown
-        platform_stats = (
-            ShareAnalytics.objects
-            .values('platform')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
-        
-        # Get top shared auctions
-        top_auctions = (
-            ShareAnalytics.objects
-            .values('auction__id', 'auction__title')
-            .annotate(share_count=Count('id'))
-            .order_by('-share_count')[:10]
-        )
-        
-        # Get recent activity
-        recent_shares = ShareAnalytics.objects.filter(
-            timestamp__gte=timezone.now() - timedelta(days=7)
-        ).count()
+        summary = shares.global_summary()
         
         analytics_data = {
-            'totalShares': total_shares,
-            'recentShares': recent_shares,
-            'platformStats': list(platform_stats),
-            'topAuctions': list(top_auctions)
+            'totalShares': summary['total'],
+            'recentShares': summary['recent'],
+            'platformStats': summary['platforms'],
+            'topAuctions': summary['top_auctions']
         }
         
         return JsonResponse(analytics_data, status=200)
@@ -1601,74 +1621,14 @@ def get_system_stats(request: HttpRequest) -> JsonResponse:
     """
     GET /api/system/stats
     Get comprehensive system statistics for admin dashboard
+    Served from the materialised snapshot in api/system_stats.py
     """
     if request.method != 'GET':
         return JsonResponse({'error': 'Method not allowed'}, status=405)
     
     try:
-        from django.db.models import Count, Avg, Sum
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        now = timezone.now()
-        last_24h = now - timedelta(hours=24)
-        last_7d = now - timedelta(days=7)
-        
-        # User statistics
-        total_users = User.objects.count()
-        new_users_24h = User.objects.filter(date_joined__gte=last_24h).count()
-        new_users_7d = User.objects.filter(date_joined__gte=last_7d).count()
-        
-        # Auction statistics
-        total_auctions = AuctionItem.objects.count()
-        active_auctions = AuctionItem.objects.filter(ends_at__gt=now).count()
-        ended_auctions = AuctionItem.objects.filter(ends_at__lte=now).count()
-        
-        # Bid statistics
-        total_bids = Bid.objects.count()
-        bids_24h = Bid.objects.filter(timestamp__gte=last_24h).count()
-        avg_bid_amount = Bid.objects.aggregate(avg=Avg('bid_amount'))['avg'] or 0
-        
-        # Q&A statistics
-        total_questions = Question.objects.count()
-        total_replies = Reply.objects.count()
-        
-        # Category breakdown
-        category_stats = {}
-        for category, _ in AuctionItem.CATEGORY_CHOICES:
-            count = AuctionItem.objects.filter(category=category).count()
-            if count > 0:
-                category_stats[category] = count
-        
-        # Recent activity
-        recent_auctions = AuctionItem.objects.filter(
-            created_at__gte=last_24h
-        ).count()
-        
-        stats = {
-            'users': {
-                'total': total_users,
-                'new_24h': new_users_24h,
-                'new_7d': new_users_7d
-            },
-            'auctions': {
-                'total': total_auctions,
-                'active': active_auctions,
-                'ended': ended_auctions,
-                'recent': recent_auctions
-            },
-            'bids': {
-                'total': total_bids,
-                'last_24h': bids_24h,
-                'average_amount': float(avg_bid_amount)
-            },
-            'qa': {
-                'total_questions': total_questions,
-                'total_replies': total_replies
-            },
-            'categories': category_stats,
-            'timestamp': now.isoformat()
-        }
+        stats = system_stats.as_dict(system_stats.snapshot())
+        stats['timestamp'] = timezone.now().isoformat()
         
         return JsonResponse(stats, status=200)
         
@@ -1676,45 +1636,33 @@ def get_system_stats(request: HttpRequest) -> JsonResponse:
         return JsonResponse({'error': f'Server error: {str(e)}'}, status=500)
 
 
-def export_auctions_csv(request: HttpRequest) -> JsonResponse:
+def export_auctions_csv(request: HttpRequest) -> HttpResponse:
     """
     GET /api/auctions/export
     Export auction data as CSV for admin use
+
+    Streams the rows instead of building the file in memory. Optional query
+    params: created_from / created_to (ISO date or datetime), category
+    (comma separated) and gzip=1 for a compressed download.
     """
     if request.method != 'GET':
         return JsonResponse({'error': 'Method not allowed'}, status=405)
-    
+
     try:
-        import csv
-        from django.http import HttpResponse
-        
-        # Get all auctions with related data
-        auctions = AuctionItem.objects.select_related('owner').prefetch_related('bids').all()
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="auctions_export.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow([
-            'ID', 'Title', 'Owner', 'Category', 'Starting Price', 
-            'Current Price', 'Bids Count', 'Status', 'Created At', 'Ends At'
-        ])
-        
-        for auction in auctions:
-            writer.writerow([
-                auction.id,
-                auction.title,
-                auction.owner.email,
-                auction.category,
-                auction.starting_price,
-                auction.current_price,
-                auction.bids.count(),
-                'Active' if auction.ends_at > timezone.now() else 'Ended',
-                auction.created_at.isoformat(),
-                auction.ends_at.isoformat()
-            ])
-        
+        queryset = exports.filtered(request.GET)
+    except exports.InvalidFilter as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    try:
+        chunks = exports.csv_chunks(exports.rows(queryset))
+        filename = 'auctions_export.csv'
+        if request.GET.get('gzip') in ('1', 'true'):
+            response = StreamingHttpResponse(exports.gzipped(chunks), content_type='application/gzip')
+            filename += '.gz'
+        else:
+            response = StreamingHttpResponse(chunks, content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
-        
+
     except Exception as e:
         return JsonResponse({'error': f'Export failed: {str(e)}'}, status=500)
\ No newline at end of file
@@ -0,0 +1,117 @@
+export interface AuctionBid {
+  id: number
+  bid_amount: string
+  timestamp: string
+  is_winning: boolean
+  is_proxy: boolean
+  user: {
+    id: number
+    first_name: string
+    last_name: string
+  }
+}
+
+export interface AuctionSnapshot {
+  item_id: number
+  current_price: string
+  bid_count: number
+  leading_bidder_id: number | null
+  status: string
+  ends_at: string
+}
+
+export interface AuctionUpdate {
+  event: 'bid' | 'closed' | 'updated' | 'deleted'
+  item_id: number
+  current_price?: string
+  bid_count?: number
+  leading_bidder_id?: number | null
+  bids?: AuctionBid[]
+  winner_id?: number | null
+  title?: string
+  ends_at?: string
+}
+
+interface AuctionSocketHandlers {
+  onSnapshot: (snapshot: AuctionSnapshot) => void
+  onUpdate: (update: AuctionUpdate) => void
+}
+
+/**
+ * Live updates for a single auction page. Replaces polling the detail
+ * endpoint: the server sends a snapshot on (re)connect and a delta per change.
+ */
+class AuctionSocket {
+  private socket: WebSocket | null = null
+  private reconnectAttempts = 0
+  private maxReconnectAttempts = 5
+  private reconnectDelay = 1000
+  private closedByClient = false
+
+  constructor(private itemId: number, private handlers: AuctionSocketHandlers) {}
+
+  connect() {
+    this.closedByClient = false
+
+    try {
+      const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
+      const wsUrl = `${protocol}//${window.location.host.replace(':5173', ':8001')}/ws/auctions/${this.itemId}/`
+
+      this.socket = new WebSocket(wsUrl)
+
+      this.socket.onopen = () => {
+        this.reconnectAttempts = 0
+      }
+
+      this.socket.onmessage = (event) => {
+        try {
+          const data = JSON.parse(event.data)
+          if (data.type === 'auction_snapshot') {
+            this.handlers.onSnapshot(data.auction)
+          } else if (data.type === 'auction_update') {
+            this.handlers.onUpdate(data.update)
+          }
+        } catch (error) {
+          console.error('Error parsing auction WebSocket message:', error)
+        }
+      }
+
+      this.socket.onclose = (event) => {
+        this.socket = null
+
+        // Attempt to reconnect if not a normal closure
+        if (!this.closedByClient && event.code !== 1000 && this.reconnectAttempts < this.maxReconnectAttempts) {
+          this.scheduleReconnect()
+        }
+      }
+
+      this.socket.onerror = (error) => {
+        console.error('Auction WebSocket error:', error)
+      }
+    } catch (error) {
+      console.error('Error creating auction WebSocket:', error)
+      this.scheduleReconnect()
+    }
+  }
+
+  private scheduleReconnect() {
+    this.reconnectAttempts++
+    const delay = this.reconnectDelay * Math.pow(2, this.reconnectAttempts - 1)
+
+    setTimeout(() => {
+      if (!this.closedByClient) {
+        this.connect()
+      }
+    }, delay)
+  }
+
+  disconnect() {
+    this.closedByClient = true
+    if (this.socket) {
+      this.socket.close(1000, 'Client disconnect')
+      this.socket = null
+    }
+  }
+}
+
+export default AuctionSocket
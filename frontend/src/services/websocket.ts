@@ -1,7 +1,9 @@
 interface WebSocketMessage {
   type: string
   notification?: Notification
+  notifications?: Notification[]
   count?: number
+  unread_count?: number
   message?: string
 }
 
@@ -38,9 +40,7 @@ class WebSocketService {
       this.socket.onopen = () => {
         this.isConnecting = false
         this.reconnectAttempts = 0
-        
-        // Request initial unread count
-        this.sendMessage({ type: 'get_unread_count' })
+        // The server sends a notifications_snapshot frame on connect
       }
 
       this.socket.onmessage = (event) => {
@@ -91,8 +91,10 @@ class WebSocketService {
         this.emit('new_notification', data.notification)
         break
       
-      case 'existing_notification':
-        this.emit('existing_notification', data.notification)
+      case 'notifications_snapshot':
+        this.unreadCount = data.unread_count || 0
+        this.emit('notifications_snapshot', data.notifications || [])
+        this.emit('unread_count_update', this.unreadCount)
         break
       
       case 'unread_count_update':
@@ -0,0 +1,56 @@
+import os
+
+
+backends = {
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'database': 'django.core.cache.backends.db.DatabaseCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+
+# Table used by the 'database' backend (created by the api migrations)
+CACHE_TABLE = 'cache_entries'
+
+
+def config(base_dir):
+    """
+    Cache configuration with environment-based selection.
+    Every backend except 'locmem' is shared by all workers on the host,
+    which rate limiting, idempotency keys and the order book rely on.
+    - Production: Redis (when DJANGO_ENV=production or REDIS_CACHE_URL is set)
+    - Local development: a table in the SQLite database
+    - CACHE_BACKEND overrides the choice: redis, database, file or locmem
+    """
+    environment = os.getenv('DJANGO_ENV', 'development').lower()
+    redis_url = os.getenv('REDIS_CACHE_URL', '')
+
+    default = 'redis' if redis_url or environment == 'production' else 'database'
+    backend = os.getenv('CACHE_BACKEND', default).lower()
+    if backend not in backends:
+        backend = default
+
+    options = {}
+    if backend == 'redis':
+        # Database 1 keeps cache keys apart from the channel layer on database 0
+        location = redis_url or 'redis://{}/1'.format(os.getenv('REDIS_HOST', '127.0.0.1:6379'))
+        options = {
+            'socket_connect_timeout': 5,
+            'socket_timeout': 5,
+        }
+    elif backend == 'database':
+        location = CACHE_TABLE
+    elif backend == 'file':
+        location = os.getenv('CACHE_LOCATION', os.path.join(base_dir, '.cache'))
+    else:
+        location = 'unique-snowflake'
+
+    config = {
+        'BACKEND': backends[backend],
+        'LOCATION': location,
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'auction'),
+        'TIMEOUT': 300,
+    }
+    if options:
+        config['OPTIONS'] = options
+
+    return config
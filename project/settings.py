@@ -10,7 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/stable/ref/settings/
 """
 
-from . import database
+from . import cache, database
 import os
 from dotenv import load_dotenv
 
@@ -232,6 +232,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
 
 CORS_ALLOW_METHODS = [
@@ -257,7 +258,10 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 # Email configuration
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend writes messages
+# to EMAIL_FILE_PATH instead of sending them, for local runs and tests
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', os.path.join(BASE_DIR, 'logs', 'emails'))
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -302,13 +306,92 @@ SOCIALACCOUNT_PROVIDERS = {
 RATELIMIT_ENABLE = True
 RATELIMIT_USE_CACHE = 'default'
 
+# Shared across workers so rate limits and cached state hold site-wide
+# (project/cache.py; key names are registered in api/cache_keys.py)
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+    'default': cache.config(BASE_DIR)
 }
 
+# Per-auction order book for hot auctions (api/order_book.py)
+# '' disables it, 'local' keeps it in-process, 'cache' shares it via CACHES.
+# 'local' does not see edits or closes made by other processes until
+# ORDER_BOOK_TTL expires, so use 'cache' when running more than one worker
+ORDER_BOOK_BACKEND = os.getenv('ORDER_BOOK_BACKEND', '')
+ORDER_BOOK_CACHE_ALIAS = 'default'
+ORDER_BOOK_MAX_ITEMS = 1000
+ORDER_BOOK_RECENT_BIDS = 10
+ORDER_BOOK_TTL = 60  # seconds
+
+# Step used when a proxy (maximum) bid outbids a rival (api/bidding.py)
+PROXY_BID_INCREMENT = '1.00'
+
+# Idempotency-Key replay window for bid submission (api/idempotency.py)
+IDEMPOTENCY_CACHE_ALIAS = 'default'
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # 24 hours
+# How long a claimed key blocks duplicates while its request runs; keep it
+# above the worker timeout
+IDEMPOTENCY_PENDING_TTL = 60  # seconds
+
+# Auction search backend (api/search.py)
+# 'auto' picks full-text search for the database; 'basic' forces icontains
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+
+# Versioned auction detail/listing responses (api/response_cache.py)
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300  # seconds
+
+# Cursor pagination for list endpoints (api/pagination.py)
+PAGINATION_PAGE_SIZE = 20
+PAGINATION_MAX_PAGE_SIZE = 100
+
+# Rows fetched per database round trip by the streaming CSV export (api/exports.py)
+EXPORT_CHUNK_SIZE = 2000
+
+# Daily share rollups (api/shares.py)
+# Raw share events older than this are pruned by compact_share_rollups; None keeps them
+SHARE_RAW_RETENTION_DAYS = 90
+
+# Buffered share ingestion (api/share_buffer.py)
+# Events are written in batches of SHARE_BUFFER_SIZE or after SHARE_BUFFER_MAX_AGE
+# seconds; 0 writes each share as it arrives
+SHARE_BUFFER_SIZE = int(os.getenv('SHARE_BUFFER_SIZE', '500'))
+SHARE_BUFFER_MAX_AGE = 5  # seconds
+SHARE_BUFFER_DIR = os.getenv('SHARE_BUFFER_DIR', os.path.join(BASE_DIR, 'logs', 'share_buffer'))
+# fsync each spilled event so acknowledged shares survive a host crash, not
+# just a process crash; costs a disk sync per share
+SHARE_BUFFER_FSYNC = os.getenv('SHARE_BUFFER_FSYNC', 'False').lower() == 'true'
+# Failed batches are retried on each flush, then moved to SHARE_BUFFER_DIR/failed
+SHARE_BUFFER_MAX_ATTEMPTS = 5
+
+# Materialised /api/system/stats snapshot (api/system_stats.py)
+# Recounted by refresh_system_stats, or on read once older than this
+SYSTEM_STATS_MAX_AGE = 300  # seconds
+
+# Notification retention (api/notification_archive.py)
+# Read notifications older than this are moved to the archive table by
+# archive_notifications; None keeps them in the notifications table
+NOTIFICATION_RETENTION_DAYS = 30
+NOTIFICATION_ARCHIVE_BATCH_SIZE = 1000
+
+# Outbox for emails and notifications (api/outbox.py), drained by deliver_outbox
+# Failed deliveries retry after OUTBOX_RETRY_BASE seconds, doubling up to
+# OUTBOX_RETRY_MAX, and are marked failed after OUTBOX_MAX_ATTEMPTS
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_BASE = 30  # seconds
+OUTBOX_RETRY_MAX = 3600  # seconds
+OUTBOX_LEASE = 300  # seconds a worker holds a batch before others may retry it
+OUTBOX_SENT_RETENTION_DAYS = 7
+
+# Pooled mail delivery (api/mailer.py)
+# Emails go out send_messages() chunks of MAIL_SEND_BATCH over one connection,
+# reopened after MAIL_CONNECTION_MAX_MESSAGES or MAIL_CONNECTION_IDLE seconds idle
+MAIL_SEND_BATCH = 50
+MAIL_CONNECTION_MAX_MESSAGES = 100
+MAIL_CONNECTION_IDLE = 30  # seconds
+# Messages per second per recipient domain; 'default' applies to each unlisted domain
+MAIL_RATE_LIMITS = {'default': 10, 'gmail.com': 5}
+
 # Security headers configuration
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True